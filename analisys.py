@@ -0,0 +1,245 @@
+"""
+Analítica de renta fija: TIR, duration modificada, convexidad y curva de rendimientos
+
+Todos los cálculos se hacen sobre el panel completo a la vez. Los flujos de
+cada bono se acomodan en matrices (bonos x pagos) rellenas con ceros y la TIR
+se resuelve con Newton vectorizado, con bisección para los que no convergen.
+
+Convenciones: tasa efectiva anual, plazos en años de 365 días desde la fecha
+de valuación y precios por cada 100 de valor nominal en la moneda de los flujos.
+Una serie con patas en dólares (AL30D, AL30C) se toma como hard-dollar: paga
+en dólares y la pata en pesos no tiene TIR (su precio no está en esa moneda).
+"""
+import numpy as np
+import pandas as pd
+
+from dolar_mep import clasificar_simbolos
+from referencia import obtener_referencia
+
+BASE_DIAS = 365.0
+
+# Límites de búsqueda de la TIR; un piso cerca de -100% hacía que un precio en
+# otra moneda que la de los flujos 'convergiera' al borde en lugar de fallar
+TASA_MINIMA = -0.5
+TASA_MAXIMA = 10.0
+
+# Plazos (años) candidatos para el parámetro tau de Nelson-Siegel
+TAUS_NELSON_SIEGEL = np.linspace(0.25, 10.0, 40)
+
+
+def flujos_bullet(panel, valor_nominal=100.0):
+    """
+    Cronograma por defecto: un único pago de valor_nominal al vencimiento
+    Sirve para letras y bonos cupón cero; para el resto hay que pasar los flujos
+    """
+    return pd.DataFrame({
+        'symbol': panel['symbol'].astype(str).to_numpy(),
+        'fecha': pd.to_datetime(panel['expiration'], errors='coerce').to_numpy(),
+        'monto': valor_nominal,
+    }).dropna(subset=['fecha'])
+
+
+def matriz_flujos(claves, flujos, fecha_valuacion):
+    """
+    Arma las matrices de montos y plazos (bonos x pagos) para las claves pedidas
+    flujos tiene columnas symbol, fecha y monto; solo se usan los pagos futuros
+    Las claves repetidas comparten cronograma y las que no tienen pagos quedan en cero
+    """
+    fecha_valuacion = pd.Timestamp(fecha_valuacion)
+    unicas, inversa = np.unique(np.asarray(claves, dtype=str), return_inverse=True)
+
+    futuros = flujos[pd.to_datetime(flujos['fecha']) > fecha_valuacion]
+    posicion = pd.Index(unicas).get_indexer(futuros['symbol'].astype(str))
+    futuros = futuros[posicion >= 0].assign(fila=posicion[posicion >= 0])
+    futuros = futuros.sort_values(['fila', 'fecha'])
+    columna = futuros.groupby('fila').cumcount().to_numpy()
+
+    n_pagos = int(columna.max()) + 1 if len(columna) else 1
+    montos = np.zeros((len(unicas), n_pagos))
+    plazos = np.zeros((len(unicas), n_pagos))
+    filas = futuros['fila'].to_numpy()
+    montos[filas, columna] = futuros['monto'].to_numpy(dtype=float)
+    plazos[filas, columna] = (pd.to_datetime(futuros['fecha']) - fecha_valuacion).dt.days.to_numpy() / BASE_DIAS
+    return montos[inversa], plazos[inversa]
+
+
+def valor_presente(tasas, montos, plazos):
+    """Valor presente de cada fila de flujos a su tasa"""
+    return (montos * (1 + tasas[:, None]) ** -plazos).sum(axis=1)
+
+
+def calcular_tir(precios, montos, plazos, tolerancia=1e-10, max_iteraciones=50):
+    """
+    TIR de cada bono resolviendo valor_presente(tir) = precio
+    Newton vectorizado sobre todo el panel; los que no convergen (o se salen
+    del rango) se resuelven por bisección, también vectorizada
+    """
+    precios = np.asarray(precios, dtype=float)
+    validos = (precios > 0) & (montos.sum(axis=1) > 0)
+    tasas = np.full(len(precios), 0.1)
+    pendientes = validos.copy()
+
+    for _ in range(max_iteraciones):
+        if not pendientes.any():
+            break
+        m, t, y = montos[pendientes], plazos[pendientes], tasas[pendientes]
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            descuento = (1 + y[:, None]) ** -t
+            error = (m * descuento).sum(axis=1) - precios[pendientes]
+            derivada = -(t * m * descuento).sum(axis=1) / (1 + y)
+            nueva = y - error / derivada
+        # Un paso fuera del rango queda en el borde y lo resuelve la bisección
+        nueva = np.clip(nueva, TASA_MINIMA, TASA_MAXIMA)
+        tasas[pendientes] = nueva
+        convergidos = np.abs(nueva - y) < tolerancia
+        pendientes[np.flatnonzero(pendientes)[convergidos]] = False
+
+    fuera_de_rango = ~np.isfinite(tasas) | (tasas <= TASA_MINIMA) | (tasas >= TASA_MAXIMA)
+    pendientes = validos & (pendientes | fuera_de_rango)
+    if pendientes.any():
+        tasas[pendientes] = _tir_biseccion(precios[pendientes], montos[pendientes], plazos[pendientes])
+
+    tasas[~validos] = np.nan
+    return tasas
+
+
+def _tir_biseccion(precios, montos, plazos, iteraciones=100):
+    """Bisección vectorizada entre TASA_MINIMA y TASA_MAXIMA; NaN si no hay cambio de signo"""
+    bajo = np.full(len(precios), TASA_MINIMA + 1e-9)
+    alto = np.full(len(precios), TASA_MAXIMA)
+    error_bajo = valor_presente(bajo, montos, plazos) - precios
+    con_solucion = error_bajo * (valor_presente(alto, montos, plazos) - precios) <= 0
+
+    for _ in range(iteraciones):
+        medio = (bajo + alto) / 2
+        error_medio = valor_presente(medio, montos, plazos) - precios
+        mismo_signo = error_medio * error_bajo > 0
+        bajo = np.where(mismo_signo, medio, bajo)
+        error_bajo = np.where(mismo_signo, error_medio, error_bajo)
+        alto = np.where(mismo_signo, alto, medio)
+
+    return np.where(con_solucion, (bajo + alto) / 2, np.nan)
+
+
+def duration_convexidad(tasas, montos, plazos):
+    """Duration modificada y convexidad de cada bono a su TIR"""
+    factor = 1 + tasas[:, None]
+    descuento = montos * factor ** -plazos
+    precio = descuento.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        macaulay = (plazos * descuento).sum(axis=1) / precio
+        convexidad = (plazos * (plazos + 1) * descuento / factor ** 2).sum(axis=1) / precio
+    return macaulay / (1 + tasas), convexidad
+
+
+def analizar_panel(panel, flujos=None, fecha_valuacion=None, precio='last'):
+    """
+    Calcula TIR, duration modificada y convexidad de todo un panel de BYMA
+    flujos tiene columnas symbol, fecha y monto (por cada 100 de nominal). Un
+    cronograma cargado para la raíz de una serie (AL30) vale también para sus
+    patas en dólares (AL30D, AL30C). Sin flujos se usan los cronogramas guardados
+    en la referencia de instrumentos; los instrumentos sin cronograma se valúan
+    con un único pago de 100 al vencimiento
+    moneda_flujos es 'dolares' para las series con patas D o C en el panel y
+    'pesos' para el resto; la pata en pesos de una serie en dólares queda sin TIR
+    """
+    panel = panel[panel[precio] > 0]
+    if panel.empty:
+        return pd.DataFrame(columns=['symbol', 'raiz', 'moneda', 'moneda_flujos', 'vencimiento', 'precio', 'plazo', 'tir', 'duration_modificada', 'convexidad'])
+
+    if fecha_valuacion is None:
+        fechas = pd.to_datetime(panel['datetime'], errors='coerce') if 'datetime' in panel.columns else pd.Series(dtype='datetime64[ns]')
+        fecha_valuacion = fechas.max().normalize() if fechas.notna().any() else pd.Timestamp.today().normalize()
+
+    simbolos = panel['symbol'].astype(str).str.upper().reset_index(drop=True)
+    partes = clasificar_simbolos(simbolos)
+    if flujos is None:
+        flujos = obtener_referencia().flujos()
+
+    # Cada bono usa el cronograma de su símbolo o, si no hay, el de su raíz
+    bullet = flujos_bullet(panel.assign(symbol=simbolos.to_numpy()))
+    if flujos is not None and not flujos.empty:
+        flujos = flujos.assign(symbol=flujos['symbol'].astype(str).str.upper())
+        cargados = set(flujos['symbol'])
+        claves = simbolos.where(simbolos.isin(cargados), partes['raiz'])
+        claves = claves.where(claves.isin(cargados), simbolos)
+        flujos = pd.concat([flujos, bullet[~bullet['symbol'].isin(cargados)]], ignore_index=True)
+    else:
+        claves = simbolos
+        flujos = bullet
+
+    # Moneda de los flujos: en dólares si la serie cotiza alguna pata en dólares
+    en_dolares = partes['raiz'].isin(partes.loc[partes['moneda'].isin(['mep', 'cable']), 'raiz'])
+    moneda_flujos = np.where(en_dolares, 'dolares', 'pesos')
+    precio_en_moneda = (partes['moneda'] != 'pesos').to_numpy() == en_dolares.to_numpy()
+
+    montos, plazos = matriz_flujos(claves.to_numpy(), flujos, fecha_valuacion)
+    precios = panel[precio].to_numpy(dtype=float)
+    tasas = calcular_tir(np.where(precio_en_moneda, precios, np.nan), montos, plazos)
+    duration, convexidad = duration_convexidad(tasas, montos, plazos)
+
+    return pd.DataFrame({
+        'symbol': simbolos,
+        'raiz': partes['raiz'],
+        'moneda': partes['moneda'],
+        'moneda_flujos': moneda_flujos,
+        'vencimiento': pd.to_datetime(panel['expiration'], errors='coerce').to_numpy(),
+        'precio': precios,
+        'plazo': plazos.max(axis=1),
+        'tir': tasas,
+        'duration_modificada': duration,
+        'convexidad': convexidad,
+    })
+
+
+def _bases_nelson_siegel(plazos, tau):
+    """Matriz de regresores de Nelson-Siegel para un tau"""
+    x = plazos / tau
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pendiente = np.where(x > 0, (1 - np.exp(-x)) / x, 1.0)
+    return np.column_stack([np.ones_like(plazos), pendiente, pendiente - np.exp(-x)])
+
+
+def tasa_curva(parametros, plazos):
+    """Tasa de la curva de Nelson-Siegel en los plazos pedidos"""
+    plazos = np.asarray(plazos, dtype=float)
+    base = _bases_nelson_siegel(plazos, parametros['tau'])
+    return base @ np.array([parametros['beta0'], parametros['beta1'], parametros['beta2']])
+
+
+def ajustar_curva(analisis, por='moneda', taus=TAUS_NELSON_SIEGEL, min_puntos=4):
+    """
+    Ajusta una curva de Nelson-Siegel por grupo (por defecto, por moneda)
+    analisis es la salida de analizar_panel; solo entran los instrumentos cuyo
+    precio está en la moneda de sus flujos (la pata en pesos de un bono en
+    dólares no entra en la curva en pesos)
+    Para cada tau candidato los betas salen de mínimos cuadrados lineales y se
+    queda el tau de menor error. Retorna un DataFrame con un grupo por fila
+    """
+    validos = np.isfinite(analisis['tir']) & (analisis['plazo'] > 0)
+    if 'moneda_flujos' in analisis.columns:
+        validos &= (analisis['moneda'] != 'pesos') == (analisis['moneda_flujos'] == 'dolares')
+    validos = analisis[validos]
+    curvas = []
+    for grupo, datos in validos.groupby(por):
+        if len(datos) < min_puntos:
+            continue
+        plazos = datos['plazo'].to_numpy(dtype=float)
+        tasas = datos['tir'].to_numpy(dtype=float)
+
+        # Todos los tau a la vez: (taus x puntos x 3)
+        bases = np.stack([_bases_nelson_siegel(plazos, tau) for tau in taus])
+        betas = np.stack([np.linalg.lstsq(base, tasas, rcond=None)[0] for base in bases])
+        errores = np.sqrt((((bases @ betas[:, :, None])[:, :, 0] - tasas) ** 2).mean(axis=1))
+        mejor = int(np.argmin(errores))
+
+        curvas.append({
+            por: grupo,
+            'beta0': betas[mejor, 0],
+            'beta1': betas[mejor, 1],
+            'beta2': betas[mejor, 2],
+            'tau': taus[mejor],
+            'rmse': errores[mejor],
+            'puntos': len(datos),
+        })
+    return pd.DataFrame(curvas)
@@ -0,0 +1,237 @@
+"""
+Scanner de arbitrajes entre patas de moneda y plazos de liquidación
+
+Las puntas (bid/ask) de todo el panel se indexan por (raíz, moneda, plazo) y
+se buscan, con las puntas y no con el último precio:
+
+    libro_cruzado  un mismo instrumento con bid mayor que ask
+    mep / ccl      comprar dólares por una serie y venderlos por otra a un
+                   tipo de cambio mayor (ask pesos / bid D < bid pesos / ask D)
+    canje          pasar dólares MEP a cable por una serie y volver por otra
+    colocacion     comprar a un plazo y vender a uno posterior a una tasa
+                   implícita mayor que la caución
+    financiacion   vender a un plazo y recomprar a uno posterior a una tasa
+                   implícita menor que la caución
+
+Los cruces entre series se arman por plazo con matrices (series x series),
+así que el panel completo se recorre en milisegundos en cada consulta.
+"""
+import argparse
+import time
+from datetime import datetime
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from byma_bonos import ENDPOINTS_RENTA_FIJA, PLAZOS_LIQUIDACION, OpenBYMAdata, aplicar_esquema
+from dolar_mep import clasificar_simbolos
+from transporte import transporte_compartido
+
+# Datos de cada punta que se indexan
+COLUMNAS_PUNTA = ['symbol', 'bid', 'ask', 'bid_size', 'ask_size']
+
+# Días hábiles hasta la liquidación de cada plazo (se toman como días corridos)
+DIAS_PLAZO = {'T0': 0, 'T1': 1, 'T2': 2}
+
+# Cruces de tipo de cambio: (tipo, moneda base, moneda cotizada)
+# El precio es la cantidad de moneda base por unidad de la cotizada
+CRUCES = [('mep', 'pesos', 'mep'), ('ccl', 'pesos', 'cable'), ('canje', 'mep', 'cable')]
+
+COLUMNAS_OPORTUNIDAD = ['tipo', 'compra', 'plazo_compra', 'venta', 'plazo_venta',
+                        'precio_compra', 'precio_venta', 'ganancia', 'monto']
+
+
+def indexar_puntas(panel):
+    """
+    Indexa las puntas del panel por (raiz, moneda, plazo)
+    Las puntas en cero o nulas quedan como NaN y se descartan los instrumentos
+    sin ninguna punta. Sin columna 'settlement' se asume T1
+    """
+    puntas = panel[COLUMNAS_PUNTA].copy()
+    puntas['symbol'] = puntas['symbol'].astype(str).str.upper()
+    for col in ['bid', 'ask']:
+        puntas[col] = pd.to_numeric(puntas[col], errors='coerce')
+        puntas[col] = puntas[col].where(puntas[col] > 0)
+    for col in ['bid_size', 'ask_size']:
+        puntas[col] = pd.to_numeric(puntas[col], errors='coerce').fillna(0)
+
+    codigos = {codigo: plazo for plazo, codigo in PLAZOS_LIQUIDACION.items()}
+    if 'settlement' in panel.columns:
+        puntas['plazo'] = panel['settlement'].astype(str).map(codigos).to_numpy()
+    else:
+        puntas['plazo'] = 'T1'
+    puntas = pd.concat([puntas, clasificar_simbolos(puntas['symbol'])], axis=1)
+
+    puntas = puntas.dropna(subset=['raiz', 'moneda', 'plazo'])
+    puntas = puntas.dropna(subset=['bid', 'ask'], how='all')
+    puntas = puntas.drop_duplicates(['raiz', 'moneda', 'plazo'], keep='last')
+    return puntas.set_index(['raiz', 'moneda', 'plazo']).sort_index()
+
+
+def _oportunidades(tipo, compra, venta, datos):
+    """Arma las filas de oportunidades con las columnas comunes"""
+    datos = dict(datos, tipo=tipo, compra=compra, venta=venta)
+    return pd.DataFrame(datos, columns=COLUMNAS_OPORTUNIDAD)
+
+
+def libros_cruzados(puntas, umbral=0.0):
+    """Instrumentos cuyo bid supera al ask (comprar en el ask y vender en el bid)"""
+    cruzados = puntas[puntas['bid'] > puntas['ask'] * (1 + umbral)]
+    plazos = cruzados.index.get_level_values('plazo')
+    return _oportunidades('libro_cruzado', cruzados['symbol'].to_numpy(), cruzados['symbol'].to_numpy(), {
+        'plazo_compra': plazos,
+        'plazo_venta': plazos,
+        'precio_compra': cruzados['ask'].to_numpy(),
+        'precio_venta': cruzados['bid'].to_numpy(),
+        'ganancia': (cruzados['bid'] / cruzados['ask'] - 1).to_numpy(),
+        'monto': np.minimum(cruzados['bid_size'], cruzados['ask_size']).to_numpy(),
+    })
+
+
+def cruces_tipo_de_cambio(puntas, umbral=0.0):
+    """
+    Pares de series de un mismo plazo donde conviene comprar la moneda cotizada
+    por una (ask base / bid cotizada) y venderla por otra (bid base / ask cotizada)
+    compra y venta son las raíces; monto es la cantidad de moneda cotizada que
+    admiten las puntas de las cuatro patas
+    """
+    resultados = []
+    for tipo, base, cotizada in CRUCES:
+        for plazo in puntas.index.get_level_values('plazo').unique():
+            try:
+                patas_base = puntas.xs((base, plazo), level=('moneda', 'plazo'))
+                patas_cotizada = puntas.xs((cotizada, plazo), level=('moneda', 'plazo'))
+            except KeyError:
+                continue
+            pares = patas_base.join(patas_cotizada, how='inner', lsuffix='_base', rsuffix='_cotizada')
+            if len(pares) < 2:
+                continue
+
+            # Tipo de cambio de cada serie para comprar y para vender la moneda cotizada
+            precio_compra = (pares['ask_base'] / pares['bid_cotizada']).to_numpy()
+            precio_venta = (pares['bid_base'] / pares['ask_cotizada']).to_numpy()
+            monto_compra = (np.minimum(pares['ask_size_base'], pares['bid_size_cotizada']) * pares['bid_cotizada'] / 100).to_numpy()
+            monto_venta = (np.minimum(pares['bid_size_base'], pares['ask_size_cotizada']) * pares['ask_cotizada'] / 100).to_numpy()
+
+            # Todas las combinaciones (compra por i, venta por j) a la vez
+            with np.errstate(invalid='ignore'):
+                hay = precio_venta[None, :] > precio_compra[:, None] * (1 + umbral)
+            np.fill_diagonal(hay, False)
+            i, j = np.nonzero(hay)
+            if not len(i):
+                continue
+
+            raices = pares.index.to_numpy()
+            resultados.append(_oportunidades(tipo, raices[i], raices[j], {
+                'plazo_compra': plazo,
+                'plazo_venta': plazo,
+                'precio_compra': precio_compra[i],
+                'precio_venta': precio_venta[j],
+                'ganancia': precio_venta[j] / precio_compra[i] - 1,
+                'monto': np.minimum(monto_compra[i], monto_venta[j]),
+            }))
+    return _concatenar(resultados)
+
+
+def spreads_de_plazo(puntas, tasa_caucion=0.0, umbral=0.0):
+    """
+    Compara las puntas de un mismo instrumento entre plazos de liquidación
+    tasa_caucion es la tasa nominal anual contra la que se mide la tasa
+    implícita entre plazos; ganancia es el exceso sobre la caución en el período
+    """
+    resultados = []
+    plazos = sorted(puntas.index.get_level_values('plazo').unique(), key=DIAS_PLAZO.get)
+    for corto, largo in combinations(plazos, 2):
+        a = puntas.xs(corto, level='plazo')
+        b = puntas.xs(largo, level='plazo')
+        pares = a.join(b, how='inner', lsuffix='_corto', rsuffix='_largo')
+        if pares.empty:
+            continue
+        caucion = tasa_caucion * (DIAS_PLAZO[largo] - DIAS_PLAZO[corto]) / 365
+        simbolos = pares['symbol_corto'].to_numpy()
+
+        # Colocación: comprar al plazo corto y vender al largo
+        ganancia = (pares['bid_largo'] / pares['ask_corto'] - 1 - caucion).to_numpy()
+        with np.errstate(invalid='ignore'):
+            hay = ganancia > umbral
+        resultados.append(_oportunidades('colocacion', simbolos[hay], simbolos[hay], {
+            'plazo_compra': corto,
+            'plazo_venta': largo,
+            'precio_compra': pares['ask_corto'].to_numpy()[hay],
+            'precio_venta': pares['bid_largo'].to_numpy()[hay],
+            'ganancia': ganancia[hay],
+            'monto': np.minimum(pares['ask_size_corto'], pares['bid_size_largo']).to_numpy()[hay],
+        }))
+
+        # Financiación: vender al plazo corto y recomprar al largo
+        ganancia = (caucion - (pares['ask_largo'] / pares['bid_corto'] - 1)).to_numpy()
+        with np.errstate(invalid='ignore'):
+            hay = ganancia > umbral
+        resultados.append(_oportunidades('financiacion', simbolos[hay], simbolos[hay], {
+            'plazo_compra': largo,
+            'plazo_venta': corto,
+            'precio_compra': pares['ask_largo'].to_numpy()[hay],
+            'precio_venta': pares['bid_corto'].to_numpy()[hay],
+            'ganancia': ganancia[hay],
+            'monto': np.minimum(pares['bid_size_corto'], pares['ask_size_largo']).to_numpy()[hay],
+        }))
+    return _concatenar(resultados)
+
+
+def _concatenar(resultados):
+    resultados = [r for r in resultados if not r.empty]
+    if not resultados:
+        return pd.DataFrame(columns=COLUMNAS_OPORTUNIDAD)
+    return pd.concat(resultados, ignore_index=True)
+
+
+def escanear(panel, tasa_caucion=0.0, umbral=0.0):
+    """
+    Busca todas las oportunidades del panel
+    umbral es la ganancia relativa mínima para reportar una oportunidad
+    Retorna un DataFrame ordenado de mayor a menor ganancia
+    """
+    if panel is None or panel.empty:
+        return pd.DataFrame(columns=COLUMNAS_OPORTUNIDAD)
+    puntas = indexar_puntas(panel)
+    oportunidades = _concatenar([
+        libros_cruzados(puntas, umbral),
+        cruces_tipo_de_cambio(puntas, umbral),
+        spreads_de_plazo(puntas, tasa_caucion, umbral),
+    ])
+    return oportunidades.sort_values('ganancia', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main():
+    """Consulta todos los plazos de liquidación y muestra las oportunidades de cada consulta"""
+    parser = argparse.ArgumentParser(description="Scanner de arbitrajes de renta fija de BYMA")
+    parser.add_argument('--intervalo', type=float, default=30, help="segundos entre consultas")
+    parser.add_argument('--iteraciones', type=int, default=1, help="cantidad de consultas (0 sin límite)")
+    parser.add_argument('--endpoints', nargs='+', default=['public-bonds', 'negociable-obligations'], choices=list(ENDPOINTS_RENTA_FIJA))
+    parser.add_argument('--caucion', type=float, default=0.0, help="tasa nominal anual de caución (ej. 0.35)")
+    parser.add_argument('--umbral', type=float, default=0.0, help="ganancia relativa mínima (ej. 0.001)")
+    args = parser.parse_args()
+
+    byma = OpenBYMAdata(transporte=transporte_compartido(), plazos=tuple(PLAZOS_LIQUIDACION))
+    iteracion = 0
+    try:
+        while not args.iteraciones or iteracion < args.iteraciones:
+            inicio = time.monotonic()
+            paneles = [df for df in byma.get_fixed_income_many(args.endpoints).values() if df is not None]
+            if paneles:
+                panel = aplicar_esquema(pd.concat(paneles, ignore_index=True))
+                oportunidades = escanear(panel, args.caucion, args.umbral)
+                print(f"\n[{datetime.now():%H:%M:%S}] {len(oportunidades)} oportunidades en {len(panel)} cotizaciones")
+                if not oportunidades.empty:
+                    print(oportunidades.head(30).to_string(index=False))
+
+            iteracion += 1
+            if not args.iteraciones or iteracion < args.iteraciones:
+                time.sleep(max(0.0, args.intervalo - (time.monotonic() - inicio)))
+    except KeyboardInterrupt:
+        print("\nScanner detenido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Archivo de las respuestas crudas de BYMA, para auditoría y reproducción
+
+Cada respuesta se guarda una sola vez, con su hash SHA-256 como nombre
+(dos consultas con el mismo contenido comparten el objeto). Como los paneles
+cambian poco entre una consulta y la siguiente, la mayoría de los objetos son
+deltas contra el snapshot anterior del mismo endpoint: la respuesta se corta
+en registros ('{...},') y el delta guarda solo los registros que cambiaron
+y referencias a los que ya estaban. Cada KEYFRAME_CADA deltas se guarda un
+snapshot completo para acotar la cadena que hay que recorrer al leer.
+
+    <directorio>/objetos/ab/abcdef....zst   objetos comprimidos (zstd o gzip)
+    <directorio>/indice.jsonl               una línea por respuesta: timestamp,
+                                            endpoint, hash, tipo y tamaños
+
+Los objetos se reconstruyen byte a byte. BYMA_ARCHIVO=<dir> activa el
+archivo en OpenBYMAdata.
+"""
+import bisect
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+from metricas import etapa
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Snapshot completo cada esta cantidad de deltas de un endpoint
+KEYFRAME_CADA = 50
+
+# Si los registros nuevos de un delta superan esta fracción de la respuesta se guarda completa
+MAX_FRACCION_DELTA = 0.5
+
+# Fin de un registro y comienzo del siguiente dentro de un arreglo JSON
+PATRON_REGISTRO = re.compile(rb'\}\s*,\s*\{')
+
+COMPLETO = b'K'
+DELTA = b'D'
+
+# Errores de un objeto dañado (compresión o contenido inválido)
+ERRORES_OBJETO = (OSError, EOFError, zlib.error, ValueError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def _comprimir(datos):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(datos), '.zst'
+    return gzip.compress(datos, compresslevel=6, mtime=0), '.gz'
+
+
+def _descomprimir(datos, extension):
+    if extension == '.zst':
+        if zstandard is None:
+            raise ImportError("El objeto está comprimido con zstd (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return gzip.decompress(datos)
+
+
+def separar_registros(contenido):
+    """
+    Corta una respuesta en registros sin alterar los bytes (b''.join los vuelve a unir)
+    El primero incluye el comienzo del documento y el último el cierre
+    """
+    cortes = [m.end() - 1 for m in PATRON_REGISTRO.finditer(contenido)]
+    return [contenido[i:j] for i, j in zip([0] + cortes, cortes + [len(contenido)])]
+
+
+def codificar_delta(registros, anteriores):
+    """
+    Operaciones para armar registros a partir de anteriores: [inicio, cantidad]
+    copia registros del snapshot anterior y un texto es un registro nuevo
+    Retorna (operaciones, bytes nuevos)
+    """
+    posiciones = {}
+    for i, registro in enumerate(anteriores):
+        posiciones.setdefault(registro, i)
+
+    operaciones = []
+    nuevos = 0
+    for registro in registros:
+        i = posiciones.get(registro)
+        if i is None:
+            operaciones.append(registro.decode('latin-1'))
+            nuevos += len(registro)
+        elif operaciones and isinstance(operaciones[-1], list) and sum(operaciones[-1]) == i:
+            operaciones[-1][1] += 1
+        else:
+            operaciones.append([i, 1])
+    return operaciones, nuevos
+
+
+def aplicar_delta(operaciones, anteriores):
+    """Inversa de codificar_delta: retorna los registros"""
+    registros = []
+    for operacion in operaciones:
+        if isinstance(operacion, str):
+            registros.append(operacion.encode('latin-1'))
+        else:
+            inicio, cantidad = operacion
+            registros.extend(anteriores[inicio:inicio + cantidad])
+    return registros
+
+
+class ArchivoRespuestas:
+    """
+    Archivo de respuestas crudas direccionado por contenido, con deltas y un índice
+    por endpoint y timestamp
+    """
+
+    def __init__(self, directorio, keyframe_cada=KEYFRAME_CADA):
+        self.directorio = directorio
+        self.keyframe_cada = keyframe_cada
+        self.__lock = threading.Lock()
+        self.__indice = None
+        self.__objetos = {}
+        # Último snapshot guardado de cada endpoint: (hash, registros, deltas desde el keyframe)
+        self.__ultimos = {}
+        # Último objeto reconstruido, para leer en orden sin recorrer la cadena cada vez
+        self.__reconstruido = (None, None)
+
+    def __ruta(self, hash_):
+        return os.path.join(self.directorio, 'objetos', hash_[:2], hash_)
+
+    def __cargar_indice(self):
+        """Lee el índice la primera vez que se usa: endpoint -> [(timestamp, registro)] ordenado"""
+        if self.__indice is not None:
+            return
+        self.__indice = {}
+        try:
+            with open(os.path.join(self.directorio, 'indice.jsonl'), encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        self.__indexar(json.loads(linea))
+                    except ValueError:
+                        # Línea vacía o cortada por una escritura interrumpida
+                        continue
+        except FileNotFoundError:
+            pass
+        for lista in self.__indice.values():
+            lista.sort(key=lambda entrada: entrada[0])
+
+    def __indexar(self, registro):
+        self.__indice.setdefault(registro['endpoint'], []).append((registro['timestamp'], registro))
+        self.__objetos[registro['hash']] = registro['objeto']
+
+    def guardar(self, endpoint, contenido, timestamp=None):
+        """
+        Archiva una respuesta cruda de un endpoint
+        Retorna el registro del índice (con 'nuevo' en False si el contenido ya estaba)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        hash_ = hashlib.sha256(contenido).hexdigest()
+
+        with self.__lock, etapa('guardado', destino='archivo') as medicion:
+            self.__cargar_indice()
+            registros = separar_registros(contenido)
+            nuevo = hash_ not in self.__objetos
+            ultimo = self.__ultimos.get(endpoint)
+            deltas = 0
+            tipo = 'completo'
+
+            if nuevo:
+                datos = COMPLETO + contenido
+                if ultimo is not None and ultimo[2] + 1 < self.keyframe_cada:
+                    operaciones, nuevos = codificar_delta(registros, ultimo[1])
+                    if nuevos <= MAX_FRACCION_DELTA * len(contenido):
+                        tipo = 'delta'
+                        deltas = ultimo[2] + 1
+                        datos = DELTA + json.dumps({'base': ultimo[0], 'operaciones': operaciones},
+                                                   separators=(',', ':')).encode('utf-8')
+                comprimido, extension = _comprimir(datos)
+                objeto = f"{hash_}{extension}"
+                ruta = self.__ruta(objeto)
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                temporal = f"{ruta}.{os.getpid()}.tmp"
+                with open(temporal, 'wb') as f:
+                    f.write(comprimido)
+                os.replace(temporal, ruta)
+                medicion.bytes = len(comprimido)
+            else:
+                objeto = self.__objetos[hash_]
+                # Si se repite un objeto viejo no se sabe el largo de su cadena: el próximo va completo
+                deltas = ultimo[2] if ultimo is not None and ultimo[0] == hash_ else self.keyframe_cada
+                comprimido = b''
+            self.__ultimos[endpoint] = (hash_, registros, deltas)
+
+            registro = {
+                'timestamp': timestamp,
+                'endpoint': endpoint,
+                'hash': hash_,
+                'objeto': objeto,
+                'tipo': tipo if nuevo else 'repetido',
+                'bytes': len(contenido),
+                'comprimido': len(comprimido),
+            }
+            with open(os.path.join(self.directorio, 'indice.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro) + '\n')
+            self.__indexar(registro)
+            lista = self.__indice[endpoint]
+            if len(lista) > 1 and lista[-2][0] > timestamp:
+                lista.sort(key=lambda entrada: entrada[0])
+        return dict(registro, nuevo=nuevo)
+
+    def registros(self, endpoint=None, desde=None, hasta=None):
+        """Entradas del índice (de un endpoint o de todos) entre dos timestamps, ordenadas por timestamp"""
+        with self.__lock:
+            self.__cargar_indice()
+            endpoints = list(self.__indice) if endpoint is None else [endpoint]
+            resultado = []
+            for nombre in endpoints:
+                lista = self.__indice.get(nombre, [])
+                marcas = [entrada[0] for entrada in lista]
+                inicio = 0 if desde is None else bisect.bisect_left(marcas, desde)
+                fin = len(lista) if hasta is None else bisect.bisect_right(marcas, hasta)
+                resultado.extend(registro for _, registro in lista[inicio:fin])
+        return sorted(resultado, key=lambda registro: registro['timestamp'])
+
+    def en(self, endpoint, timestamp):
+        """Entrada del índice vigente en un momento: la última respuesta del endpoint hasta timestamp"""
+        with self.__lock:
+            self.__cargar_indice()
+            lista = self.__indice.get(endpoint, [])
+            posicion = bisect.bisect_right([entrada[0] for entrada in lista], timestamp)
+            return lista[posicion - 1][1] if posicion else None
+
+    def leer(self, hash_):
+        """
+        Contenido crudo de una respuesta por su hash
+        Lanza FileNotFoundError si falta un objeto de la cadena y ValueError si
+        alguno está dañado (el contenido se verifica contra su hash)
+        """
+        with self.__lock:
+            self.__cargar_indice()
+            contenido = b''.join(self.__registros(hash_))
+        if hashlib.sha256(contenido).hexdigest() != hash_:
+            raise ValueError(f"La respuesta archivada {hash_} no coincide con su hash")
+        return contenido
+
+    def leer_en(self, endpoint, timestamp):
+        """Contenido crudo de la respuesta del endpoint vigente en un momento (None si no hay)"""
+        registro = self.en(endpoint, timestamp)
+        return None if registro is None else self.leer(registro['hash'])
+
+    def __registros(self, hash_):
+        """Registros de un objeto, siguiendo la cadena de deltas hasta el keyframe"""
+        if self.__reconstruido[0] == hash_:
+            return self.__reconstruido[1]
+
+        # Recorrer la cadena hasta un keyframe (o hasta el último objeto reconstruido)
+        cadena = []
+        actual = hash_
+        registros = None
+        while True:
+            if self.__reconstruido[0] == actual:
+                registros = self.__reconstruido[1]
+                break
+            objeto = self.__objetos.get(actual)
+            if objeto is None:
+                raise KeyError(f"No hay una respuesta archivada con hash {actual}")
+            with open(self.__ruta(objeto), 'rb') as f:
+                comprimido = f.read()
+            try:
+                datos = _descomprimir(comprimido, os.path.splitext(objeto)[1])
+                if datos[:1] == COMPLETO:
+                    registros = separar_registros(datos[1:])
+                    break
+                delta = json.loads(datos[1:])
+            except ERRORES_OBJETO as e:
+                raise ValueError(f"El objeto archivado {objeto} está dañado: {e}") from e
+            cadena.append(delta['operaciones'])
+            actual = delta['base']
+
+        for operaciones in reversed(cadena):
+            registros = aplicar_delta(operaciones, registros)
+        self.__reconstruido = (hash_, registros)
+        return registros
+
+
+def archivo_configurado():
+    """Retorna el ArchivoRespuestas de la variable BYMA_ARCHIVO o None si no está definida"""
+    directorio = os.environ.get('BYMA_ARCHIVO')
+    if not directorio:
+        return None
+    return ArchivoRespuestas(directorio)
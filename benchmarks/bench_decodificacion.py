@@ -0,0 +1,113 @@
+"""
+Microbenchmark de la decodificación de respuestas de renta fija
+
+Compara el camino anterior (DataFrame con todos los campos de cada registro y
+luego selección de columnas) con decodificar_renta_fija(). Para separar las
+dos mejoras el camino anterior se mide dos veces: con json de la biblioteca
+estándar, como era (aceleracion_total), y con el mismo decodificador que el
+actual, byma_bonos.json_loads (aceleracion_columnas: solo el armado de columnas).
+
+Sin argumentos arma payloads sintéticos a partir de los CSV de datos_bonos,
+agregando campos extra como los que trae la API. Con --fixtures usa respuestas
+crudas guardadas en ese directorio: las de TransporteGrabador (*.bin, solo las
+de los endpoints de renta fija) o archivos *.json.
+
+Uso:
+    python -m benchmarks.bench_decodificacion
+    python -m benchmarks.bench_decodificacion --fixtures fixtures/ --repeticiones 20
+"""
+import argparse
+import glob
+import json
+import os
+import timeit
+
+import pandas as pd
+
+from byma_bonos import CAMPOS_RENTA_FIJA, COLUMNAS_RENTA_FIJA, decodificar_renta_fija, json_loads, orjson
+
+# Cantidad de campos que la API trae además de los que se usan
+CAMPOS_EXTRA = 40
+
+CSV_PANELES = {
+    'public-bonds': "datos_bonos/bonos_publicos_20250514.csv",
+    'lebacs': "datos_bonos/letras_tesoro_20250514.csv",
+    'negociable-obligations': "datos_bonos/obligaciones_negociables_20250514.csv",
+}
+
+
+def payload_sintetico(archivo_csv, envolver):
+    """Arma el cuerpo de una respuesta de BYMA a partir de un CSV guardado"""
+    df = pd.read_csv(archivo_csv)[COLUMNAS_RENTA_FIJA]
+    df.columns = CAMPOS_RENTA_FIJA
+    for i in range(CAMPOS_EXTRA):
+        df[f'campoExtra{i}'] = df['bidPrice'] if i % 2 else df['symbol']
+    registros = json.loads(df.to_json(orient='records'))
+    return json.dumps({'data': registros} if envolver else registros).encode()
+
+
+def decodificar_anterior(contenido, cargar=json.loads):
+    """Camino anterior: DataFrame con todos los campos, después se filtra"""
+    datos = cargar(contenido)
+    if isinstance(datos, dict):
+        datos = datos['data']
+    df = pd.DataFrame(datos)[CAMPOS_RENTA_FIJA].copy()
+    df.columns = COLUMNAS_RENTA_FIJA
+    return df
+
+
+def cargar_payloads(directorio_fixtures=None):
+    """Retorna un diccionario nombre -> cuerpo crudo de la respuesta"""
+    if directorio_fixtures:
+        payloads = {}
+        archivos = glob.glob(os.path.join(directorio_fixtures, '*.json'))
+        # TransporteGrabador guarda cada respuesta como .bin, con la URL en el nombre
+        archivos += [archivo for archivo in glob.glob(os.path.join(directorio_fixtures, '*.bin'))
+                     if any(endpoint in os.path.basename(archivo) for endpoint in CSV_PANELES)]
+        for archivo in sorted(archivos):
+            with open(archivo, 'rb') as f:
+                payloads[os.path.basename(archivo)] = f.read()
+        return payloads
+    return {endpoint: payload_sintetico(csv, envolver=endpoint != 'negociable-obligations')
+            for endpoint, csv in CSV_PANELES.items()}
+
+
+def medir(funcion, contenido, repeticiones):
+    """Mejor tiempo (segundos) de varias corridas"""
+    return min(timeit.repeat(lambda: funcion(contenido), number=1, repeat=repeticiones))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de decodificación de respuestas de BYMA")
+    parser.add_argument('--fixtures', help="directorio con respuestas crudas (*.bin de TransporteGrabador o *.json)")
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--salida', help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    print(f"Decodificador JSON: {'orjson' if orjson is not None else 'json (biblioteca estándar)'}")
+    resultados = []
+    for nombre, contenido in cargar_payloads(args.fixtures).items():
+        # Ambos caminos tienen que producir los mismos datos
+        pd.testing.assert_frame_equal(decodificar_anterior(contenido), decodificar_renta_fija(contenido), check_dtype=False)
+
+        anterior = medir(decodificar_anterior, contenido, args.repeticiones)
+        mismo_decodificador = medir(lambda c: decodificar_anterior(c, json_loads), contenido, args.repeticiones)
+        actual = medir(decodificar_renta_fija, contenido, args.repeticiones)
+        resultados.append({
+            'payload': nombre,
+            'bytes': len(contenido),
+            'anterior_ms': anterior * 1000,
+            'anterior_mismo_json_ms': mismo_decodificador * 1000,
+            'actual_ms': actual * 1000,
+            'aceleracion_columnas': mismo_decodificador / actual,
+            'aceleracion_total': anterior / actual,
+        })
+
+    print(pd.DataFrame(resultados).to_string(index=False, float_format='%.2f'))
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark de punta a punta del pipeline snapshot -> MEP
+
+Mide tiempo y memoria de cada etapa sobre el panel guardado en datos_bonos
+y sobre paneles sintéticos escalados (10x, 100x, 1000x símbolos):
+
+    parseo      decodificar_renta_fija + aplicar_esquema sobre la respuesta cruda
+    filtrado    filtrar_bonos_para_mep
+    pares       calcular_dolar_mep
+    agregacion  calcular_promedio_ponderado
+    guardado    save_to_csv
+
+Cada escala se corre sobre varios snapshots con precios distintos y se
+reporta mediana y máximo. La memoria es el pico de tracemalloc de la etapa,
+medido en una corrida aparte para no afectar los tiempos.
+
+Uso:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --escalas 1 10 100 1000 --snapshots 20 --salida resultados.json
+
+La escala 1000x (unos 3,3 millones de filas) necesita varios GB de memoria
+y no se corre por defecto.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from byma_bonos import CAMPOS_RENTA_FIJA, COLUMNAS_RENTA_FIJA, aplicar_esquema, decodificar_renta_fija, save_to_csv
+from dolar_mep import calcular_dolar_mep, calcular_promedio_ponderado, filtrar_bonos_para_mep
+
+PANEL_BASE = "datos_bonos/todos_bonos_20250514.csv"
+
+
+def panel_escalado(base, escala):
+    """
+    Replica el panel 'escala' veces con símbolos nuevos que conservan los pares
+    Ejemplo: AL30 / AL30D -> K1AL30 / K1AL30D
+    """
+    if escala == 1:
+        return base.copy()
+    copias = [base]
+    for k in range(1, escala):
+        copia = base.copy()
+        copia['symbol'] = f'K{k}' + copia['symbol'].astype(str)
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+
+def snapshot_crudo(panel, rng):
+    """Arma el cuerpo JSON de una respuesta con precios movidos al azar"""
+    df = panel[COLUMNAS_RENTA_FIJA].copy()
+    ruido = 1 + rng.normal(0, 0.001, len(df))
+    for col in ['bid', 'ask', 'last']:
+        df[col] = (df[col] * ruido).round(2)
+    df.columns = CAMPOS_RENTA_FIJA
+    return df.to_json(orient='records', date_format='iso').encode()
+
+
+def etapas(crudo, directorio):
+    """Corre el pipeline completo y retorna los tiempos de cada etapa"""
+    tiempos = {}
+    inicio = time.perf_counter()
+    df = aplicar_esquema(decodificar_renta_fija(crudo))
+    tiempos['parseo'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    bonos_pesos, bonos_dolares = filtrar_bonos_para_mep(df, familia=None)
+    tiempos['filtrado'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df_mep = calcular_dolar_mep(bonos_pesos, bonos_dolares)
+    tiempos['pares'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    calcular_promedio_ponderado(df_mep)
+    tiempos['agregacion'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    save_to_csv(df, os.path.join(directorio, "todos_bonos.csv"))
+    save_to_csv(df_mep, os.path.join(directorio, "dolar_mep.csv"))
+    tiempos['guardado'] = time.perf_counter() - inicio
+    return tiempos, len(df), 0 if df_mep is None else len(df_mep)
+
+
+def memoria_por_etapa(crudo, directorio):
+    """Pico de memoria (bytes) de cada etapa medido con tracemalloc"""
+    picos = {}
+
+    def medir(nombre, funcion, *args):
+        tracemalloc.start()
+        try:
+            resultado = funcion(*args)
+            picos[nombre] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return resultado
+
+    df = medir('parseo', lambda c: aplicar_esquema(decodificar_renta_fija(c)), crudo)
+    bonos_pesos, bonos_dolares = medir('filtrado', filtrar_bonos_para_mep, df, None)
+    df_mep = medir('pares', calcular_dolar_mep, bonos_pesos, bonos_dolares)
+    medir('agregacion', calcular_promedio_ponderado, df_mep)
+    medir('guardado', save_to_csv, df, os.path.join(directorio, "todos_bonos.csv"))
+    return picos
+
+
+def version_codigo():
+    """Commit actual del repositorio, si está disponible"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline snapshot -> MEP")
+    parser.add_argument('--panel', default=PANEL_BASE, help="CSV con el panel base")
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--snapshots', type=int, default=5, help="snapshots por escala")
+    parser.add_argument('--salida', help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.panel)
+    rng = np.random.default_rng(0)
+    filas = []
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for escala in args.escalas:
+            panel = panel_escalado(base, escala)
+            crudos = [snapshot_crudo(panel, rng) for _ in range(args.snapshots)]
+
+            # Los scripts imprimen mensajes de avance que no interesan acá
+            with redirect_stdout(StringIO()):
+                corridas = [etapas(crudo, directorio) for crudo in crudos]
+                picos = memoria_por_etapa(crudos[0], directorio)
+
+            for etapa in corridas[0][0]:
+                tiempos = np.array([tiempos[etapa] for tiempos, _, _ in corridas])
+                filas.append({
+                    'escala': escala,
+                    'simbolos': corridas[0][1],
+                    'pares': corridas[0][2],
+                    'etapa': etapa,
+                    'mediana_ms': float(np.median(tiempos) * 1000),
+                    'max_ms': float(tiempos.max() * 1000),
+                    'pico_memoria_mb': picos[etapa] / 2**20,
+                })
+            total = sum(np.median([t[e] for t, _, _ in corridas]) for e in corridas[0][0])
+            print(f"Escala {escala}x ({corridas[0][1]} símbolos): {total * 1000:.1f} ms por snapshot")
+
+    resultados = pd.DataFrame(filas)
+    print()
+    print(resultados.to_string(index=False, float_format='%.2f'))
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump({
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'version': version_codigo(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'snapshots': args.snapshots,
+                'resultados': filas,
+            }, f, indent=2)
+        print(f"\nResultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,144 +1,268 @@
-import requests
 import pandas as pd
 from datetime import datetime
 import urllib3
 import time
-from bs4 import BeautifulSoup
+import threading
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from lxml import html as lxml_html
+from byma_bonos import COLUMNAS_RENTA_FIJA, ESQUEMA_RENTA_FIJA, PLAZOS_LIQUIDACION, aplicar_esquema
+from transporte import transporte_compartido
 
 # Desactivar advertencias de inseguridad para requests sin verificación
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def get_byma_bonds_from_web():
+# Páginas usadas como fuente alternativa
+URL_BYMA_BONOS = "https://www.byma.com.ar/productos/bonos/"
+URL_IOL_BONOS = "https://www.invertironline.com/mercado/cotizaciones/argentina/bonos/todos"
+
+HEADERS_WEB = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "es-ES,es;q=0.9,en;q=0.8"
+}
+
+# Cada fuente: URL, tabla de cotizaciones (XPath) y timeout de la consulta
+# Si la tabla indicada no está en la página se usa la tabla más grande
+FUENTES_WEB = {
+    'byma': {'url': URL_BYMA_BONOS, 'tabla': '//table[.//th]', 'timeout': 10},
+    'iol': {'url': URL_IOL_BONOS, 'tabla': '//table[@id="cotizaciones"]', 'timeout': 15},
+}
+
+# Encabezados de las tablas (en minúsculas y sin acentos) y su columna en el esquema de OpenBYMAdata
+ENCABEZADOS = {
+    'simbolo': 'symbol',
+    'especie': 'symbol',
+    'ticker': 'symbol',
+    'cantidad compra': 'bid_size',
+    'cant. compra': 'bid_size',
+    'precio compra': 'bid',
+    'compra': 'bid',
+    'precio venta': 'ask',
+    'venta': 'ask',
+    'cantidad venta': 'ask_size',
+    'cant. venta': 'ask_size',
+    'ultimo operado': 'last',
+    'ultimo': 'last',
+    'ultimo precio': 'last',
+    'cierre': 'close',
+    'variacion diaria': 'change',
+    'variacion': 'change',
+    'var. %': 'change',
+    'apertura': 'open',
+    'maximo': 'high',
+    'minimo': 'low',
+    'ultimo cierre': 'previous_close',
+    'cierre anterior': 'previous_close',
+    'monto operado': 'turnover',
+    'monto': 'turnover',
+    'volumen': 'volume',
+    'volumen nominal': 'volume',
+    'operaciones': 'operations',
+    'hora': 'datetime',
+    'vencimiento': 'expiration',
+}
+
+# Columnas numéricas que vienen con formato argentino (1.234,56)
+COLUMNAS_NUMERICAS = ['bid_size', 'bid', 'ask', 'ask_size', 'last', 'close', 'change', 'open', 'high',
+                      'low', 'previous_close', 'turnover', 'volume', 'operations']
+
+# Esquema de las tablas web: las cantidades que la página no trae quedan nulas (no 0),
+# para que el cálculo del MEP las trate como 'sin dato' y no como pares sin operaciones
+ESQUEMA_WEB = {**ESQUEMA_RENTA_FIJA, 'bid_size': 'Int32', 'ask_size': 'Int32', 'volume': 'Int64', 'operations': 'Int32'}
+
+# Una tabla con menos filas que esto no se toma como resultado válido
+MIN_FILAS = 5
+
+# Segundos que se reutiliza el último resultado válido de cada fuente
+CACHE_TTL = 60
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _texto(celda):
+    return ' '.join(celda.text_content().split())
+
+
+def _normalizar_encabezado(encabezado):
+    texto = unicodedata.normalize('NFKD', encabezado).encode('ascii', 'ignore').decode()
+    return ' '.join(texto.lower().split())
+
+
+def extraer_tabla(contenido, xpath):
     """
-    Obtiene información de bonos directamente del sitio web de BYMA
-    utilizando requests y pandas para extraer tablas
+    Extrae con lxml la tabla de cotizaciones de una página
+    Va directo a la tabla indicada por xpath y, si no está, usa la más grande
+    Retorna un DataFrame de textos o None si la página no tiene tablas
     """
-    print("Obteniendo datos de bonos desde la web de BYMA...")
-    
-    # URL de la página de bonos de BYMA
-    url = "https://www.byma.com.ar/productos/bonos/"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8"
-    }
-    
+    if isinstance(contenido, bytes):
+        # Sin charset lxml asume latin-1; las páginas de las fuentes son UTF-8
+        try:
+            contenido = contenido.decode('utf-8')
+        except UnicodeDecodeError:
+            contenido = contenido.decode('latin-1')
+    documento = lxml_html.fromstring(contenido)
+    tablas = documento.xpath(xpath) or documento.xpath('//table')
+    if not tablas:
+        return None
+    tabla = max(tablas, key=lambda t: len(t.xpath('.//tr'))) if len(tablas) > 1 else tablas[0]
+
+    filas = tabla.xpath('.//tr')
+    encabezados = [_texto(th) for th in tabla.xpath('.//thead//th')]
+    if encabezados:
+        filas = [fila for fila in filas if fila.getparent().tag != 'thead']
+    else:
+        # Sin thead, los encabezados son la primera fila
+        encabezados = [_texto(celda) for celda in filas[0].xpath('./th|./td')] if filas else []
+        filas = filas[1:]
+    datos = [[_texto(td) for td in fila.xpath('./td')] for fila in filas]
+    datos = [fila for fila in datos if len(fila) == len(encabezados)]
+    if not encabezados or not datos:
+        return None
+    return pd.DataFrame(datos, columns=encabezados)
+
+
+def _numero(serie):
+    """
+    Convierte textos con formato argentino ('1.234,56', '-0,5%') a número
+    Los porcentajes se pasan a fracción ('-0,5%' -> -0.005), como 'change' en la API
+    """
+    texto = serie.astype(str)
+    porcentaje = texto.str.contains('%', regex=False)
+    texto = texto.str.replace(r'[%$\s]', '', regex=True)
+    texto = texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    numero = pd.to_numeric(texto, errors='coerce')
+    return numero.where(~porcentaje, numero / 100)
+
+
+def normalizar_tabla(tabla, plazo='T1'):
+    """
+    Lleva una tabla extraída de la web al esquema de OpenBYMAdata (las mismas
+    columnas y tipos que get_bonds); las que la página no trae quedan nulas
+    Retorna None si la tabla no tiene columna de símbolo
+    """
+    columnas = {}
+    for encabezado in tabla.columns:
+        columna = ENCABEZADOS.get(_normalizar_encabezado(encabezado))
+        if columna is not None and columna not in columnas.values():
+            columnas[encabezado] = columna
+    if 'symbol' not in columnas.values():
+        return None
+
+    df = tabla[list(columnas)].rename(columns=columnas)
+    # La celda del símbolo suele traer también la descripción del bono
+    df['symbol'] = df['symbol'].str.extract(r'^\s*([A-Za-z0-9]+)', expand=False).str.upper()
+    for col in COLUMNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = _numero(df[col])
+    if 'datetime' in df.columns:
+        hoy = datetime.now().strftime('%Y-%m-%d')
+        df['datetime'] = pd.to_datetime(hoy + ' ' + df['datetime'], errors='coerce')
+    if 'expiration' in df.columns:
+        df['expiration'] = pd.to_datetime(df['expiration'], dayfirst=True, errors='coerce')
+
+    df = df.dropna(subset=['symbol']).reindex(columns=COLUMNAS_RENTA_FIJA)
+    df['settlement'] = PLAZOS_LIQUIDACION[plazo]
+    return aplicar_esquema(df.reset_index(drop=True), ESQUEMA_WEB)
+
+
+def obtener_fuente(nombre, transporte=None, url=None):
+    """
+    Descarga y normaliza la tabla de bonos de una fuente de FUENTES_WEB
+    El último resultado válido de cada URL se reutiliza durante CACHE_TTL segundos
+    Retorna None si la consulta falla o la tabla no tiene datos suficientes
+    """
+    fuente = FUENTES_WEB[nombre]
+    url = url or fuente['url']
+    with _cache_lock:
+        guardado = _cache.get(url)
+    if guardado is not None and time.monotonic() - guardado[0] < CACHE_TTL:
+        return guardado[1].copy()
+
+    if transporte is None:
+        transporte = transporte_compartido()
+
     try:
-        # Realizar la solicitud a la página web
-        response = requests.get(url, headers=headers, verify=False, timeout=10)
-        
-        if response.status_code == 200:
-            print("Conexión exitosa a la página de bonos de BYMA")
-            
-            # Intentamos extraer las tablas de HTML
-            tables = pd.read_html(response.text)
-            
-            if tables:
-                print(f"Se encontraron {len(tables)} tablas en la página")
-                
-                # Buscamos la tabla que contiene información de bonos
-                for i, table in enumerate(tables):
-                    print(f"Tabla {i+1}: {table.shape[0]} filas x {table.shape[1]} columnas")
-                    
-                    # Si la tabla tiene datos relevantes (más de 3 columnas y filas)
-                    if table.shape[0] > 3 and table.shape[1] > 3:
-                        print(f"Usando tabla {i+1} como fuente de datos")
-                        return table
-                
-                # Si no encontramos una tabla adecuada, usamos la primera tabla con datos
-                if len(tables) > 0 and tables[0].shape[0] > 0:
-                    print("Usando la primera tabla disponible")
-                    return tables[0]
-                    
-            else:
-                print("No se encontraron tablas en la página")
-                
-                # Intentamos extraer la información usando BeautifulSoup
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Intentamos extraer datos de cualquier tabla
-                tables_html = soup.find_all('table')
-                
-                if tables_html:
-                    print(f"Se encontraron {len(tables_html)} tablas con BeautifulSoup")
-                    
-                    # Construimos manualmente un DataFrame a partir de la primera tabla
-                    headers = []
-                    rows = []
-                    
-                    table = tables_html[0]
-                    
-                    # Obtener encabezados
-                    th_tags = table.find_all('th')
-                    if th_tags:
-                        headers = [th.get_text().strip() for th in th_tags]
-                    else:
-                        # Si no hay encabezados, usar la primera fila
-                        headers = [td.get_text().strip() for td in table.find('tr').find_all('td')]
-                    
-                    # Obtener filas
-                    tr_tags = table.find_all('tr')[1:] if th_tags else table.find_all('tr')[1:]
-                    for tr in tr_tags:
-                        rows.append([td.get_text().strip() for td in tr.find_all('td')])
-                    
-                    # Crear DataFrame
-                    if headers and rows:
-                        return pd.DataFrame(rows, columns=headers)
-        else:
-            print(f"Error al conectar a la página: código {response.status_code}")
-        
+        response = transporte.get(url, headers=HEADERS_WEB, verify=False, timeout=fuente['timeout'])
+        if response.status_code != 200:
+            print(f"Error al conectar a {nombre}: código {response.status_code}")
+            return None
+
+        tabla = extraer_tabla(response.content, fuente['tabla'])
+        df = normalizar_tabla(tabla) if tabla is not None else None
+        if df is None or len(df) < MIN_FILAS:
+            print(f"No se encontró una tabla de bonos válida en {nombre}")
+            return None
     except Exception as e:
-        print(f"Error al procesar datos de la web: {e}")
-    
-    return None
+        print(f"Error al obtener datos de {nombre}: {e}")
+        return None
 
-def get_bonds_from_iol():
+    print(f"Se obtuvieron {len(df)} bonos desde {nombre}")
+    with _cache_lock:
+        _cache[url] = (time.monotonic(), df)
+    return df.copy()
+
+
+def get_byma_bonds_from_web(transporte=None, url=URL_BYMA_BONOS):
+    """
+    Obtiene información de bonos directamente del sitio web de BYMA
+    en el mismo esquema que OpenBYMAdata
+    """
+    print("Obteniendo datos de bonos desde la web de BYMA...")
+    return obtener_fuente('byma', transporte, url)
+
+
+def get_bonds_from_iol(transporte=None, url=URL_IOL_BONOS):
     """
     Intenta obtener datos de bonos desde la plataforma IOL
+    en el mismo esquema que OpenBYMAdata
     """
     print("\nIntentando obtener datos desde IOL...")
-    
-    url = "https://www.invertironline.com/mercado/cotizaciones/argentina/bonos/todos"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8"
-    }
-    
+    return obtener_fuente('iol', transporte, url)
+
+
+def obtener_bonos_web(transporte=None, fuentes=('byma', 'iol'), cobertura=0.5):
+    """
+    Consulta las fuentes web en carrera y retorna (fuente, DataFrame) con el
+    primer resultado válido, o (None, None) si ninguna responde
+    La primera fuente sale enseguida; cada una de las siguientes se lanza si la
+    anterior falla o si no respondió en 'cobertura' segundos (cobertura=0 las
+    lanza todas juntas). Las consultas que quedan en curso se abandonan
+    """
+    if transporte is None:
+        transporte = transporte_compartido()
+
+    restantes = list(fuentes)
+    executor = ThreadPoolExecutor(max_workers=len(restantes) or 1)
+    pendientes = {}
+
+    def lanzar():
+        nombre = restantes.pop(0)
+        pendientes[executor.submit(obtener_fuente, nombre, transporte)] = nombre
+
     try:
-        response = requests.get(url, headers=headers, verify=False, timeout=15)
-        
-        if response.status_code == 200:
-            print("Conexión exitosa a IOL")
-            
-            # Extraer tablas
-            tables = pd.read_html(response.text)
-            
-            if tables:
-                print(f"Se encontraron {len(tables)} tablas en IOL")
-                
-                # La tabla principal de bonos suele ser la más grande
-                largest_table = None
-                max_rows = 0
-                
-                for i, table in enumerate(tables):
-                    print(f"Tabla {i+1}: {table.shape[0]} filas x {table.shape[1]} columnas")
-                    
-                    if table.shape[0] > max_rows:
-                        max_rows = table.shape[0]
-                        largest_table = table
-                
-                if largest_table is not None and largest_table.shape[0] > 5:
-                    print(f"Usando la tabla más grande con {max_rows} filas")
-                    return largest_table
-            
-            print("No se encontraron tablas válidas en IOL")
-    
-    except Exception as e:
-        print(f"Error al obtener datos de IOL: {e}")
-    
-    return None
+        lanzar()
+        while cobertura <= 0 and restantes:
+            lanzar()
+        while pendientes:
+            listos, _ = wait(pendientes, timeout=cobertura if restantes else None, return_when=FIRST_COMPLETED)
+            if not listos:
+                # Ninguna respondió a tiempo: se cubre con la siguiente fuente
+                lanzar()
+                continue
+            for futuro in listos:
+                nombre = pendientes.pop(futuro)
+                df = futuro.result()
+                if df is not None and not df.empty:
+                    return nombre, df
+            if restantes:
+                # Una fuente falló: la siguiente sale sin esperar la cobertura
+                lanzar()
+        return None, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
 def save_to_csv(df, filename=None):
     """
@@ -148,28 +272,24 @@ def save_to_csv(df, filename=None):
         if filename is None:
             today = datetime.now().strftime("%Y%m%d")
             filename = f"bonos_byma_{today}.csv"
-        
+
         df.to_csv(filename, index=False)
         print(f"Data saved to {filename}")
         return True
     return False
 
 if __name__ == "__main__":
-    # Intentar obtener datos de BYMA
-    bonds_df = get_byma_bonds_from_web()
-    
-    # Si no funciona BYMA, intentar con IOL
-    if bonds_df is None or bonds_df.empty:
-        bonds_df = get_bonds_from_iol()
-    
+    # Consultar BYMA e IOL en carrera y quedarse con la primera respuesta válida
+    fuente, bonds_df = obtener_bonos_web(transporte_compartido())
+
     if bonds_df is not None and not bonds_df.empty:
         # Display the first few rows
-        print(f"\nTotal bonds retrieved: {len(bonds_df)}")
+        print(f"\nTotal bonds retrieved from {fuente}: {len(bonds_df)}")
         print("\nSample of the data:")
         print(bonds_df.head())
-        
+
         # Save to CSV
         if save_to_csv(bonds_df):
             print("\nDatos guardados exitosamente")
     else:
-        print("\nNo se pudieron obtener datos de bonos. Por favor, intente más tarde o verifique su conexión a internet.") 
\ No newline at end of file
+        print("\nNo se pudieron obtener datos de bonos. Por favor, intente más tarde o verifique su conexión a internet.")
@@ -0,0 +1,181 @@
+"""
+Cliente asincrónico de la API de renta fija de BYMA
+
+Contraparte de OpenBYMAdata para servicios basados en asyncio: las consultas
+van por aiohttp y no bloquean el event loop. Los métodos son los mismos
+(get_bonds, get_short_term_bonds, get_corporateBonds, get_fixed_income_many)
+pero son corutinas, y la respuesta se procesa con el mismo mapeo de columnas
+y conversión de tipos que el cliente sincrónico (procesar_renta_fija), en un
+hilo aparte para no frenar el loop con paneles grandes.
+
+    async with OpenBYMAdataAsync(plazos=('T0', 'T1')) as byma:
+        bonos = await byma.get_bonds()
+        paneles = await byma.get_fixed_income_many()
+"""
+import asyncio
+import time
+
+from byma_bonos import ENDPOINTS_RENTA_FIJA, URL_BYMA, cuerpo_renta_fija, headers_api, procesar_renta_fija
+from metricas import etapa
+from transporte import Circuito, CircuitoAbierto, PoliticaReintentos
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class OpenBYMAdataAsync:
+    """
+    Cliente de renta fija de BYMA sobre aiohttp, con una sesión y un pool de
+    conexiones compartidos por todas las consultas
+    Las fallas transitorias se reintentan con backoff exponencial y jitter, y
+    tras umbral_circuito fallas seguidas las consultas se cortan durante
+    espera_circuito segundos (lanzan CircuitoAbierto)
+    """
+
+    def __init__(self, url_base=URL_BYMA, plazos=('T1',), max_conexiones=None, timeout=15,
+                 reintentos=3, backoff=0.5, backoff_maximo=10.0, umbral_circuito=5, espera_circuito=30.0):
+        if aiohttp is None:
+            raise ImportError("OpenBYMAdataAsync requiere aiohttp (pip install aiohttp)")
+
+        # Tiempo (segundos) de la última consulta a cada endpoint
+        self.tiempos = {}
+
+        self.__url = url_base.rstrip('/')
+        self.plazos = tuple(plazos)
+        self.__data = cuerpo_renta_fija(plazos)
+        self.__headers = headers_api(self.__url)
+
+        self.__max_conexiones = max_conexiones or len(ENDPOINTS_RENTA_FIJA) + 1
+        self.__timeout = timeout
+        self.__circuito = Circuito(umbral_circuito, espera_circuito)
+        self.politica = PoliticaReintentos(reintentos, backoff, backoff_maximo,
+                                           errores_reintentables=(aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+        # La sesión se crea en el primer uso, dentro del event loop que la va a usar
+        self.__sesion = None
+        self.__lock = None
+        self.__sesion_iniciada = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.cerrar()
+
+    async def cerrar(self):
+        """Cierra la sesión y sus conexiones"""
+        if self.__sesion is not None:
+            await self.__sesion.close()
+            self.__sesion = None
+            self.__sesion_iniciada = False
+
+    async def __iniciar_sesion(self):
+        """Crea la sesión y visita el dashboard una única vez para obtener las cookies"""
+        if self.__sesion_iniciada:
+            return self.__sesion
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+        async with self.__lock:
+            if self.__sesion is None:
+                self.__sesion = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.__max_conexiones, ssl=False),
+                    timeout=aiohttp.ClientTimeout(total=self.__timeout),
+                )
+            if not self.__sesion_iniciada:
+                async with self.__sesion.get(f'{self.__url}/#/dashboard') as response:
+                    await response.read()
+                self.__sesion_iniciada = True
+        return self.__sesion
+
+    async def get_bonds(self):
+        """Obtiene cotizaciones de bonos públicos"""
+        return await self.__get_fixed_income('public-bonds')
+
+    async def get_short_term_bonds(self):
+        """Obtiene cotizaciones de letras del tesoro"""
+        return await self.__get_fixed_income('lebacs')
+
+    async def get_corporateBonds(self):
+        """Obtiene cotizaciones de obligaciones negociables"""
+        return await self.__get_fixed_income('negociable-obligations')
+
+    async def get_fixed_income_many(self, endpoints=None):
+        """
+        Obtiene varios paneles de renta fija en forma concurrente sobre la misma sesión
+        Retorna un diccionario endpoint -> DataFrame (None si falló)
+        """
+        if endpoints is None:
+            endpoints = list(ENDPOINTS_RENTA_FIJA)
+        resultados = await asyncio.gather(*(self.__get_fixed_income(endpoint) for endpoint in endpoints))
+        return dict(zip(endpoints, resultados))
+
+    async def __get_fixed_income(self, endpoint):
+        """Método interno para obtener datos de renta fija"""
+        inicio = time.perf_counter()
+        try:
+            return await self.__fetch_fixed_income(endpoint)
+        finally:
+            self.tiempos[endpoint] = time.perf_counter() - inicio
+
+    async def __fetch_fixed_income(self, endpoint):
+        """Consulta un endpoint de renta fija y procesa la respuesta"""
+        print(f"Obteniendo datos de {endpoint}...")
+
+        try:
+            sesion = await self.__iniciar_sesion()
+            with etapa('http', endpoint=endpoint) as medicion:
+                estado, contenido = await self.__post(
+                    sesion, f'{self.__url}/vanoms-be-core/rest/api/bymadata/free/{endpoint}')
+                medicion.bytes = len(contenido)
+
+            if estado != 200:
+                print(f"Error al obtener datos: Código {estado}")
+                return None
+
+            # Decodificar y tipar fuera del event loop
+            return await asyncio.to_thread(procesar_renta_fija, contenido, endpoint)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitoAbierto) as e:
+            print(f"Error de conexión para {endpoint}: {e}")
+            return None
+        except Exception as e:
+            print(f"Error al procesar datos de {endpoint}: {e}")
+            return None
+
+    async def __post(self, sesion, url):
+        """POST con reintentos ante errores de conexión, timeouts, 429 y 5xx; retorna (estado, contenido)"""
+        intento = 0
+        while True:
+            self.politica.admitir(self.__circuito, self.__url)
+            try:
+                async with sesion.post(url, data=self.__data, headers=self.__headers) as response:
+                    estado = response.status
+                    contenido = await response.read()
+                    retry_after = response.headers.get('Retry-After')
+            except BaseException as e:
+                espera = self.politica.fallo(self.__circuito, intento, e)
+                if espera is None:
+                    raise
+                await asyncio.sleep(espera)
+                intento += 1
+                continue
+
+            espera = self.politica.respuesta(self.__circuito, intento, estado, retry_after)
+            if espera is None:
+                return estado, contenido
+            await asyncio.sleep(espera)
+            intento += 1
+
+
+async def main():
+    """Obtiene los tres paneles de renta fija de forma concurrente"""
+    async with OpenBYMAdataAsync() as byma:
+        paneles = await byma.get_fixed_income_many()
+    for endpoint, df in paneles.items():
+        print(f"{endpoint}: {'sin datos' if df is None else f'{len(df)} registros'} ({byma.tiempos[endpoint]:.2f} s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,50 +1,170 @@
 import json
+import time
 import requests
 import urllib3
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
+import threading
+from archivo import archivo_configurado
+from historico import historico_configurado
+from metricas import etapa, medir
+from referencia import obtener_referencia
+from transporte import TransporteHTTP, transporte_compartido
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
 
 # Desactivar advertencias SSL
 urllib3.disable_warnings()
 
 
+def json_loads(contenido):
+    """Decodifica JSON con orjson si está instalado, si no con la biblioteca estándar"""
+    if orjson is not None:
+        try:
+            return orjson.loads(contenido)
+        except orjson.JSONDecodeError:
+            # orjson no acepta NaN/Infinity, que json sí tolera
+            pass
+    return json.loads(contenido)
+
+
+# Paneles de renta fija disponibles y su descripción
+ENDPOINTS_RENTA_FIJA = {
+    'public-bonds': 'BONOS SOBERANOS',
+    'lebacs': 'LETRAS DEL TESORO',
+    'negociable-obligations': 'OBLIGACIONES NEGOCIABLES',
+}
+
+# Campos de la respuesta de BYMA y nombre de la columna de cada uno
+CAMPOS_RENTA_FIJA = ["symbol", "settlementType", "quantityBid", "bidPrice", "offerPrice", "quantityOffer", "settlementPrice", "closingPrice", "imbalance", "openingPrice", "tradingHighPrice", "tradingLowPrice", "previousClosingPrice", "volumeAmount", "volume", "numberOfOrders", "tradeHour", "securityType", "maturityDate"]
+COLUMNAS_RENTA_FIJA = ['symbol', 'settlement', 'bid_size', 'bid', 'ask', 'ask_size', 'last', 'close', 'change', 'open', 'high', 'low', 'previous_close', 'turnover', 'volume', 'operations', 'datetime', 'group', "expiration"]
+
+# Tipos de cada columna del DataFrame de renta fija
+# Precios y montos quedan en float64 porque el MEP divide precios de varias cifras;
+# la variación porcentual entra en float32 sin pérdida relevante.
+# Las cantidades faltantes se toman como 0 (con enteros nullables como 'Int32'
+# quedan nulas) y si un valor no entra en el entero
+# elegido la columna queda en int64
+# Las categóricas son solo para columnas con pocos valores distintos: symbol es
+# casi único por fila y queda como texto de Arrow
+ESQUEMA_RENTA_FIJA = {
+    'symbol': 'string[pyarrow]',
+    'settlement': 'category',
+    'bid_size': 'int32',
+    'bid': 'float64',
+    'ask': 'float64',
+    'ask_size': 'int32',
+    'last': 'float64',
+    'close': 'float64',
+    'change': 'float32',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'previous_close': 'float64',
+    'turnover': 'float64',
+    'volume': 'int64',
+    'operations': 'int32',
+    'datetime': 'datetime64[ns]',
+    'group': 'category',
+    'expiration': 'datetime64[ns]',
+    'tipo': 'category',
+}
+
+# Plazos de liquidación que se pueden pedir y su código en 'settlement'
+PLAZOS_LIQUIDACION = {'T0': '1', 'T1': '2', 'T2': '3'}
+
+# URL base de la API de BYMA
+URL_BYMA = 'https://open.bymadata.com.ar'
+
+# Cache en disco del diccionario de traducción
+CACHE_DIR = os.environ.get('BYMA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'byma'))
+DICCIONARIO_TTL = 24 * 60 * 60
+
+# Cliente compartido entre llamadas y módulos
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
 class OpenBYMAdata:
-    def __init__(self):
-        # Columnas y configuración para los datos de bonos
-        self.__fixedIncome_columns = ['symbol', 'settlement', 'bid_size', 'bid', 'ask', 'ask_size', 'last', 'close', 'change', 'open', 'high', 'low', 'previous_close', 'turnover', 'volume', 'operations', 'datetime', 'group', "expiration"]
-        self.__filter_columns_fixedIncome = ["symbol", "settlementType", "quantityBid", "bidPrice", "offerPrice", "quantityOffer", "settlementPrice", "closingPrice", "imbalance", "openingPrice", "tradingHighPrice", "tradingLowPrice", "previousClosingPrice", "volumeAmount", "volume", "numberOfOrders", "tradeHour", "securityType", "maturityDate"]
-        self.__numeric_columns = ['last', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_size', 'bid', 'ask_size', 'ask', 'previous_close']
+    def __init__(self, cache_dir=CACHE_DIR, diccionario_ttl=DICCIONARIO_TTL, transporte=None, url_base=URL_BYMA, plazos=('T1',), archivo=None):
+        # Tiempo (segundos) de la última consulta a cada endpoint
+        self.tiempos = {}
 
-        # Configuración de la sesión
-        self.__s = requests.session()
-        self.__s.get('https://open.bymadata.com.ar/#/dashboard', verify=False)
-        self.__data='{"excludeZeroPxAndQty":false,"T2":false,"T1":true,"T0":false,"Content-Type":"application/json"}'
+        # Transporte HTTP (con pool para consultas en paralelo), reemplazable
+        # por uno que grabe o reproduzca respuestas desde el disco
+        if transporte is None:
+            transporte = TransporteHTTP(pool_maxsize=len(ENDPOINTS_RENTA_FIJA) + 1)
+        self.__s = transporte
+        self.__url = url_base.rstrip('/')
+
+        # Plazos de liquidación pedidos en cada consulta (T0, T1 y/o T2)
+        self.plazos = tuple(plazos)
+        self.__data = cuerpo_renta_fija(plazos)
 
         # Configuración de headers
-        self.__headers = {
-            'Connection': 'keep-alive',
-            'sec-ch-ua': '" Not A;Brand";v="99", "Chromium";v="96", "Google Chrome";v="96"',
-            'Accept': 'application/json, text/plain, */*',
-            'Content-Type': 'application/json',
-            'sec-ch-ua-mobile': '?0',
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.93 Safari/537.36',
-            'sec-ch-ua-platform': '"Windows"',
-            'Origin': 'https://open.bymadata.com.ar',
-            'Sec-Fetch-Site': 'same-origin',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Dest': 'empty',
-            'Referer': 'https://open.bymadata.com.ar/',
-            'Accept-Language': 'es-US,es-419;q=0.9,es;q=0.8,en;q=0.7',
-        }
+        self.__headers = headers_api(self.__url)
+
+        # Archivo de las respuestas crudas (por defecto el de BYMA_ARCHIVO, si está definida)
+        self.archivo = archivo if archivo is not None else archivo_configurado()
         
-        # Inicializar diccionario de traducción
+        # La sesión y el diccionario de traducción se inicializan en el primer uso
+        self.__lock = threading.Lock()
+        self.__sesion_iniciada = False
+        self.__diction = None
+        self.__cache_diccionario = os.path.join(cache_dir, 'es.json')
+        self.__diccionario_ttl = diccionario_ttl
+
+    def __iniciar_sesion(self):
+        """Visita el dashboard una única vez para obtener las cookies de la sesión"""
+        if self.__sesion_iniciada:
+            return
+        with self.__lock:
+            if not self.__sesion_iniciada:
+                self.__s.get(f'{self.__url}/#/dashboard', verify=False, timeout=15)
+                self.__sesion_iniciada = True
+
+    @property
+    def diccionario(self):
+        """
+        Diccionario de traducción de BYMA
+        Se lee del cache en disco si tiene menos de diccionario_ttl segundos,
+        si no se descarga y se vuelve a guardar
+        """
+        if self.__diction is None:
+            with self.__lock:
+                if self.__diction is None:
+                    self.__diction = self.__cargar_diccionario()
+        return self.__diction
+
+    def __cargar_diccionario(self):
+        """Carga el diccionario de traducción desde el cache o desde la API"""
+        try:
+            if time.time() - os.path.getmtime(self.__cache_diccionario) < self.__diccionario_ttl:
+                with open(self.__cache_diccionario, encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+
         try:
-            response = self.__s.get('https://open.bymadata.com.ar/assets/api/langs/es.json', headers=self.__headers, verify=False)
-            self.__diction = response.json()
-        except:
-            self.__diction = {}
+            response = self.__s.get(f'{self.__url}/assets/api/langs/es.json', headers=self.__headers, verify=False, timeout=15)
+            diccionario = response.json()
+        except Exception:
             print("No se pudo obtener el diccionario de traducción")
+            return {}
+
+        try:
+            os.makedirs(os.path.dirname(self.__cache_diccionario), exist_ok=True)
+            with open(self.__cache_diccionario, 'w', encoding='utf-8') as f:
+                json.dump(diccionario, f)
+        except OSError as e:
+            print(f"No se pudo guardar el diccionario en cache: {e}")
+        return diccionario
 
     def get_bonds(self):
         """Obtiene cotizaciones de bonos públicos"""
@@ -58,60 +178,56 @@ class OpenBYMAdata:
         """Obtiene cotizaciones de obligaciones negociables"""
         return self.__get_fixed_income('negociable-obligations')
 
+    def get_fixed_income_many(self, endpoints=None, max_workers=None):
+        """
+        Obtiene varios paneles de renta fija en paralelo sobre la misma sesión
+        Retorna un diccionario endpoint -> DataFrame (None si falló)
+        El tiempo de cada endpoint queda registrado en self.tiempos
+        """
+        if endpoints is None:
+            endpoints = list(ENDPOINTS_RENTA_FIJA)
+        if not endpoints:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(endpoints)) as executor:
+            resultados = executor.map(self.__get_fixed_income, endpoints)
+            return dict(zip(endpoints, resultados))
+
     def __get_fixed_income(self, endpoint):
         """Método interno para obtener datos de renta fija"""
+        inicio = time.perf_counter()
+        try:
+            return self.__fetch_fixed_income(endpoint)
+        finally:
+            self.tiempos[endpoint] = time.perf_counter() - inicio
+
+    def __fetch_fixed_income(self, endpoint):
+        """Consulta un endpoint de renta fija y procesa la respuesta"""
         print(f"Obteniendo datos de {endpoint}...")
         
         try:
-            response = self.__s.post(
-                f'https://open.bymadata.com.ar/vanoms-be-core/rest/api/bymadata/free/{endpoint}', 
-                data=self.__data, 
-                headers=self.__headers, 
-                verify=False,
-                timeout=15
-            )
+            self.__iniciar_sesion()
+            with etapa('http', endpoint=endpoint) as medicion:
+                response = self.__s.post(
+                    f'{self.__url}/vanoms-be-core/rest/api/bymadata/free/{endpoint}', 
+                    data=self.__data, 
+                    headers=self.__headers, 
+                    verify=False,
+                    timeout=15
+                )
+                medicion.bytes = len(response.content)
             
             if response.status_code != 200:
                 print(f"Error al obtener datos: Código {response.status_code}")
                 return None
-                
-            df = pd.DataFrame()
-            
-            if endpoint == "public-bonds" or endpoint == "lebacs":
-                json_data = response.json()
-                if 'data' in json_data:
-                    df = pd.DataFrame(json_data.get('data', []))
-                else:
-                    print(f"No se encontraron datos en la respuesta de {endpoint}")
-                    return None
-            else:
-                df = pd.DataFrame(response.json())
-
-            if df.empty:
-                print(f"No se encontraron datos para {endpoint}")
-                return None
-                
-            # Filtrar y renombrar columnas
-            try:
-                df = df[self.__filter_columns_fixedIncome].copy()
-                df.columns = self.__fixedIncome_columns
-            except KeyError as e:
-                print(f"Error al procesar columnas: {e}")
-                # Mostrar columnas disponibles
-                print(f"Columnas disponibles: {df.columns.tolist()}")
-                return None
-                
-            # Convertir tipos de datos
-            df['expiration'] = pd.to_datetime(df['expiration'], errors='coerce')
-            df['datetime'] = pd.to_datetime(df['datetime'], errors='coerce')
             
-            # Convertir columnas numéricas
-            for col in self.__numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+            if self.archivo is not None:
+                try:
+                    self.archivo.guardar(endpoint, response.content)
+                except OSError as e:
+                    print(f"No se pudo archivar la respuesta de {endpoint}: {e}")
             
-            print(f"Se obtuvieron {len(df)} registros de {endpoint}")
-            return df
+            return procesar_renta_fija(response.content, endpoint)
             
         except requests.exceptions.RequestException as e:
             print(f"Error de conexión para {endpoint}: {e}")
@@ -121,10 +237,168 @@ class OpenBYMAdata:
             return None
 
 
+def cuerpo_renta_fija(plazos=('T1',)):
+    """Cuerpo JSON de la consulta de renta fija para los plazos de liquidación pedidos"""
+    desconocidos = [plazo for plazo in plazos if plazo not in PLAZOS_LIQUIDACION]
+    if desconocidos or not plazos:
+        raise ValueError(f"Plazos inválidos: {list(plazos)}. Opciones: {list(PLAZOS_LIQUIDACION)}")
+    return json.dumps({
+        'excludeZeroPxAndQty': False,
+        'T2': 'T2' in plazos,
+        'T1': 'T1' in plazos,
+        'T0': 'T0' in plazos,
+        'Content-Type': 'application/json',
+    }, separators=(',', ':'))
+
+
+def headers_api(url_base=URL_BYMA):
+    """Headers que espera la API de BYMA (los de un navegador en el dashboard)"""
+    return {
+        'Connection': 'keep-alive',
+        'sec-ch-ua': '" Not A;Brand";v="99", "Chromium";v="96", "Google Chrome";v="96"',
+        'Accept': 'application/json, text/plain, */*',
+        'Content-Type': 'application/json',
+        'sec-ch-ua-mobile': '?0',
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.93 Safari/537.36',
+        'sec-ch-ua-platform': '"Windows"',
+        'Origin': url_base,
+        'Sec-Fetch-Site': 'same-origin',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Dest': 'empty',
+        'Referer': f'{url_base}/',
+        'Accept-Language': 'es-US,es-419;q=0.9,es;q=0.8,en;q=0.7',
+    }
+
+
+def procesar_renta_fija(contenido, endpoint):
+    """
+    Convierte el cuerpo de una respuesta de renta fija en el DataFrame tipado
+    Compartido por el cliente sincrónico y el asincrónico; retorna None si la
+    respuesta no trae datos utilizables
+    """
+    # Decodificar solo los campos que se usan, directamente en columnas
+    try:
+        df = decodificar_renta_fija(contenido)
+    except KeyError as e:
+        print(f"Error al procesar columnas: {e}")
+        return None
+    
+    if df is None:
+        print(f"No se encontraron datos en la respuesta de {endpoint}")
+        return None
+    
+    if df.empty:
+        print(f"No se encontraron datos para {endpoint}")
+        return None
+    
+    # Convertir tipos de datos
+    df = aplicar_esquema(df)
+    
+    # Incorporar a la referencia los símbolos nuevos (los conocidos no se reprocesan);
+    # una falla del cache no debe hacer perder el panel
+    try:
+        obtener_referencia().actualizar(df, ENDPOINTS_RENTA_FIJA.get(endpoint))
+    except Exception as e:
+        print(f"No se pudo actualizar la referencia de instrumentos: {e}")
+    
+    print(f"Se obtuvieron {len(df)} registros de {endpoint}")
+    return df
+
+
+def decodificar_renta_fija(contenido):
+    """
+    Decodifica el cuerpo crudo de una respuesta de renta fija de BYMA
+    Solo arma las columnas de CAMPOS_RENTA_FIJA, sin crear un DataFrame con
+    todos los campos de cada registro. Acepta la lista de registros o un
+    objeto con la lista en 'data'; retorna None si no hay lista de registros
+    No es un parser incremental: el JSON se decodifica entero (con orjson si
+    está) y los dicts de los registros se crean igual; lo que se evita es el
+    DataFrame con todas las columnas (para respuestas de pocos MB se prefirió
+    decodificar de una vez a agregar una dependencia de streaming)
+    """
+    with etapa('decodificacion') as medicion:
+        medicion.bytes = len(contenido)
+        datos = json_loads(contenido)
+        if isinstance(datos, dict):
+            datos = datos.get('data')
+        if not isinstance(datos, list):
+            return None
+        medicion.filas_salida = len(datos)
+    if not datos:
+        return pd.DataFrame(columns=COLUMNAS_RENTA_FIJA)
+    
+    faltantes = [campo for campo in CAMPOS_RENTA_FIJA if campo not in datos[0]]
+    if faltantes:
+        raise KeyError(f"Faltan campos en la respuesta: {faltantes}. Campos disponibles: {list(datos[0])}")
+    
+    with etapa('columnas') as medicion:
+        medicion.filas_entrada = medicion.filas_salida = len(datos)
+        return pd.DataFrame({
+            columna: [registro.get(campo) for registro in datos]
+            for campo, columna in zip(CAMPOS_RENTA_FIJA, COLUMNAS_RENTA_FIJA)
+        })
+
+
+@medir('esquema')
+def aplicar_esquema(df, esquema=ESQUEMA_RENTA_FIJA):
+    """
+    Convierte las columnas de un DataFrame de renta fija a los tipos del esquema
+    Los valores que no se pueden convertir quedan como nulos
+    """
+    for col, tipo in esquema.items():
+        if col not in df.columns:
+            continue
+        if tipo == 'category' or tipo.startswith('string'):
+            df[col] = df[col].astype(tipo)
+        elif tipo.startswith('datetime'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif tipo.lower().startswith('int'):
+            # 'int32' completa los nulos con 0; los enteros nullables ('Int32') los conservan
+            valores = pd.to_numeric(df[col], errors='coerce')
+            if tipo.islower():
+                valores = valores.fillna(0)
+            rango = np.iinfo(tipo.lower())
+            if valores.notna().any() and (valores.min() < rango.min or valores.max() > rango.max):
+                tipo = tipo[0] + 'nt64'
+            df[col] = valores.round().astype(tipo)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+    return df
+
+
+def reporte_memoria(df, esquema=ESQUEMA_RENTA_FIJA):
+    """
+    Compara la memoria de un DataFrame tal como está y con el esquema aplicado
+    Retorna un DataFrame con los bytes por columna antes y después
+    """
+    antes = df.memory_usage(deep=True, index=False)
+    despues = aplicar_esquema(df.copy(), esquema).memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({'antes': antes, 'despues': despues})
+    reporte.loc['TOTAL'] = reporte.sum()
+    reporte['reduccion'] = 1 - reporte['despues'] / reporte['antes']
+    return reporte
+
+
+def get_client():
+    """
+    Retorna una instancia de OpenBYMAdata compartida por todo el proceso
+    Usa el transporte compartido del proceso (ver transporte.py)
+    """
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = OpenBYMAdata(transporte=transporte_compartido())
+    return _cliente
+
+
 def save_to_csv(df, filename):
     """Guarda un DataFrame en un archivo CSV"""
     if df is not None and not df.empty:
-        df.to_csv(filename, index=False)
+        with etapa('guardado', destino='csv') as medicion:
+            medicion.filas_entrada = len(df)
+            df.to_csv(filename, index=False)
+            medicion.bytes = os.path.getsize(filename)
         print(f"Datos guardados en {filename}")
         return True
     return False
@@ -140,13 +414,37 @@ def main():
         os.makedirs(output_dir)
     
     # Fecha actual para nombrar archivos
-    fecha = datetime.now().strftime("%Y%m%d")
+    ahora = datetime.now()
+    fecha = ahora.strftime("%Y%m%d")
     
-    # Inicializar la clase para acceder a BYMA
-    byma = OpenBYMAdata()
+    # Histórico columnar opcional (variable de entorno BYMA_HISTORICO)
+    historico = historico_configurado()
     
-    # Obtener bonos públicos
-    bonos_publicos = byma.get_bonds()
+    # Cliente compartido para acceder a BYMA
+    byma = get_client()
+    
+    # Obtener los tres paneles en paralelo
+    paneles = byma.get_fixed_income_many(['public-bonds', 'lebacs', 'negociable-obligations'])
+    bonos_publicos = paneles['public-bonds']
+    letras = paneles['lebacs']
+    obligaciones = paneles['negociable-obligations']
+
+    print("\nTiempos por endpoint:")
+    for endpoint, segundos in byma.tiempos.items():
+        print(f"  {endpoint}: {segundos:.2f} s")
+
+    estadisticas = getattr(transporte_compartido(), 'estadisticas', dict)()
+    if estadisticas:
+        print("\nConsultas HTTP:")
+        for endpoint, datos in estadisticas.items():
+            print(f"  {endpoint}: {datos['consultas']} consultas, {datos['errores']} errores, "
+                  f"{datos['reintentos']} reintentos, latencia media {datos['latencia_media']:.2f} s")
+
+    if historico is not None:
+        for endpoint, df in paneles.items():
+            historico.agregar(df, ENDPOINTS_RENTA_FIJA[endpoint], ahora)
+        print(f"Snapshot agregado al histórico en '{historico.directorio}'")
+
     if bonos_publicos is not None:
         # Mostrar una vista previa
         print("\nVista previa de bonos públicos:")
@@ -154,8 +452,6 @@ def main():
         # Guardar a CSV
         save_to_csv(bonos_publicos, os.path.join(output_dir, f"bonos_publicos_{fecha}.csv"))
     
-    # Obtener letras del tesoro
-    letras = byma.get_short_term_bonds()
     if letras is not None:
         # Mostrar una vista previa
         print("\nVista previa de letras del tesoro:")
@@ -163,8 +459,6 @@ def main():
         # Guardar a CSV
         save_to_csv(letras, os.path.join(output_dir, f"letras_tesoro_{fecha}.csv"))
     
-    # Obtener obligaciones negociables
-    obligaciones = byma.get_corporateBonds()
     if obligaciones is not None:
         # Mostrar una vista previa
         print("\nVista previa de obligaciones negociables:")
@@ -176,25 +470,24 @@ def main():
     print("\nCreando archivo combinado de todos los bonos...")
     dfs = []
     
-    if bonos_publicos is not None:
-        bonos_publicos['tipo'] = 'BONOS SOBERANOS'
-        dfs.append(bonos_publicos)
-    
-    if letras is not None:
-        letras['tipo'] = 'LETRAS DEL TESORO'
-        dfs.append(letras)
-    
-    if obligaciones is not None:
-        obligaciones['tipo'] = 'OBLIGACIONES NEGOCIABLES'
-        dfs.append(obligaciones)
+    for endpoint, df in paneles.items():
+        if df is not None:
+            dfs.append(df.assign(tipo=ENDPOINTS_RENTA_FIJA[endpoint]))
     
     if dfs:
-        todos_bonos = pd.concat(dfs, ignore_index=True)
+        # Las categorías de cada panel se unifican al aplicar de nuevo el esquema
+        todos_bonos = aplicar_esquema(pd.concat(dfs, ignore_index=True))
         save_to_csv(todos_bonos, os.path.join(output_dir, f"todos_bonos_{fecha}.csv"))
         print(f"\nTotal de bonos obtenidos: {len(todos_bonos)}")
+        obtener_referencia().guardar()
     else:
         print("No se pudo obtener ninguna información de bonos")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import sys
+    if len(sys.argv) == 3 and sys.argv[1] == '--reporte-memoria':
+        # Ejemplo: python byma_bonos.py --reporte-memoria datos_bonos/todos_bonos_20250514.csv
+        print(reporte_memoria(pd.read_csv(sys.argv[2])).to_string())
+    else:
+        main() 
\ No newline at end of file
@@ -1,18 +1,48 @@
+import numpy as np
 import pandas as pd
 import os
-import re
 from datetime import datetime
-from byma_bonos import OpenBYMAdata, save_to_csv
+from byma_bonos import get_client, save_to_csv
+from historico import historico_configurado
+from metricas import medir
+from referencia import obtener_referencia
+from reportes import Reporte
+from serie_mep import SerieMEP
 
 def obtener_bonos():
     """Obtiene los bonos públicos desde la API de BYMA"""
     print("Obteniendo bonos públicos para calcular dólar MEP...")
-    byma = OpenBYMAdata()
-    return byma.get_bonds()
+    return get_client().get_bonds()
 
-def filtrar_bonos_para_mep(df):
+# Nombre de las columnas de cada pata en la tabla de pares
+PATAS = {'pesos': 'pesos', 'mep': 'dolares', 'cable': 'cable'}
+
+# Datos de cada pata que se conservan para la agregación
+COLUMNAS_PATA = ['bid', 'ask', 'volume', 'turnover', 'datetime']
+
+# Cotizaciones más viejas que esto respecto de la más reciente se descartan
+MAX_ANTIGUEDAD = pd.Timedelta(minutes=60)
+
+# Familia de series por defecto de main y filtrar_bonos_para_mep (None para todas)
+FAMILIA_MEP = r'AL\d+'
+
+# Spread relativo mínimo para que un libro muy ajustado no domine la ponderación
+SPREAD_MINIMO = 0.0001
+
+def clasificar_simbolos(simbolos):
+    """
+    Separa cada símbolo en la raíz de la serie y su pata de moneda
+    Ejemplo: 'AL30' -> ('AL30', 'pesos'), 'AL30D' -> ('AL30', 'mep'), 'AL30C' -> ('AL30', 'cable')
+    Los símbolos conocidos salen del índice de la referencia de instrumentos
+    (búsqueda por símbolo); solo los desconocidos se parsean, una vez por proceso
+    """
+    return obtener_referencia().clasificar(simbolos)
+
+@medir('filtrado')
+def filtrar_bonos_para_mep(df, familia=FAMILIA_MEP):
     """
     Filtra los bonos para cálculo del MEP (bonos en pesos y su versión en dólares)
+    familia es una expresión para la raíz de la serie (None para todas)
     Retorna dos dataframes: bonos en pesos y bonos en dólares
     """
     if df is None or df.empty:
@@ -22,113 +52,188 @@ def filtrar_bonos_para_mep(df):
     # Convertir símbolos a mayúsculas para normalizar
     df['symbol'] = df['symbol'].str.upper()
     
-    # Filtrar bonos AL (comunes) y su versión dolarizada (terminados en D)
+    # Separar raíz y moneda de todos los símbolos en una sola pasada
     # Ejemplo: AL30 (pesos) y AL30D (dólares)
-    bonos_pesos = df[df['symbol'].str.contains(r'^AL\d+$', regex=True, na=False)].copy()
-    bonos_dolares = df[df['symbol'].str.contains(r'^AL\d+D$', regex=True, na=False)].copy()
+    partes = clasificar_simbolos(df['symbol'])
     
     # Eliminar bonos con precio 0 o nulo
-    bonos_pesos = bonos_pesos[bonos_pesos['last'] > 0].copy()
-    bonos_dolares = bonos_dolares[bonos_dolares['last'] > 0].copy()
+    seleccion = df['last'] > 0
+    if familia is not None:
+        seleccion &= partes['raiz'].str.fullmatch(familia, na=False)
+    
+    bonos_pesos = df[seleccion & (partes['moneda'] == 'pesos')].copy()
+    bonos_dolares = df[seleccion & (partes['moneda'] == 'mep')].copy()
     
     print(f"Bonos en pesos encontrados: {len(bonos_pesos)}")
     print(f"Bonos en dólares encontrados: {len(bonos_dolares)}")
     
     return bonos_pesos, bonos_dolares
 
-def extraer_numero_bono(symbol):
+@medir('pares')
+def calcular_tipos_de_cambio(df, familia=None):
     """
-    Extrae el número del bono a partir de su símbolo
-    Ejemplo: 'AL30' -> '30', 'AL30D' -> '30'
+    Calcula el dólar MEP y el CCL de todas las familias del panel en una sola pasada
+    Une la pata en pesos con la pata D (MEP) y la pata C (cable) de cada serie
+    Ejemplo: AL30 / AL30D = MEP, AL30 / AL30C = CCL
+    familia es una expresión para la raíz de la serie (None para todas)
     """
-    try:
-        # Extraer los dígitos después de AL y antes de D (si existe)
-        numeros = re.findall(r'AL(\d+)', symbol)
-        if numeros:
-            return numeros[0]
+    if df is None or df.empty:
         return None
-    except:
+    
+    claves = ['raiz', 'settlement'] if 'settlement' in df.columns else ['raiz']
+    extras = [col for col in COLUMNAS_PATA if col in df.columns]
+    cotizaciones = df[df['last'] > 0]
+    cotizaciones = pd.concat([cotizaciones[['symbol', 'last'] + claves[1:] + extras], clasificar_simbolos(cotizaciones['symbol'])], axis=1)
+    if familia is not None:
+        cotizaciones = cotizaciones[cotizaciones['raiz'].str.fullmatch(familia, na=False)]
+    cotizaciones['symbol'] = cotizaciones['symbol'].astype(str).str.upper()
+    
+    # Un DataFrame por pata, con una única cotización por serie
+    patas = {}
+    for moneda, nombre in PATAS.items():
+        pata = cotizaciones[cotizaciones['moneda'] == moneda].drop_duplicates(claves)
+        nombres = {'symbol': f'bono_{nombre}', 'last': f'precio_{nombre}'}
+        nombres.update({col: f'{col}_{nombre}' for col in extras})
+        patas[moneda] = pata[['symbol', 'last'] + claves + extras].rename(columns=nombres)
+    
+    pares = (patas['pesos']
+             .merge(patas['mep'], on=claves, how='left')
+             .merge(patas['cable'], on=claves, how='left'))
+    pares = pares.dropna(subset=['precio_dolares', 'precio_cable'], how='all')
+    if pares.empty:
         return None
+    
+    # Tipo de cambio: Precio en pesos / Precio en dólares
+    pares['dolar_mep'] = pares['precio_pesos'] / pares['precio_dolares']
+    pares['dolar_ccl'] = pares['precio_pesos'] / pares['precio_cable']
+    pares['numero'] = pares['raiz'].str.extract(r'(\d+)', expand=False)
+    
+    columnas = ['bono_pesos', 'precio_pesos', 'bono_dolares', 'precio_dolares', 'dolar_mep', 'numero',
+                'raiz', 'bono_cable', 'precio_cable', 'dolar_ccl'] + claves[1:]
+    columnas += [f'{col}_{nombre}' for nombre in PATAS.values() for col in extras]
+    return pares[columnas].sort_values('raiz', kind='stable').reset_index(drop=True)
 
-def calcular_dolar_mep(bonos_pesos, bonos_dolares):
+def calcular_dolar_mep(bonos_pesos, bonos_dolares, bonos_cable=None):
     """
-    Calcula el dólar MEP para cada par de bonos AL/ALD con la misma numeración
+    Calcula el dólar MEP para cada par de bonos con la misma raíz
     Ejemplo: AL30 (pesos) / AL30D (dólares)
+    Si se pasan bonos_cable también calcula el CCL (AL30 / AL30C)
     """
     if bonos_pesos is None or bonos_dolares is None or bonos_pesos.empty or bonos_dolares.empty:
         print("No hay suficientes datos para calcular el dólar MEP")
         return None
     
-    # Agregar columna con el número de bono
-    bonos_pesos['numero'] = bonos_pesos['symbol'].apply(extraer_numero_bono)
-    bonos_dolares['numero'] = bonos_dolares['symbol'].apply(extraer_numero_bono)
-    
-    # Crear lista para almacenar resultados
-    resultados = []
-    
-    # Para cada bono en pesos, buscar su correspondiente en dólares
-    for _, bono_pesos in bonos_pesos.iterrows():
-        numero = bono_pesos['numero']
-        if not numero:
-            continue
-            
-        # Buscar el bono en dólares correspondiente
-        bono_dolares_match = bonos_dolares[bonos_dolares['numero'] == numero]
-        
-        if not bono_dolares_match.empty:
-            # Tomar el primer match si hay varios
-            bono_dolares = bono_dolares_match.iloc[0]
-            
-            # Calcular dólar MEP: Precio en pesos / Precio en dólares
-            precio_pesos = bono_pesos['last']
-            precio_dolares = bono_dolares['last']
-            
-            if precio_dolares > 0:
-                dolar_mep = precio_pesos / precio_dolares
-                
-                # Agregar a resultados
-                resultados.append({
-                    'bono_pesos': bono_pesos['symbol'],
-                    'precio_pesos': precio_pesos,
-                    'bono_dolares': bono_dolares['symbol'],
-                    'precio_dolares': precio_dolares,
-                    'dolar_mep': dolar_mep,
-                    'numero': numero
-                })
-    
-    if resultados:
-        # Convertir a DataFrame
-        df_resultados = pd.DataFrame(resultados)
-        
-        # Ordenar por número de bono
-        df_resultados = df_resultados.sort_values('numero')
-        
-        return df_resultados
-    else:
+    patas = [bonos_pesos, bonos_dolares] if bonos_cable is None else [bonos_pesos, bonos_dolares, bonos_cable]
+    df_resultados = calcular_tipos_de_cambio(pd.concat(patas, ignore_index=True))
+    
+    if df_resultados is not None:
+        df_resultados = df_resultados.dropna(subset=['dolar_mep'])
+    
+    if df_resultados is None or df_resultados.empty:
         print("No se encontraron pares de bonos adecuados para calcular el dólar MEP")
         return None
+    
+    if bonos_cable is None:
+        df_resultados = df_resultados.drop(columns=[col for col in df_resultados.columns if col.endswith('_cable') or col == 'dolar_ccl'])
+    return df_resultados
 
-def calcular_promedio_ponderado(df_mep):
+def _columna_pata(df, columna, pata):
+    """Retorna la columna de una pata o una serie vacía si el par no la trae"""
+    nombre = f'{columna}_{pata}'
+    if nombre in df.columns:
+        return df[nombre]
+    return pd.Series(np.nan, index=df.index)
+
+def calcular_liquidez(df_mep, columna='dolar_mep', max_antiguedad=MAX_ANTIGUEDAD, ahora=None):
     """
-    Calcula el promedio ponderado del dólar MEP
-    Usa el volumen como factor de ponderación, si está disponible
+    Agrega a cada par el rango de compra/venta implícito en bid/ask, el volumen
+    operado en dólares, la antigüedad de la cotización y un puntaje de liquidez
+    columna es 'dolar_mep' (pata D) o 'dolar_ccl' (pata C)
+    El puntaje es el peso de cada par en el promedio ponderado (suma 1)
+    """
+    pata = 'cable' if columna == 'dolar_ccl' else 'dolares'
+    prefijo = columna.split('_', 1)[1]
+    df = df_mep.copy()
+    
+    # Rango implícito: comprar dólares (ask en pesos / bid en dólares)
+    # y venderlos (bid en pesos / ask en dólares)
+    df[f'{prefijo}_compra'] = _columna_pata(df, 'ask', 'pesos') / _columna_pata(df, 'bid', pata)
+    df[f'{prefijo}_venta'] = _columna_pata(df, 'bid', 'pesos') / _columna_pata(df, 'ask', pata)
+    spread = (df[f'{prefijo}_compra'] - df[f'{prefijo}_venta']) / df[columna]
+    df[f'spread_{prefijo}'] = spread
+    
+    # Volumen del par en dólares: el de la pata menos operada
+    volumen = np.fmin(_columna_pata(df, 'turnover', 'pesos') / df[columna], _columna_pata(df, 'turnover', pata))
+    # El volumen de las fuentes web es un entero nullable: sin dato queda NaN (peso uniforme), no 0
+    volumen = volumen.fillna(np.fmin(_columna_pata(df, 'volume', 'pesos').astype(float),
+                                     _columna_pata(df, 'volume', pata).astype(float)))
+    df[f'volumen_{prefijo}'] = volumen
+    
+    # Antigüedad respecto de la cotización más reciente del panel
+    fechas = pd.concat([pd.to_datetime(_columna_pata(df, 'datetime', 'pesos'), errors='coerce'),
+                        pd.to_datetime(_columna_pata(df, 'datetime', pata), errors='coerce')], axis=1).min(axis=1)
+    if ahora is None:
+        ahora = fechas.max()
+    antiguedad = ahora - fechas
+    
+    vigente = df[columna].notna() & (df[columna] > 0)
+    vigente &= antiguedad.isna() | (antiguedad <= max_antiguedad)
+    vigente &= volumen.isna() | (volumen > 0)
+    
+    # Peso: volumen en dólares sobre spread relativo (sin datos, peso uniforme)
+    spread = spread.where(spread > 0).clip(lower=SPREAD_MINIMO)
+    spread = spread.fillna(spread.max() if spread.notna().any() else 1.0)
+    peso = volumen.fillna(volumen.max() if volumen.notna().any() else 1.0) / spread
+    peso = peso.where(vigente, 0.0)
+    total = peso.sum()
+    df[f'liquidez_{prefijo}'] = peso / total if total > 0 else 0.0
+    return df
+
+def _promedio(valores, pesos):
+    """Promedio ponderado ignorando valores nulos"""
+    validos = valores.notna() & (pesos > 0)
+    if not validos.any():
+        return np.nan
+    return float(np.average(valores[validos], weights=pesos[validos]))
+
+@medir('agregacion')
+def calcular_promedio_ponderado(df_mep, columna='dolar_mep', max_antiguedad=MAX_ANTIGUEDAD, ahora=None):
+    """
+    Calcula el promedio ponderado del dólar MEP (o del CCL con columna='dolar_ccl')
+    Cada par pesa por su volumen en dólares y por lo ajustado de su spread;
+    los pares sin operaciones o con cotizaciones viejas quedan afuera
     """
     if df_mep is None or df_mep.empty:
         return None
-        
-    # Calcular promedio simple si no hay suficientes datos
-    promedio_simple = df_mep['dolar_mep'].mean()
+    
+    prefijo = columna.split('_', 1)[1]
+    if f'liquidez_{prefijo}' not in df_mep.columns:
+        df_mep = calcular_liquidez(df_mep, columna, max_antiguedad, ahora)
+    pesos = df_mep[f'liquidez_{prefijo}']
+    
+    # Promedio simple si no hay datos para ponderar
+    promedio_simple = df_mep[columna].mean()
+    promedio_ponderado = _promedio(df_mep[columna], pesos)
     
     return {
         'promedio_simple': promedio_simple,
-        'min': df_mep['dolar_mep'].min(),
-        'max': df_mep['dolar_mep'].max()
+        'promedio_ponderado': promedio_simple if np.isnan(promedio_ponderado) else promedio_ponderado,
+        'compra': _promedio(df_mep[f'{prefijo}_compra'], pesos),
+        'venta': _promedio(df_mep[f'{prefijo}_venta'], pesos),
+        'min': df_mep[columna].min(),
+        'max': df_mep[columna].max(),
+        'pares_utilizados': int((pesos > 0).sum()),
+        'pares_descartados': int((pesos <= 0).sum()),
     }
 
-def main():
-    """Función principal"""
-    print("Calculadora de Dólar MEP - Bonos AL/ALD")
-    print("=======================================")
+def main(familia=FAMILIA_MEP):
+    """
+    Función principal
+    familia es la expresión de la raíz de las series que entran en todos los
+    resultados (por defecto AL, como siempre; None para todas las familias)
+    """
+    print("Calculadora de Dólar MEP y CCL - Bonos soberanos")
+    print("================================================")
     
     # Crear directorio para guardar resultados
     output_dir = "resultados_mep"
@@ -142,7 +247,7 @@ def main():
     bonos = obtener_bonos()
     
     # Filtrar bonos para MEP
-    bonos_pesos, bonos_dolares = filtrar_bonos_para_mep(bonos)
+    bonos_pesos, bonos_dolares = filtrar_bonos_para_mep(bonos, familia)
     
     # Guardar bonos filtrados para referencia
     if bonos_pesos is not None and not bonos_pesos.empty:
@@ -151,36 +256,44 @@ def main():
     if bonos_dolares is not None and not bonos_dolares.empty:
         save_to_csv(bonos_dolares, os.path.join(output_dir, f"bonos_dolares_{fecha}.csv"))
     
-    # Calcular dólar MEP
-    df_mep = calcular_dolar_mep(bonos_pesos, bonos_dolares)
+    # Calcular dólar MEP y CCL de las series de la familia
+    df_mep = calcular_tipos_de_cambio(bonos, familia)
+    if df_mep is not None:
+        df_mep = df_mep.dropna(subset=['dolar_mep'])
     
     if df_mep is not None and not df_mep.empty:
         # Mostrar resultados
-        print("\nCálculo de Dólar MEP por pares de bonos:")
-        print(df_mep[['bono_pesos', 'precio_pesos', 'bono_dolares', 'precio_dolares', 'dolar_mep']].to_string(index=False))
+        print("\nCálculo de Dólar MEP y CCL por pares de bonos:")
+        print(df_mep[['bono_pesos', 'precio_pesos', 'bono_dolares', 'precio_dolares', 'dolar_mep', 'bono_cable', 'dolar_ccl']].to_string(index=False))
         
-        # Calcular estadísticas
+        # Calcular liquidez de cada par y estadísticas
+        df_mep = calcular_liquidez(df_mep)
         stats = calcular_promedio_ponderado(df_mep)
         
         if stats:
             print("\nEstadísticas del Dólar MEP:")
+            print(f"Promedio ponderado: {stats['promedio_ponderado']:.2f} ({stats['pares_utilizados']} pares, {stats['pares_descartados']} descartados)")
+            print(f"Compra / Venta: {stats['compra']:.2f} / {stats['venta']:.2f}")
             print(f"Promedio: {stats['promedio_simple']:.2f}")
             print(f"Mínimo: {stats['min']:.2f}")
             print(f"Máximo: {stats['max']:.2f}")
         
-        # Guardar resultados
-        save_to_csv(df_mep, os.path.join(output_dir, f"dolar_mep_{fecha}.csv"))
+        historico = historico_configurado()
+        if historico is not None:
+            historico.agregar(df_mep, 'dolar_mep')
+        
+        # Historia de los cálculos anteriores más el actual, para el gráfico del tablero
+        serie = SerieMEP()
+        if historico is not None:
+            serie.cargar_historico(historico)
+        else:
+            serie.cargar_archivos(output_dir)
+            serie.ingresar(df_mep)
         
-        # Crear un archivo resumen con la cotización
-        with open(os.path.join(output_dir, f"cotizacion_mep_{fecha}.txt"), 'w') as f:
-            f.write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Cotización promedio Dólar MEP: ${stats['promedio_simple']:.2f}\n")
-            f.write(f"Cotización mínima: ${stats['min']:.2f}\n")
-            f.write(f"Cotización máxima: ${stats['max']:.2f}\n")
-            f.write("\nPares de bonos utilizados:\n")
-            
-            for _, row in df_mep.iterrows():
-                f.write(f"{row['bono_pesos']} (${row['precio_pesos']:.2f}) / {row['bono_dolares']} (${row['precio_dolares']:.2f}) = ${row['dolar_mep']:.2f}\n")
+        # Guardar resumen, pares e historia (txt, CSV, JSON y HTML)
+        reporte = Reporte(output_dir, fecha)
+        reporte.actualizar(resumen=stats, pares=df_mep, historia=serie.historia())
+        reporte.escribir()
         
         print(f"\nResultados guardados en la carpeta '{output_dir}'")
     else:
@@ -188,4 +301,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import sys
+    # python dolar_mep.py [familia|todas]
+    familia = sys.argv[1] if len(sys.argv) > 1 else FAMILIA_MEP
+    main(None if familia == 'todas' else familia) 
\ No newline at end of file
@@ -0,0 +1,270 @@
+import argparse
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from metricas import etapa
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+
+# Directorio por defecto del histórico (BYMA_HISTORICO activa el guardado en los scripts)
+DIRECTORIO_HISTORICO = os.environ.get('BYMA_HISTORICO') or "historico_bonos"
+
+# Un día se compacta solo al llegar a esta cantidad de archivos (BYMA_HISTORICO_MAX_ARCHIVOS=0 lo desactiva)
+MAX_ARCHIVOS_PARTICION = int(os.environ.get('BYMA_HISTORICO_MAX_ARCHIVOS', 200))
+
+# Columna con el momento en que se tomó cada snapshot
+COLUMNA_SNAPSHOT = 'snapshot'
+
+# Tipos fijos de las columnas conocidas, para que todos los archivos compartan esquema
+if pa is not None:
+    TIPOS_COLUMNAS = {
+        'symbol': pa.dictionary(pa.int32(), pa.string()),
+        'settlement': pa.dictionary(pa.int8(), pa.string()),
+        'bid_size': pa.int64(),
+        'bid': pa.float64(),
+        'ask': pa.float64(),
+        'ask_size': pa.int64(),
+        'last': pa.float64(),
+        'close': pa.float64(),
+        'change': pa.float64(),
+        'open': pa.float64(),
+        'high': pa.float64(),
+        'low': pa.float64(),
+        'previous_close': pa.float64(),
+        'turnover': pa.float64(),
+        'volume': pa.int64(),
+        'operations': pa.int64(),
+        'datetime': pa.timestamp('us'),
+        'group': pa.dictionary(pa.int8(), pa.string()),
+        'expiration': pa.timestamp('us'),
+        'tipo': pa.dictionary(pa.int8(), pa.string()),
+        COLUMNA_SNAPSHOT: pa.timestamp('us'),
+    }
+    PARTICIONES = ds.partitioning(pa.schema([('fecha', pa.string())]), flavor='hive')
+
+
+def _categoria(tipo):
+    """Nombre de partición para un tipo de instrumento: 'BONOS SOBERANOS' -> 'bonos_soberanos'"""
+    return re.sub(r'[^a-z0-9]+', '_', str(tipo).lower()).strip('_')
+
+
+def _a_tabla(df):
+    """Convierte un snapshot a una tabla de Arrow con los tipos fijos de TIPOS_COLUMNAS"""
+    df = df.copy()
+    for columna, tipo in TIPOS_COLUMNAS.items():
+        if columna not in df.columns:
+            continue
+        if pa.types.is_timestamp(tipo):
+            df[columna] = pd.to_datetime(df[columna], errors='coerce')
+        elif pa.types.is_dictionary(tipo):
+            df[columna] = df[columna].astype('string')
+        elif pa.types.is_integer(tipo):
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('Int64')
+        else:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype('float64')
+
+    # En tablas derivadas un entero puede pasar a float cuando aparece un nulo;
+    # se guardan siempre como float para que el esquema no cambie entre archivos
+    for columna in df.columns:
+        if columna not in TIPOS_COLUMNAS and pd.api.types.is_integer_dtype(df[columna]):
+            df[columna] = df[columna].astype('float64')
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    campos = [pa.field(nombre, TIPOS_COLUMNAS.get(nombre, tabla.schema.field(nombre).type)) for nombre in tabla.column_names]
+    return tabla.cast(pa.schema(campos))
+
+
+class Historico:
+    """
+    Histórico de snapshots en Parquet, particionado por tipo de instrumento y fecha
+    Estructura: <directorio>/categoria=<tipo>/fecha=YYYY-MM-DD/<hora>-<id>.parquet
+    Cada tipo es un dataset independiente con su propio esquema
+    Los días se compactan solos: al pasar al día siguiente se compacta el
+    anterior, y el día en curso cada max_archivos archivos (0 lo desactiva)
+    """
+
+    def __init__(self, directorio=DIRECTORIO_HISTORICO, max_archivos=MAX_ARCHIVOS_PARTICION):
+        if pa is None:
+            raise ImportError("El histórico requiere pyarrow (pip install pyarrow)")
+        self.directorio = directorio
+        self.max_archivos = max_archivos
+        self.__lock = threading.Lock()
+        # Archivos de cada partición escritos desde la última compactación y último día escrito por tipo
+        self.__archivos = {}
+        self.__ultimo_dia = {}
+
+    def agregar(self, df, tipo, fecha_snapshot=None):
+        """
+        Agrega un snapshot al histórico
+        Retorna la ruta del archivo escrito o None si el DataFrame está vacío
+        """
+        if df is None or df.empty:
+            return None
+        if fecha_snapshot is None:
+            fecha_snapshot = datetime.now()
+        fecha_snapshot = pd.Timestamp(fecha_snapshot)
+
+        df = df.assign(**{COLUMNA_SNAPSHOT: fecha_snapshot})
+        particion = os.path.join(self.directorio, f"categoria={_categoria(tipo)}", f"fecha={fecha_snapshot:%Y-%m-%d}")
+        os.makedirs(particion, exist_ok=True)
+
+        archivo = os.path.join(particion, f"{fecha_snapshot:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet")
+        with etapa('guardado', destino='historico') as medicion:
+            medicion.filas_entrada = len(df)
+            pq.write_table(_a_tabla(df), archivo, compression='zstd')
+            medicion.bytes = os.path.getsize(archivo)
+        self.__compactar_si_corresponde(_categoria(tipo), particion, fecha_snapshot.normalize())
+        return archivo
+
+    def __compactar_si_corresponde(self, categoria, particion, dia):
+        """Compacta el día anterior al cambiar de día y el día en curso al llegar a max_archivos"""
+        if not self.max_archivos:
+            return
+        with self.__lock:
+            anterior = self.__ultimo_dia.get(categoria)
+            self.__ultimo_dia[categoria] = max(dia, anterior) if anterior is not None else dia
+            if particion not in self.__archivos:
+                # Primera escritura del proceso en la partición: contar lo que ya había
+                self.__archivos[particion] = sum(a.endswith('.parquet') for a in os.listdir(particion)) - 1
+            self.__archivos[particion] += 1
+            pendientes = []
+            if anterior is not None and dia > anterior:
+                pendientes.append(os.path.join(os.path.dirname(particion), f"fecha={anterior:%Y-%m-%d}"))
+            if self.__archivos[particion] >= self.max_archivos:
+                pendientes.append(particion)
+
+            for pendiente in pendientes:
+                try:
+                    self.__compactar_particion(pendiente)
+                except Exception as e:
+                    # El snapshot ya quedó guardado; la compactación se reintenta más adelante
+                    print(f"Error al compactar {pendiente}: {e}")
+
+    def compactar(self, fecha=None, tipos=None):
+        """
+        Une todos los snapshots de un día (de todos si fecha es None) en un único archivo por tipo
+        Retorna la cantidad de particiones compactadas
+        """
+        categorias = self.categorias() if tipos is None else [_categoria(t) for t in tipos]
+        compactadas = 0
+        for categoria in categorias:
+            directorio = os.path.join(self.directorio, f"categoria={categoria}")
+            if fecha is not None:
+                particiones = [os.path.join(directorio, f"fecha={pd.Timestamp(fecha):%Y-%m-%d}")]
+            elif os.path.isdir(directorio):
+                particiones = [os.path.join(directorio, d) for d in sorted(os.listdir(directorio)) if d.startswith('fecha=')]
+            else:
+                particiones = []
+            for particion in particiones:
+                with self.__lock:
+                    compactadas += self.__compactar_particion(particion)
+        return compactadas
+
+    def __compactar_particion(self, particion):
+        """Une los archivos de una partición en uno; retorna True si había algo que unir"""
+        if not os.path.isdir(particion):
+            return False
+        archivos = sorted(os.path.join(particion, a) for a in os.listdir(particion) if a.endswith('.parquet'))
+        if len(archivos) < 2:
+            self.__archivos[particion] = len(archivos)
+            return False
+        tabla = pa.concat_tables([pq.read_table(a, partitioning=None) for a in archivos], promote_options='default')
+        nombre = f"compactado-{uuid.uuid4().hex[:8]}.parquet"
+        destino = os.path.join(particion, nombre)
+        # Con punto adelante pyarrow.dataset ignora el archivo mientras se escribe
+        temporal = os.path.join(particion, f".{nombre}.tmp")
+        pq.write_table(tabla.sort_by(COLUMNA_SNAPSHOT), temporal, compression='zstd')
+        os.replace(temporal, destino)
+        for archivo in archivos:
+            os.remove(archivo)
+        self.__archivos[particion] = 1
+        return True
+
+    def categorias(self):
+        """Tipos de instrumento presentes en el histórico"""
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(d.split('=', 1)[1] for d in os.listdir(self.directorio) if d.startswith('categoria='))
+
+    def leer(self, simbolos=None, desde=None, hasta=None, tipos=None, columnas=None, columna_simbolo='symbol'):
+        """
+        Lee el histórico filtrando por símbolo, rango de snapshots y tipo
+        Los filtros se aplican al leer: solo se abren las particiones de los
+        tipos y fechas pedidos y solo se decodifican las columnas necesarias
+        """
+        categorias = self.categorias() if tipos is None else [_categoria(t) for t in tipos]
+
+        filtro = None
+
+        def agregar_filtro(condicion):
+            nonlocal filtro
+            filtro = condicion if filtro is None else filtro & condicion
+
+        if desde is not None:
+            desde = pd.Timestamp(desde)
+            agregar_filtro(ds.field('fecha') >= f"{desde:%Y-%m-%d}")
+            agregar_filtro(ds.field(COLUMNA_SNAPSHOT) >= pa.scalar(desde.to_pydatetime(), pa.timestamp('us')))
+        if hasta is not None:
+            hasta = pd.Timestamp(hasta)
+            agregar_filtro(ds.field('fecha') <= f"{hasta:%Y-%m-%d}")
+            agregar_filtro(ds.field(COLUMNA_SNAPSHOT) <= pa.scalar(hasta.to_pydatetime(), pa.timestamp('us')))
+        if simbolos is not None:
+            agregar_filtro(ds.field(columna_simbolo).isin([str(s).upper() for s in simbolos]))
+
+        tablas = []
+        for categoria in categorias:
+            directorio = os.path.join(self.directorio, f"categoria={categoria}")
+            if not os.path.isdir(directorio):
+                continue
+            dataset = ds.dataset(directorio, format='parquet', partitioning=PARTICIONES)
+            # El esquema del dataset sale del primer archivo: unificar los de todos para
+            # no perder columnas que aparecen en snapshots posteriores (ej. *_cable)
+            esquemas = [fragmento.physical_schema for fragmento in dataset.get_fragments()]
+            if len(esquemas) > 1:
+                esquema = pa.unify_schemas(esquemas + [PARTICIONES.schema], promote_options='permissive')
+                dataset = ds.dataset(directorio, format='parquet', partitioning=PARTICIONES, schema=esquema)
+            if simbolos is not None and columna_simbolo not in dataset.schema.names:
+                continue
+            # Los diccionarios de Arrow se leen como categóricas de pandas
+            tablas.append(dataset.to_table(columns=columnas, filter=filtro).to_pandas().assign(categoria=categoria))
+
+        if not tablas:
+            return pd.DataFrame()
+        if len(tablas) == 1:
+            return tablas[0]
+        return pd.concat(tablas, ignore_index=True)
+
+
+def historico_configurado():
+    """Retorna el Historico de la variable BYMA_HISTORICO o None si no está definida"""
+    directorio = os.environ.get('BYMA_HISTORICO')
+    if not directorio:
+        return None
+    return Historico(directorio)
+
+
+def main():
+    """Compacta el histórico: python historico.py compactar [--fecha YYYY-MM-DD] [--tipo TIPO]"""
+    parser = argparse.ArgumentParser(description="Mantenimiento del histórico de snapshots")
+    parser.add_argument('accion', choices=['compactar'])
+    parser.add_argument('--directorio', default=DIRECTORIO_HISTORICO, help="directorio del histórico")
+    parser.add_argument('--fecha', default=None, help="día a compactar (por defecto todos)")
+    parser.add_argument('--tipo', action='append', default=None, help="tipo de instrumento (se puede repetir)")
+    args = parser.parse_args()
+
+    compactadas = Historico(args.directorio).compactar(args.fecha, args.tipo)
+    print(f"Particiones compactadas: {compactadas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Dólar MEP (o CCL) incremental
+
+CalculadoraMEP mantiene en memoria la última cotización de cada pata y la
+tabla de pares del panel. Cada actualización (solo las filas que cambiaron,
+por ejemplo los EventoCambio de monitor_bonos) recalcula los pares de las
+series afectadas y ajusta las sumas del promedio ponderado, así que publicar
+un valor nuevo cuesta según la cantidad de cotizaciones que cambiaron y no
+según el tamaño del panel.
+
+Los resultados son los de calcular_liquidez + calcular_promedio_ponderado
+sobre el panel completo:
+
+    calculadora = CalculadoraMEP()
+    calculadora.suscribir(lambda publicacion: print(publicacion.estadisticas['promedio_ponderado']))
+    for evento in sondear(endpoints=['public-bonds']):
+        calculadora.procesar_evento(evento)
+"""
+import argparse
+import heapq
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dolar_mep import MAX_ANTIGUEDAD, PATAS, SPREAD_MINIMO, clasificar_simbolos
+from metricas import etapa
+from reportes import Reporte
+
+# Datos de cada pata que usa el cálculo
+COLUMNAS_COTIZACION = ['symbol', 'last', 'bid', 'ask', 'volume', 'turnover']
+
+# Valor publicado a los suscriptores: estadísticas y raíces de los pares que cambiaron
+PublicacionMEP = namedtuple('PublicacionMEP', ['fecha', 'estadisticas', 'pares'])
+
+# Segundos mínimos entre dos regeneraciones de la tabla de pares de los reportes del CLI
+PAUSA_TABLA_REPORTES = 60
+
+# Los montículos con entradas viejas se rearman al superar este múltiplo de la cantidad de pares
+MAX_ENTRADAS = 4
+
+# Grupos de pares según los datos que faltan para ponderar; el peso de cada
+# par es base * factor del grupo, donde el factor depende del panel completo:
+#   0 con volumen y spread   base = volumen / spread    factor = 1
+#   1 sin volumen            base = 1 / spread          factor = volumen máximo
+#   2 sin spread             base = volumen             factor = 1 / spread máximo
+#   3 sin ninguno            base = 1                   factor = volumen máximo / spread máximo
+SIN_VOLUMEN = 1
+SIN_SPREAD = 2
+
+# Posiciones del vector de sumas de cada grupo
+PESO, VALOR, PESO_COMPRA, COMPRA, PESO_VENTA, VENTA, COMPRA_INFINITA, VENTA_INFINITA = range(8)
+
+
+def _dividir(a, b):
+    """División con la semántica de pandas (x/0 es inf, 0/0 y nulos dan NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+def _fmin(a, b):
+    """Mínimo ignorando nulos, como np.fmin"""
+    if np.isnan(a):
+        return b
+    if np.isnan(b):
+        return a
+    return min(a, b)
+
+
+class _Par:
+    """Valores de un par y su aporte a las sumas del promedio"""
+
+    __slots__ = ('version', 'bono_pesos', 'precio_pesos', 'bono_pata', 'precio_pata', 'valor', 'compra', 'venta',
+                 'spread', 'volumen', 'fecha', 'grupo', 'aporte', 'contado')
+
+    def __init__(self, version, pesos, pata):
+        self.version = version
+        self.bono_pesos, self.precio_pesos, bid_pesos, ask_pesos, volumen_pesos, monto_pesos, fecha_pesos = pesos
+        self.bono_pata, self.precio_pata, bid_pata, ask_pata, volumen_pata, monto_pata, fecha_pata = pata
+        self.valor = _dividir(self.precio_pesos, self.precio_pata)
+
+        # Rango implícito: comprar dólares (ask en pesos / bid en dólares) y venderlos (bid en pesos / ask en dólares)
+        self.compra = _dividir(ask_pesos, bid_pata)
+        self.venta = _dividir(bid_pesos, ask_pata)
+        spread = _dividir(self.compra - self.venta, self.valor)
+        self.spread = max(spread, SPREAD_MINIMO) if spread > 0 else np.nan
+
+        # Volumen del par en dólares: el de la pata menos operada
+        self.volumen = _fmin(_dividir(monto_pesos, self.valor), monto_pata)
+        if np.isnan(self.volumen):
+            self.volumen = _fmin(volumen_pesos, volumen_pata)
+
+        fechas = [fecha for fecha in (fecha_pesos, fecha_pata) if fecha is not None]
+        self.fecha = min(fechas) if fechas else None
+
+        self.grupo = SIN_VOLUMEN * np.isnan(self.volumen) + SIN_SPREAD * np.isnan(self.spread)
+        volumen = 1.0 if np.isnan(self.volumen) else self.volumen
+        base = _dividir(volumen, 1.0 if np.isnan(self.spread) else self.spread)
+        aporte = np.zeros(8)
+        if base > 0:
+            aporte[PESO] = base
+            aporte[VALOR] = base * self.valor
+            for peso, suma, infinita, valor in ((PESO_COMPRA, COMPRA, COMPRA_INFINITA, self.compra),
+                                                (PESO_VENTA, VENTA, VENTA_INFINITA, self.venta)):
+                if np.isinf(valor):
+                    aporte[infinita] = 1
+                elif not np.isnan(valor):
+                    aporte[peso] = base
+                    aporte[suma] = base * valor
+        self.aporte = aporte
+        self.contado = False
+
+    def vigente_sin_antiguedad(self):
+        """Condiciones de calcular_liquidez que no dependen del resto del panel"""
+        return self.valor > 0 and (np.isnan(self.volumen) or self.volumen > 0)
+
+
+class CalculadoraMEP:
+    """
+    Dólar MEP (o CCL con columna='dolar_ccl') de todas las series del panel, actualizado por cambios
+    familia: expresión para la raíz de las series (None para todas)
+    Los suscriptores reciben una PublicacionMEP cada vez que una actualización modifica algún par
+    """
+
+    def __init__(self, columna='dolar_mep', familia=None, max_antiguedad=MAX_ANTIGUEDAD):
+        self.columna = columna
+        self.familia = re.compile(familia) if familia is not None else None
+        self.__moneda = 'cable' if columna == 'dolar_ccl' else 'mep'
+        self.__prefijo = columna.split('_', 1)[1]
+        self.__max_antiguedad = pd.Timedelta(max_antiguedad).value
+
+        self.__lock = threading.Lock()
+        self.__suscriptores = []
+        self.__patas = {}
+        self.__pares = {}
+        self.__version = 0
+        self.__ahora = None
+        self.__reiniciar_sumas()
+        self.__maximos_volumen = []
+        self.__maximos_spread = []
+        self.__minimos_valor = []
+        self.__maximos_valor = []
+        self.__maximos_fecha = []
+        self.__vencimientos = []
+        self.estadisticas = None
+
+    def suscribir(self, funcion):
+        """Registra una función que recibe cada PublicacionMEP; la retorna para poder usarla como decorador"""
+        with self.__lock:
+            self.__suscriptores.append(funcion)
+        return funcion
+
+    def desuscribir(self, funcion):
+        with self.__lock:
+            if funcion in self.__suscriptores:
+                self.__suscriptores.remove(funcion)
+
+    def procesar_evento(self, evento):
+        """Aplica un EventoCambio de monitor_bonos"""
+        return self.actualizar(evento.cambios)
+
+    def actualizar(self, cotizaciones):
+        """
+        Aplica cotizaciones nuevas o modificadas (columnas de OpenBYMAdata; con
+        columna 'evento' == 'baja' la cotización se elimina) y publica el resultado
+        Solo se recalculan los pares de las series que aparecen en cotizaciones
+        Retorna las estadísticas (las mismas claves que calcular_promedio_ponderado)
+        """
+        if cotizaciones is None or cotizaciones.empty:
+            return self.estadisticas
+
+        with etapa('incremental', columna=self.columna) as medicion:
+            medicion.filas_entrada = len(cotizaciones)
+            with self.__lock:
+                afectados = self.__aplicar(cotizaciones)
+                for clave in afectados:
+                    self.__recalcular_par(clave)
+                self.__actualizar_vigencia(afectados)
+                self.__compactar()
+                self.estadisticas = self.__estadisticas()
+                suscriptores = list(self.__suscriptores)
+            medicion.filas_salida = len(afectados)
+
+        if afectados:
+            publicacion = PublicacionMEP(datetime.now(), dict(self.estadisticas), sorted({raiz for raiz, _ in afectados}))
+            for funcion in suscriptores:
+                try:
+                    funcion(publicacion)
+                except Exception as e:
+                    print(f"Error en un suscriptor del dólar {self.__prefijo.upper()}: {e}")
+        return self.estadisticas
+
+    def __aplicar(self, cotizaciones):
+        """Actualiza las patas con las cotizaciones y retorna las claves (raiz, settlement) afectadas"""
+        datos = cotizaciones.reindex(columns=COLUMNAS_COTIZACION)
+        partes = clasificar_simbolos(cotizaciones['symbol'])
+        plazos = cotizaciones['settlement'].astype(str).to_numpy() if 'settlement' in cotizaciones.columns else [None] * len(cotizaciones)
+        bajas = (cotizaciones['evento'] == 'baja').to_numpy() if 'evento' in cotizaciones.columns else np.zeros(len(cotizaciones), bool)
+        fechas = pd.to_datetime(cotizaciones['datetime'], errors='coerce') if 'datetime' in cotizaciones.columns else pd.Series(pd.NaT, index=cotizaciones.index)
+        nulas = fechas.isna().to_numpy()
+        fechas = fechas.to_numpy(dtype='datetime64[ns]').view('int64')
+        numeros = {col: pd.to_numeric(datos[col], errors='coerce').to_numpy(dtype=float) for col in COLUMNAS_COTIZACION[1:]}
+        simbolos = datos['symbol'].astype(str).str.upper().to_numpy()
+
+        afectados = set()
+        for i, (raiz, moneda) in enumerate(zip(partes['raiz'], partes['moneda'])):
+            if moneda not in ('pesos', self.__moneda) or not isinstance(raiz, str):
+                continue
+            if self.familia is not None and not self.familia.fullmatch(raiz):
+                continue
+            clave = (raiz, plazos[i])
+            patas = self.__patas.setdefault(clave, {})
+            ultimo = numeros['last'][i]
+            if bajas[i] or not ultimo > 0:
+                # Sin precio la pata no forma par (calcular_tipos_de_cambio descarta last <= 0)
+                if moneda in patas and patas[moneda][0] == simbolos[i]:
+                    del patas[moneda]
+            else:
+                patas[moneda] = (simbolos[i], ultimo, numeros['bid'][i], numeros['ask'][i], numeros['volume'][i],
+                                 numeros['turnover'][i], None if nulas[i] else int(fechas[i]))
+            afectados.add(clave)
+        return afectados
+
+    def __recalcular_par(self, clave):
+        """Rearma un par desde sus patas, quitando antes su aporte a las sumas"""
+        anterior = self.__pares.pop(clave, None)
+        if anterior is not None:
+            self.__descontar(anterior)
+            self.__suma_valores -= anterior.valor
+
+        patas = self.__patas.get(clave, {})
+        if 'pesos' not in patas or self.__moneda not in patas:
+            if not patas:
+                self.__patas.pop(clave, None)
+            return
+
+        self.__version += 1
+        par = _Par(self.__version, patas['pesos'], patas[self.__moneda])
+        self.__pares[clave] = par
+        self.__suma_valores += par.valor
+        self.__indexar(clave, par)
+
+    def __indexar(self, clave, par):
+        entrada = (clave, par.version)
+        heapq.heappush(self.__minimos_valor, (par.valor, *entrada))
+        heapq.heappush(self.__maximos_valor, (-par.valor, *entrada))
+        if not np.isnan(par.volumen):
+            heapq.heappush(self.__maximos_volumen, (-par.volumen, *entrada))
+        if not np.isnan(par.spread):
+            heapq.heappush(self.__maximos_spread, (-par.spread, *entrada))
+        if par.fecha is not None:
+            heapq.heappush(self.__maximos_fecha, (-par.fecha, *entrada))
+
+    def __tope(self, monticulo):
+        """Primer valor vigente de un montículo (descarta las entradas de versiones viejas)"""
+        while monticulo:
+            valor, clave, version = monticulo[0]
+            par = self.__pares.get(clave)
+            if par is not None and par.version == version:
+                return valor
+            heapq.heappop(monticulo)
+        return None
+
+    def __contar(self, par):
+        self.__sumas[par.grupo] += par.aporte
+        self.__contados[par.grupo] += par.aporte[PESO] > 0
+        par.contado = True
+
+    def __descontar(self, par):
+        if par.contado:
+            self.__sumas[par.grupo] -= par.aporte
+            self.__contados[par.grupo] -= par.aporte[PESO] > 0
+            par.contado = False
+
+    def __actualizar_vigencia(self, afectados):
+        """
+        Descuenta los pares que quedaron viejos respecto de la cotización más
+        reciente y cuenta los pares recalculados que están vigentes
+        """
+        maximo = self.__tope(self.__maximos_fecha)
+        ahora = None if maximo is None else -maximo
+        if self.__ahora is not None and (ahora is None or ahora < self.__ahora):
+            # La cotización más reciente retrocedió (se dio de baja): pares ya
+            # descartados pueden volver a estar vigentes
+            self.__ahora = ahora
+            self.__reconstruir()
+            return
+        self.__ahora = ahora
+        limite = None if ahora is None else ahora - self.__max_antiguedad
+
+        if limite is not None:
+            while self.__vencimientos and self.__vencimientos[0][0] < limite:
+                _, clave, version = heapq.heappop(self.__vencimientos)
+                par = self.__pares.get(clave)
+                if par is not None and par.version == version:
+                    self.__descontar(par)
+
+        for clave in afectados:
+            par = self.__pares.get(clave)
+            if par is not None:
+                self.__contar_si_vigente(par, clave, limite)
+
+    def __contar_si_vigente(self, par, clave, limite):
+        if not par.vigente_sin_antiguedad():
+            return
+        if par.fecha is not None:
+            if limite is not None and par.fecha < limite:
+                return
+            heapq.heappush(self.__vencimientos, (par.fecha, clave, par.version))
+        self.__contar(par)
+
+    def __reiniciar_sumas(self):
+        self.__sumas = np.zeros((4, 8))
+        self.__contados = np.zeros(4, dtype=int)
+        self.__suma_valores = 0.0
+
+    def __reconstruir(self):
+        """Rearma sumas y montículos desde la tabla de pares (también corrige el error de redondeo acumulado)"""
+        self.__reiniciar_sumas()
+        self.__maximos_volumen = []
+        self.__maximos_spread = []
+        self.__minimos_valor = []
+        self.__maximos_valor = []
+        self.__maximos_fecha = []
+        self.__vencimientos = []
+        for clave, par in self.__pares.items():
+            par.contado = False
+            self.__suma_valores += par.valor
+            self.__indexar(clave, par)
+        maximo = self.__tope(self.__maximos_fecha)
+        self.__ahora = None if maximo is None else -maximo
+        limite = None if self.__ahora is None else self.__ahora - self.__max_antiguedad
+        for clave, par in self.__pares.items():
+            self.__contar_si_vigente(par, clave, limite)
+
+    def __compactar(self):
+        """Rearma todo cuando las entradas viejas de los montículos superan MAX_ENTRADAS veces los pares"""
+        entradas = len(self.__minimos_valor) + len(self.__vencimientos)
+        if entradas > MAX_ENTRADAS * (len(self.__pares) + 16):
+            self.__reconstruir()
+
+    def __estadisticas(self):
+        if not self.__pares:
+            return None
+
+        # Factor de cada grupo según los máximos del panel (como los fillna de calcular_liquidez)
+        volumen = self.__tope(self.__maximos_volumen)
+        volumen = 1.0 if volumen is None else -volumen
+        spread = self.__tope(self.__maximos_spread)
+        spread = 1.0 if spread is None else -spread
+        factores = np.array([1.0, volumen, _dividir(1.0, spread), _dividir(volumen, spread)])
+        activos = factores > 0
+        sumas = (self.__sumas[activos] * factores[activos, None]).sum(axis=0)
+
+        def promedio(peso, suma, infinita):
+            if sumas[infinita] > 0.5:
+                return np.inf
+            return _dividir(sumas[suma], sumas[peso]) if sumas[peso] > 0 else np.nan
+
+        promedio_simple = self.__suma_valores / len(self.__pares)
+        promedio_ponderado = promedio(PESO, VALOR, COMPRA_INFINITA)
+        utilizados = int(self.__contados[activos].sum())
+        return {
+            'promedio_simple': promedio_simple,
+            'promedio_ponderado': promedio_simple if np.isnan(promedio_ponderado) else promedio_ponderado,
+            'compra': promedio(PESO_COMPRA, COMPRA, COMPRA_INFINITA),
+            'venta': promedio(PESO_VENTA, VENTA, VENTA_INFINITA),
+            'min': self.__tope(self.__minimos_valor),
+            'max': -self.__tope(self.__maximos_valor),
+            'pares_utilizados': utilizados,
+            'pares_descartados': len(self.__pares) - utilizados,
+        }
+
+    def tabla(self):
+        """Tabla de pares actual (recorre todos los pares: no usar en cada actualización)"""
+        nombre = PATAS[self.__moneda]
+        with self.__lock:
+            filas = [{
+                'raiz': raiz, 'settlement': plazo,
+                'bono_pesos': par.bono_pesos, 'precio_pesos': par.precio_pesos,
+                f'bono_{nombre}': par.bono_pata, f'precio_{nombre}': par.precio_pata,
+                self.columna: par.valor,
+                f'{self.__prefijo}_compra': par.compra, f'{self.__prefijo}_venta': par.venta,
+                f'spread_{self.__prefijo}': par.spread, f'volumen_{self.__prefijo}': par.volumen,
+                'fecha': pd.NaT if par.fecha is None else pd.Timestamp(par.fecha),
+                'vigente': par.contado,
+            } for (raiz, plazo), par in self.__pares.items()]
+        tabla = pd.DataFrame(filas)
+        return tabla.sort_values('raiz', kind='stable').reset_index(drop=True) if not tabla.empty else tabla
+
+
+def main():
+    """Monitorea el panel de bonos públicos y publica el dólar MEP con cada cambio"""
+    from monitor_bonos import sondear
+
+    parser = argparse.ArgumentParser(description="Dólar MEP / CCL incremental sobre el monitor de BYMA")
+    parser.add_argument('--intervalo', type=float, default=30, help="segundos entre consultas")
+    parser.add_argument('--iteraciones', type=int, default=None, help="cantidad de consultas (por defecto sin límite)")
+    parser.add_argument('--columna', default='dolar_mep', choices=['dolar_mep', 'dolar_ccl'])
+    parser.add_argument('--familia', default=None, help="expresión de la raíz de las series (por defecto todas)")
+    parser.add_argument('--reportes', default=None, help="carpeta donde refrescar los reportes con cada cambio")
+    parser.add_argument('--pausa-tabla', type=float, default=PAUSA_TABLA_REPORTES,
+                        help="segundos mínimos entre regeneraciones de la tabla de pares de los reportes")
+    args = parser.parse_args()
+
+    calculadora = CalculadoraMEP(args.columna, args.familia)
+    reporte = Reporte(args.reportes, columna=args.columna) if args.reportes else None
+    # El resumen se refresca con cada publicación; la tabla (que recorre todos los pares) como mucho cada --pausa-tabla
+    ultima_tabla = [None]
+
+    def refrescar_reporte(stats, fecha, forzar_tabla=False):
+        ahora = time.monotonic()
+        pares = None
+        if forzar_tabla or ultima_tabla[0] is None or ahora - ultima_tabla[0] >= args.pausa_tabla:
+            pares = calculadora.tabla()
+            ultima_tabla[0] = ahora
+        reporte.actualizar(resumen=stats, pares=pares, fecha_calculo=fecha)
+        reporte.escribir()
+
+    @calculadora.suscribir
+    def mostrar(publicacion):
+        stats = publicacion.estadisticas
+        if stats:
+            print(f"[{publicacion.fecha:%H:%M:%S}] {args.columna}: {stats['promedio_ponderado']:.2f} "
+                  f"(compra {stats['compra']:.2f} / venta {stats['venta']:.2f}, {stats['pares_utilizados']} pares; "
+                  f"cambiaron {', '.join(publicacion.pares[:10])}{'...' if len(publicacion.pares) > 10 else ''})")
+        if reporte is not None and stats:
+            refrescar_reporte(stats, publicacion.fecha)
+
+    try:
+        for evento in sondear(endpoints=['public-bonds'], intervalo=args.intervalo, max_iteraciones=args.iteraciones):
+            calculadora.procesar_evento(evento)
+    except KeyboardInterrupt:
+        print("\nCálculo detenido")
+    finally:
+        # Dejar la tabla de los reportes al día con el último estado
+        if reporte is not None and ultima_tabla[0] is not None:
+            refrescar_reporte(None, None, forzar_tabla=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Instrumentación de las etapas del pipeline
+
+Cada etapa (consulta HTTP, decodificación, mapeo de columnas, conversión de
+tipos, armado de pares, agregación, guardado) se mide con el context manager
+etapa(), que registra su duración, filas de entrada y salida y bytes:
+
+    with etapa('http', endpoint='lebacs') as medicion:
+        response = ...
+        medicion.bytes = len(response.content)
+
+o, para funciones que reciben y retornan DataFrames, con el decorador medir().
+
+Las mediciones se acumulan en memoria (ver resumen y texto_prometheus) y se
+exportan según las variables de entorno:
+
+    BYMA_METRICAS=json          una línea JSON por etapa ejecutada
+    BYMA_METRICAS=prometheus    texto en formato Prometheus al terminar el proceso
+    BYMA_METRICAS_ARCHIVO=<ruta> destino de la salida (por defecto stderr)
+    BYMA_PERFIL=cprofile        perfila las etapas con cProfile y guarda las
+                                estadísticas en BYMA_PERFIL_ARCHIVO (byma.prof)
+    BYMA_PERFIL=tracemalloc     registra el pico de memoria de cada etapa
+
+Dentro de un event loop (byma_async) las etapas se miden igual, pero no se
+perfilan: cProfile y el pico de tracemalloc son de todo el hilo y, a través
+de un await, mezclarían las otras corutinas. cProfile además solo se activa
+en el hilo principal: desde Python 3.12 no admite dos perfiles activos a la
+vez, y las etapas de los hilos de get_fixed_income_many correrían en paralelo.
+"""
+import asyncio
+import atexit
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+FORMATO = os.environ.get('BYMA_METRICAS', '').lower()
+ARCHIVO = os.environ.get('BYMA_METRICAS_ARCHIVO')
+PERFIL = os.environ.get('BYMA_PERFIL', '').lower()
+ARCHIVO_PERFIL = os.environ.get('BYMA_PERFIL_ARCHIVO', 'byma.prof')
+
+# Prefijo de las métricas exportadas en formato Prometheus
+PREFIJO = 'byma_etapa'
+
+
+class Medicion:
+    """Datos de una ejecución de una etapa; el código medido completa filas y bytes"""
+
+    __slots__ = ('etapa', 'etiquetas', 'segundos', 'filas_entrada', 'filas_salida', 'bytes', 'memoria_pico', 'error')
+
+    def __init__(self, etapa, etiquetas):
+        self.etapa = etapa
+        self.etiquetas = etiquetas
+        self.segundos = 0.0
+        self.filas_entrada = None
+        self.filas_salida = None
+        self.bytes = None
+        self.memoria_pico = None
+        self.error = None
+
+    def como_dict(self):
+        datos = {'etapa': self.etapa, **self.etiquetas, 'segundos': round(self.segundos, 6)}
+        for campo in ('filas_entrada', 'filas_salida', 'bytes', 'memoria_pico', 'error'):
+            valor = getattr(self, campo)
+            if valor is not None:
+                datos[campo] = valor
+        return datos
+
+
+class Registro:
+    """
+    Acumula las mediciones por etapa y etiquetas
+    formato: 'json' emite cada medición al terminar; 'prometheus' o '' solo acumula
+    """
+
+    def __init__(self, formato=FORMATO, archivo=ARCHIVO, perfil=PERFIL):
+        self.formato = formato
+        self.archivo = archivo
+        self.perfil = perfil
+        self.__totales = {}
+        self.__perfiles = []
+        # Etapas abiertas en el hilo o la corutina actual (cada tarea de asyncio tiene su copia)
+        self.__profundidad = contextvars.ContextVar(f'profundidad_{id(self)}', default=0)
+        self.__lock = threading.Lock()
+        if perfil == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def etapa(self, nombre, **etiquetas):
+        medicion = Medicion(nombre, {clave: str(valor) for clave, valor in etiquetas.items()})
+        # Solo se perfila la etapa más externa de cada hilo (cProfile no admite anidar)
+        profundidad = self.__profundidad.get()
+        self.__profundidad.set(profundidad + 1)
+        perfilar = self.perfil and not _en_event_loop()
+        perfil = None
+        if (perfilar and self.perfil == 'cprofile' and profundidad == 0
+                and threading.current_thread() is threading.main_thread()):
+            perfil = cProfile.Profile()
+            perfil.enable()
+        if perfilar and self.perfil == 'tracemalloc':
+            # Con etapas en paralelo el pico incluye la memoria de las otras
+            tracemalloc.reset_peak()
+
+        inicio = time.perf_counter()
+        try:
+            yield medicion
+        except BaseException as e:
+            medicion.error = type(e).__name__
+            raise
+        finally:
+            medicion.segundos = time.perf_counter() - inicio
+            if perfil is not None:
+                perfil.disable()
+            if perfilar and self.perfil == 'tracemalloc':
+                medicion.memoria_pico = tracemalloc.get_traced_memory()[1]
+            self.__profundidad.set(profundidad)
+            self.registrar(medicion, perfil)
+
+    def registrar(self, medicion, perfil=None):
+        clave = (medicion.etapa, tuple(sorted(medicion.etiquetas.items())))
+        with self.__lock:
+            total = self.__totales.setdefault(clave, {
+                'llamadas': 0, 'errores': 0, 'segundos': 0.0, 'segundos_max': 0.0,
+                'filas_entrada': 0, 'filas_salida': 0, 'bytes': 0, 'memoria_pico': 0,
+            })
+            total['llamadas'] += 1
+            total['errores'] += medicion.error is not None
+            total['segundos'] += medicion.segundos
+            total['segundos_max'] = max(total['segundos_max'], medicion.segundos)
+            for campo in ('filas_entrada', 'filas_salida', 'bytes'):
+                total[campo] += getattr(medicion, campo) or 0
+            total['memoria_pico'] = max(total['memoria_pico'], medicion.memoria_pico or 0)
+            if perfil is not None:
+                self.__perfiles.append(perfil)
+            if self.formato == 'json':
+                self.__escribir(json.dumps({'ts': round(time.time(), 3), **medicion.como_dict()}) + '\n')
+
+    def __escribir(self, texto, modo='a'):
+        if self.archivo:
+            with open(self.archivo, modo, encoding='utf-8') as f:
+                f.write(texto)
+        else:
+            sys.stderr.write(texto)
+
+    def resumen(self):
+        """Lista de totales por etapa y etiquetas"""
+        with self.__lock:
+            return [{'etapa': etapa, **dict(etiquetas), **total} for (etapa, etiquetas), total in self.__totales.items()]
+
+    def texto_prometheus(self):
+        """Totales en el formato de texto de Prometheus"""
+        series = {
+            'llamadas': ('counter', 'Ejecuciones de la etapa'),
+            'errores': ('counter', 'Ejecuciones de la etapa que terminaron con una excepción'),
+            'segundos': ('counter', 'Segundos acumulados en la etapa'),
+            'segundos_max': ('gauge', 'Duración máxima de una ejecución de la etapa'),
+            'filas_entrada': ('counter', 'Filas recibidas por la etapa'),
+            'filas_salida': ('counter', 'Filas producidas por la etapa'),
+            'bytes': ('counter', 'Bytes leídos o escritos por la etapa'),
+            'memoria_pico': ('gauge', 'Pico de memoria de la etapa en bytes (BYMA_PERFIL=tracemalloc)'),
+        }
+        with self.__lock:
+            totales = list(self.__totales.items())
+        lineas = []
+        for campo, (tipo, ayuda) in series.items():
+            nombre = f"{PREFIJO}_{campo}" + ('_total' if tipo == 'counter' else '')
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for (etapa, etiquetas), total in totales:
+                etiquetas = ','.join(f'{clave}="{valor}"' for clave, valor in (('etapa', etapa),) + etiquetas)
+                lineas.append(f"{nombre}{{{etiquetas}}} {total[campo]}")
+        return '\n'.join(lineas) + '\n'
+
+    def volcar(self):
+        """Exporta lo acumulado: el texto Prometheus y el perfil de cProfile, si están configurados"""
+        if self.formato == 'prometheus':
+            self.__escribir(self.texto_prometheus(), modo='w')
+        with self.__lock:
+            perfiles = list(self.__perfiles)
+        if perfiles:
+            estadisticas = pstats.Stats(perfiles[0])
+            for perfil in perfiles[1:]:
+                estadisticas.add(perfil)
+            estadisticas.dump_stats(ARCHIVO_PERFIL)
+            print(f"Perfil de las etapas guardado en {ARCHIVO_PERFIL}", file=sys.stderr)
+
+
+def _en_event_loop():
+    """True si se llama desde una corutina (hay un event loop corriendo en el hilo)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# Registro compartido por todos los módulos del proceso
+registro = Registro()
+atexit.register(registro.volcar)
+
+
+def etapa(nombre, **etiquetas):
+    """Mide una etapa en el registro compartido (ver Registro.etapa)"""
+    return registro.etapa(nombre, **etiquetas)
+
+
+def _filas(valor):
+    """Filas de un DataFrame o de una tupla de DataFrames (None si no aplica)"""
+    if isinstance(valor, tuple):
+        filas = [_filas(v) for v in valor]
+        filas = [f for f in filas if f is not None]
+        return sum(filas) if filas else None
+    return len(valor) if hasattr(valor, 'columns') else None
+
+
+def medir(nombre, **etiquetas):
+    """
+    Decorador que mide cada llamada a una función como una etapa
+    Las filas de entrada son las del primer argumento y las de salida las del
+    resultado, cuando son DataFrames
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            with registro.etapa(nombre, **etiquetas) as medicion:
+                medicion.filas_entrada = _filas(args[0]) if args else None
+                resultado = funcion(*args, **kwargs)
+                medicion.filas_salida = _filas(resultado)
+                return resultado
+        return medida
+    return decorador
@@ -0,0 +1,124 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+from byma_bonos import ENDPOINTS_RENTA_FIJA, get_client
+
+# Clave que identifica una cotización dentro de un panel
+CLAVES = ['symbol', 'settlement']
+
+# Evento emitido por el monitor: solo las filas que cambiaron en un panel
+EventoCambio = namedtuple('EventoCambio', ['fecha', 'endpoint', 'cambios'])
+
+
+def _sin_categorias(df, columnas=None):
+    """Pasa las columnas categóricas a object: las categorías cambian entre snapshots"""
+    categoricas = df.select_dtypes('category').columns
+    if columnas is not None:
+        categoricas = categoricas.intersection(columnas)
+    if len(categoricas) == 0:
+        return df
+    return df.astype({col: object for col in categoricas})
+
+
+def diferencias(anterior, actual, claves=CLAVES):
+    """
+    Compara dos snapshots de un panel por symbol + settlement
+    Retorna las filas nuevas, modificadas o eliminadas con una columna 'evento'
+    ('alta', 'modificacion' o 'baja'); las eliminadas traen los valores anteriores
+    """
+    if actual is None:
+        actual = pd.DataFrame(columns=claves)
+    # Las claves se comparan como object: con categorías distintas en cada
+    # snapshot los índices no se podrían alinear
+    actual = _sin_categorias(actual.drop_duplicates(claves, keep='last'), claves).set_index(claves)
+    if anterior is None or anterior.empty:
+        return actual.assign(evento='alta').reset_index()
+    anterior = _sin_categorias(anterior.drop_duplicates(claves, keep='last'), claves).set_index(claves)
+
+    altas = actual.index.difference(anterior.index)
+    bajas = anterior.index.difference(actual.index)
+    comunes = actual.index.intersection(anterior.index)
+
+    # Comparar todas las columnas de las filas comunes de una sola vez
+    columnas = actual.columns.intersection(anterior.columns)
+    nuevos = _sin_categorias(actual.loc[comunes, columnas])
+    viejos = _sin_categorias(anterior.loc[comunes, columnas])
+    distintos = (nuevos != viejos) & ~(nuevos.isna() & viejos.isna())
+    modificadas = comunes[distintos.any(axis=1).to_numpy()]
+
+    partes = [
+        actual.loc[altas].assign(evento='alta'),
+        actual.loc[modificadas].assign(evento='modificacion'),
+        anterior.loc[bajas].assign(evento='baja'),
+    ]
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return actual.iloc[:0].assign(evento=pd.Series(dtype=object)).reset_index()
+    return pd.concat(partes).reset_index()
+
+
+def sondear(byma=None, endpoints=None, intervalo=30, max_iteraciones=None):
+    """
+    Consulta los paneles cada 'intervalo' segundos y genera un EventoCambio
+    por panel con las filas que cambiaron respecto del snapshot anterior
+    La primera consulta emite todo el panel como altas
+    """
+    if byma is None:
+        byma = get_client()
+    if endpoints is None:
+        endpoints = list(ENDPOINTS_RENTA_FIJA)
+
+    anteriores = {}
+    iteracion = 0
+    while max_iteraciones is None or iteracion < max_iteraciones:
+        inicio = time.monotonic()
+        fecha = datetime.now()
+        paneles = byma.get_fixed_income_many(endpoints)
+
+        for endpoint, df in paneles.items():
+            # Si un panel falla se conserva el snapshot anterior
+            if df is None:
+                continue
+            cambios = diferencias(anteriores.get(endpoint), df)
+            anteriores[endpoint] = df
+            if not cambios.empty:
+                yield EventoCambio(fecha, endpoint, cambios)
+
+        iteracion += 1
+        if max_iteraciones is None or iteracion < max_iteraciones:
+            time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+
+
+def main():
+    """Monitorea los paneles de BYMA y guarda solo los cambios de cada consulta"""
+    parser = argparse.ArgumentParser(description="Monitor de cotizaciones de renta fija de BYMA")
+    parser.add_argument('--intervalo', type=float, default=30, help="segundos entre consultas")
+    parser.add_argument('--iteraciones', type=int, default=None, help="cantidad de consultas (por defecto sin límite)")
+    parser.add_argument('--endpoints', nargs='+', default=list(ENDPOINTS_RENTA_FIJA), choices=list(ENDPOINTS_RENTA_FIJA))
+    parser.add_argument('--output-dir', default="datos_bonos")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    print(f"Monitoreando {', '.join(args.endpoints)} cada {args.intervalo:g} segundos...")
+    try:
+        for evento in sondear(endpoints=args.endpoints, intervalo=args.intervalo, max_iteraciones=args.iteraciones):
+            conteo = evento.cambios['evento'].value_counts().to_dict()
+            print(f"[{evento.fecha:%H:%M:%S}] {evento.endpoint}: {conteo}")
+
+            # Agregar los cambios al archivo del día
+            archivo = os.path.join(args.output_dir, f"cambios_{evento.fecha:%Y%m%d}.csv")
+            cambios = evento.cambios.assign(endpoint=evento.endpoint, fecha_snapshot=evento.fecha)
+            cambios.to_csv(archivo, mode='a', header=not os.path.exists(archivo), index=False)
+    except KeyboardInterrupt:
+        print("\nMonitor detenido")
+
+
+if __name__ == "__main__":
+    main()
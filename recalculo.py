@@ -0,0 +1,190 @@
+"""
+Recálculo en lote del dólar MEP sobre los snapshots guardados
+
+Busca todos los todos_bonos_YYYYMMDD.csv, reparte los días en tandas entre
+varios procesos y corre sobre cada uno filtrar_bonos_para_mep ->
+calcular_dolar_mep -> calcular_promedio_ponderado. Los resultados se
+consolidan en dos archivos del directorio de salida:
+
+    pares.csv     los pares de cada día (columna fecha)
+    resumen.csv   las estadísticas de cada día
+
+Cada tanda terminada se agrega enseguida a los archivos consolidados, así
+que si el proceso se interrumpe la próxima corrida retoma desde los días
+que faltan (usar --reiniciar para recalcular todo).
+
+Uso:
+    python recalculo.py
+    python recalculo.py --directorio datos_bonos --salida resultados_mep/recalculo --procesos 8 --tanda 5
+"""
+import argparse
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pandas as pd
+
+from byma_bonos import aplicar_esquema
+from dolar_mep import calcular_dolar_mep, calcular_liquidez, calcular_promedio_ponderado, filtrar_bonos_para_mep
+
+PATRON_SNAPSHOT = r'todos_bonos_(\d{8})\.csv$'
+
+# Columnas sin las que un snapshot se considera corrupto
+COLUMNAS_SNAPSHOT = ['symbol', 'last']
+
+
+def buscar_snapshots(directorio="datos_bonos"):
+    """Lista ordenada de (fecha 'YYYYMMDD', archivo) de los snapshots guardados"""
+    snapshots = []
+    for archivo in glob.glob(os.path.join(directorio, "**", "todos_bonos_*.csv"), recursive=True):
+        coincidencia = re.search(PATRON_SNAPSHOT, archivo)
+        if coincidencia:
+            snapshots.append((coincidencia.group(1), archivo))
+    return sorted(snapshots)
+
+
+def procesar_snapshot(fecha, archivo, familia=r'AL\d+'):
+    """
+    Corre el pipeline del MEP sobre un snapshot
+    Retorna (pares, resumen); pares es None si el día no tiene pares
+    Lanza ValueError si el snapshot está vacío o no tiene las columnas del panel
+    """
+    bonos = pd.read_csv(archivo)
+    faltantes = [col for col in COLUMNAS_SNAPSHOT if col not in bonos.columns]
+    if faltantes:
+        raise ValueError(f"snapshot corrupto, faltan las columnas {', '.join(faltantes)}")
+    if bonos['symbol'].isna().all():
+        raise ValueError("snapshot sin símbolos")
+
+    # Las funciones del pipeline imprimen mensajes de avance que no interesan acá
+    with redirect_stdout(StringIO()):
+        bonos = aplicar_esquema(bonos)
+        bonos_pesos, bonos_dolares = filtrar_bonos_para_mep(bonos, familia)
+        pares = calcular_dolar_mep(bonos_pesos, bonos_dolares)
+        if pares is not None:
+            pares = calcular_liquidez(pares)
+        stats = calcular_promedio_ponderado(pares) or {}
+
+    resumen = {'fecha': fecha, 'archivo': archivo, 'simbolos': len(bonos), 'pares': 0 if pares is None else len(pares)}
+    resumen.update(stats)
+    if pares is not None:
+        pares.insert(0, 'fecha', fecha)
+    return pares, resumen
+
+
+def procesar_tanda(tanda, familia=r'AL\d+'):
+    """
+    Procesa una tanda de snapshots en un proceso del pool
+    Un snapshot que falla no corta la tanda: se informa su error y se reintenta en la próxima corrida
+    """
+    resultados = []
+    for fecha, archivo in tanda:
+        try:
+            resultados.append((fecha, *procesar_snapshot(fecha, archivo, familia), None))
+        except Exception as e:
+            resultados.append((fecha, None, None, f"{type(e).__name__}: {e}"))
+    return resultados
+
+
+def fechas_procesadas(salida):
+    """
+    Días ya consolidados en resumen.csv
+    Descarta de pares.csv los días que quedaron a medio escribir en una corrida interrumpida
+    """
+    archivo_resumen = os.path.join(salida, "resumen.csv")
+    if not os.path.exists(archivo_resumen):
+        return set()
+    hechas = set(pd.read_csv(archivo_resumen, usecols=['fecha'], dtype={'fecha': str})['fecha'])
+
+    archivo_pares = os.path.join(salida, "pares.csv")
+    if os.path.exists(archivo_pares):
+        pares = pd.read_csv(archivo_pares, dtype={'fecha': str, 'numero': str})
+        completos = pares['fecha'].isin(hechas)
+        if not completos.all():
+            pares[completos].to_csv(archivo_pares, index=False)
+    return hechas
+
+
+def _agregar(df, archivo):
+    df.to_csv(archivo, mode='a', header=not os.path.exists(archivo), index=False)
+
+
+def recalcular(directorio="datos_bonos", salida="resultados_mep/recalculo", procesos=None, tanda=5,
+               familia=r'AL\d+', reiniciar=False):
+    """
+    Recalcula todos los snapshots pendientes en paralelo y consolida los resultados
+    Retorna la cantidad de días procesados en esta corrida
+    """
+    os.makedirs(salida, exist_ok=True)
+    if reiniciar:
+        for nombre in ("pares.csv", "resumen.csv"):
+            if os.path.exists(os.path.join(salida, nombre)):
+                os.remove(os.path.join(salida, nombre))
+
+    snapshots = buscar_snapshots(directorio)
+    hechas = fechas_procesadas(salida)
+    pendientes = [(fecha, archivo) for fecha, archivo in snapshots if fecha not in hechas]
+    print(f"Snapshots encontrados: {len(snapshots)} ({len(hechas)} ya procesados, {len(pendientes)} pendientes)")
+    if not pendientes:
+        return 0
+
+    tandas = [pendientes[i:i + tanda] for i in range(0, len(pendientes), tanda)]
+    procesos = procesos or os.cpu_count() or 1
+    inicio = time.monotonic()
+    procesados = 0
+    errores = 0
+
+    with ProcessPoolExecutor(max_workers=min(procesos, len(tandas))) as executor:
+        futuros = [executor.submit(procesar_tanda, t, familia) for t in tandas]
+        for futuro in as_completed(futuros):
+            pares = []
+            resumenes = []
+            for fecha, df, resumen, error in futuro.result():
+                if error is not None:
+                    errores += 1
+                    print(f"Error en el snapshot {fecha}: {error}")
+                    continue
+                if df is not None:
+                    pares.append(df)
+                resumenes.append(resumen)
+
+            # Primero los pares y después el resumen, que marca el día como terminado
+            if pares:
+                _agregar(pd.concat(pares, ignore_index=True), os.path.join(salida, "pares.csv"))
+            if resumenes:
+                _agregar(pd.DataFrame(resumenes), os.path.join(salida, "resumen.csv"))
+
+            procesados += len(resumenes)
+            hechos = procesados + errores
+            transcurrido = time.monotonic() - inicio
+            restante = transcurrido / hechos * (len(pendientes) - hechos)
+            print(f"[{hechos}/{len(pendientes)}] {hechos / transcurrido:.1f} días/s, faltan ~{restante:.0f} s")
+
+    print(f"Recálculo terminado en {time.monotonic() - inicio:.1f} s: {procesados} días, {errores} con errores")
+    return procesados
+
+
+def main():
+    """Recalcula el MEP de todos los snapshots pendientes"""
+    parser = argparse.ArgumentParser(description="Recálculo en lote del dólar MEP sobre los snapshots guardados")
+    parser.add_argument('--directorio', default="datos_bonos", help="carpeta con los todos_bonos_*.csv")
+    parser.add_argument('--salida', default=os.path.join("resultados_mep", "recalculo"))
+    parser.add_argument('--procesos', type=int, default=None, help="procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument('--tanda', type=int, default=5, help="días por tarea")
+    parser.add_argument('--familia', default=r'AL\d+', help="expresión de la raíz de las series ('todas' para no filtrar)")
+    parser.add_argument('--reiniciar', action='store_true', help="descartar los resultados anteriores")
+    args = parser.parse_args()
+
+    try:
+        recalcular(args.directorio, args.salida, args.procesos, args.tanda,
+                   None if args.familia == 'todas' else args.familia, args.reiniciar)
+    except KeyboardInterrupt:
+        print("\nRecálculo interrumpido: la próxima corrida retoma desde los días pendientes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Datos de referencia de los instrumentos, indexados por símbolo
+
+Raíz de la serie, pata de moneda, tipo, grupo, vencimiento y (opcionalmente)
+el cronograma de pagos de cada símbolo se calculan una sola vez y quedan
+guardados en disco. Los paneles nuevos solo agregan los símbolos que no se
+conocían o cuyos datos vencieron (actualización perezosa), y las consultas
+usan índices precalculados (raíz -> patas, tipo -> símbolos) en lugar de
+volver a parsear los símbolos con expresiones regulares en cada corrida.
+
+La raíz y la moneda guardadas dependen de PATRON_SIMBOLO y RAICES_EQUIVALENTES:
+la tabla guarda la versión (VERSION_PATRON) con que se calcularon y al cargarla
+se recalculan si cambió.
+clasificar() resuelve cada símbolo con el índice símbolo -> (raíz, moneda) de
+la tabla; solo los desconocidos se parsean, y quedan en memoria (la tabla en
+disco solo cambia con actualizar() y cargar_flujos()).
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Raíz de la serie y sufijo de la pata de moneda
+# Ejemplo: AL30 / AL30D / AL30C, o en ONs YCA6O / YCA6D / YCA6C
+PATRON_SIMBOLO = r'^(?P<raiz>[A-Z0-9]+?)(?P<sufijo>[ODC]?)$'
+MONEDAS = {'': 'pesos', 'O': 'pesos', 'D': 'mep', 'C': 'cable'}
+
+# Series cuya pata en pesos no comparte la raíz con las patas en dólares
+# BOPREAL: BPOA7 / BPA7D / BPA7C (series A a D) y BPJ25 / BPJ5D, BPY26 / BPY6D
+RAICES_EQUIVALENTES = {
+    r'^BPO([A-D]\d)$': r'BP\1',
+    r'^BP([A-Z])2(\d)$': r'BP\1\2',
+}
+
+# Versión de la clasificación guardada en la tabla: cambia con el patrón o las equivalencias
+VERSION_PATRON = ' '.join([PATRON_SIMBOLO] + [f'{a}={b}' for a, b in RAICES_EQUIVALENTES.items()])
+
+# Directorio de la referencia (junto al cache del diccionario de BYMA)
+DIRECTORIO_REFERENCIA = os.environ.get('BYMA_REFERENCIA', os.path.join(
+    os.environ.get('BYMA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'byma')), 'referencia'))
+
+# Los datos de un símbolo se vuelven a tomar del panel pasado este tiempo
+REFERENCIA_TTL = 7 * 24 * 60 * 60
+
+COLUMNAS_REFERENCIA = ['raiz', 'moneda', 'tipo', 'grupo', 'vencimiento', 'actualizado', 'patron']
+COLUMNAS_FLUJOS = ['symbol', 'fecha', 'monto']
+
+_referencia = None
+_referencia_lock = threading.Lock()
+
+
+def separar_simbolos(simbolos):
+    """
+    Separa cada símbolo en la raíz de la serie y su pata de moneda con PATRON_SIMBOLO
+    Ejemplo: 'AL30' -> ('AL30', 'pesos'), 'AL30D' -> ('AL30', 'mep'), 'AL30C' -> ('AL30', 'cable')
+    Las raíces de RAICES_EQUIVALENTES se llevan a la de sus patas en dólares ('BPOA7' -> 'BPA7')
+    """
+    partes = pd.Series(simbolos).astype(str).str.upper().str.extract(PATRON_SIMBOLO)
+    partes['raiz'] = partes['raiz'].replace(RAICES_EQUIVALENTES, regex=True)
+    partes['moneda'] = partes['sufijo'].map(MONEDAS)
+    return partes[['raiz', 'moneda']]
+
+
+class Referencia:
+    """
+    Tabla de referencia por símbolo con índices raíz -> patas y tipo -> símbolos
+    directorio: donde se guarda (None para mantenerla solo en memoria)
+    """
+
+    def __init__(self, directorio=DIRECTORIO_REFERENCIA, ttl=REFERENCIA_TTL):
+        self.directorio = directorio
+        self.ttl = ttl
+        self.__lock = threading.RLock()
+        self.__tabla = None
+        self.__flujos = None
+        self.__partes = None
+        self.__por_raiz = None
+        self.__por_tipo = None
+        # Símbolos que no están en la tabla, ya parseados con PATRON_SIMBOLO
+        self.__parseados = {}
+        self.__modificada = False
+
+    def __archivo(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def __cargar(self):
+        """Lee la referencia guardada la primera vez que se usa"""
+        if self.__tabla is not None:
+            return
+        tabla = pd.DataFrame(columns=COLUMNAS_REFERENCIA, index=pd.Index([], name='symbol', dtype=object))
+        flujos = pd.DataFrame(columns=COLUMNAS_FLUJOS)
+        if self.directorio is not None:
+            try:
+                tabla = pd.read_parquet(self.__archivo('instrumentos.parquet'))
+                if os.path.exists(self.__archivo('flujos.parquet')):
+                    flujos = pd.read_parquet(self.__archivo('flujos.parquet'))
+            except (OSError, ImportError, ValueError):
+                pass
+        vigentes = tabla['patron'] == VERSION_PATRON if 'patron' in tabla.columns else pd.Series(False, index=tabla.index)
+        if not vigentes.all():
+            # Raíz y moneda calculadas con otro patrón: se recalculan con el actual
+            tabla = tabla.reindex(columns=COLUMNAS_REFERENCIA)
+            partes = separar_simbolos(tabla.index[~vigentes.to_numpy()].to_numpy())
+            tabla.loc[~vigentes.to_numpy(), ['raiz', 'moneda']] = partes.to_numpy()
+            tabla['patron'] = VERSION_PATRON
+            self.__modificada = True
+        self.__tabla = tabla
+        self.__flujos = flujos
+
+    def guardar(self):
+        """Guarda la referencia en disco si cambió desde la última vez"""
+        with self.__lock:
+            if self.directorio is None or not self.__modificada:
+                return False
+            try:
+                os.makedirs(self.directorio, exist_ok=True)
+                self.__tabla.to_parquet(self.__archivo('instrumentos.parquet'))
+                self.__flujos.to_parquet(self.__archivo('flujos.parquet'), index=False)
+            except (OSError, ImportError) as e:
+                print(f"No se pudo guardar la referencia de instrumentos: {e}")
+                return False
+            self.__modificada = False
+            return True
+
+    def __agregar(self, filas):
+        """Agrega o reemplaza filas de la tabla e invalida los índices"""
+        filas = filas.reindex(columns=COLUMNAS_REFERENCIA).assign(patron=VERSION_PATRON)
+        tabla = self.__tabla
+        if not tabla.empty:
+            tabla = tabla[~tabla.index.isin(filas.index)]
+        self.__tabla = pd.concat([tabla, filas]) if not tabla.empty else filas
+        self.__por_raiz = None
+        self.__por_tipo = None
+        self.__modificada = True
+
+    def actualizar(self, panel, tipo=None):
+        """
+        Incorpora los símbolos de un panel de BYMA que no estaban o cuyos datos
+        tienen más de ttl segundos; el resto no se vuelve a procesar
+        tipo es la descripción del panel (si el panel trae columna 'tipo', se usa esa)
+        Retorna la cantidad de símbolos agregados o actualizados
+        """
+        if panel is None or panel.empty:
+            return 0
+        simbolos = panel['symbol'].astype(str).str.upper()
+        with self.__lock:
+            self.__cargar()
+            conocidos = self.__tabla['actualizado'].reindex(simbolos.to_numpy()).to_numpy(dtype=float)
+            with np.errstate(invalid='ignore'):
+                nuevos = ~(time.time() - conocidos < self.ttl)
+            if not nuevos.any():
+                return 0
+
+            datos = panel[nuevos]
+            filas = separar_simbolos(simbolos[nuevos].to_numpy())
+            filas.index = pd.Index(simbolos[nuevos].to_numpy(), name='symbol')
+            tipos = datos['tipo'] if 'tipo' in datos.columns else pd.Series(tipo, index=datos.index)
+            filas['tipo'] = tipos.astype(object).to_numpy()
+            filas['grupo'] = datos['group'].astype(object).to_numpy() if 'group' in datos.columns else None
+            filas['vencimiento'] = pd.to_datetime(datos['expiration'], errors='coerce').to_numpy() if 'expiration' in datos.columns else pd.NaT
+            filas['actualizado'] = time.time()
+            filas = filas[~filas.index.duplicated(keep='last')]
+            self.__agregar(filas)
+            return len(filas)
+
+    def clasificar(self, simbolos):
+        """
+        Raíz y pata de moneda de cada símbolo, con el mismo índice que simbolos
+        Cada símbolo distinto se busca una vez en el índice de la tabla; los
+        desconocidos se parsean con PATRON_SIMBOLO y se recuerdan en memoria
+        """
+        simbolos = pd.Series(simbolos)
+        codigos, unicos = pd.factorize(simbolos)
+        unicos = [str(simbolo).upper() for simbolo in unicos]
+        with self.__lock:
+            self.__cargar()
+            self.__indices()
+            faltantes = [s for s in dict.fromkeys(unicos) if s not in self.__partes and s not in self.__parseados]
+            if faltantes:
+                filas = separar_simbolos(faltantes)
+                self.__parseados.update(zip(faltantes, zip(filas['raiz'], filas['moneda'])))
+            partes = [self.__partes.get(s) or self.__parseados[s] for s in unicos]
+
+        # Los símbolos nulos (código -1) quedan sin raíz ni moneda
+        valores = np.array(partes + [(np.nan, np.nan)], dtype=object).reshape(-1, 2)[codigos]
+        return pd.DataFrame(valores, columns=['raiz', 'moneda'], index=simbolos.index)
+
+    def __indices(self):
+        """Arma los diccionarios símbolo -> (raíz, moneda), raíz -> patas y tipo -> símbolos"""
+        if self.__por_raiz is None:
+            tabla = self.__tabla
+            self.__partes = dict(zip(tabla.index, zip(tabla['raiz'], tabla['moneda'])))
+            tabla = tabla.dropna(subset=['raiz', 'moneda'])
+            self.__por_raiz = {}
+            for simbolo, raiz, moneda in zip(tabla.index, tabla['raiz'], tabla['moneda']):
+                self.__por_raiz.setdefault(raiz, {})[moneda] = simbolo
+            self.__por_tipo = {}
+            for simbolo, tipo in self.__tabla['tipo'].dropna().items():
+                self.__por_tipo.setdefault(tipo, []).append(simbolo)
+
+    def patas(self, raiz):
+        """Símbolo de cada pata de moneda de una serie, ej. {'pesos': 'AL30', 'mep': 'AL30D'}"""
+        with self.__lock:
+            self.__cargar()
+            self.__indices()
+            return dict(self.__por_raiz.get(str(raiz).upper(), {}))
+
+    def simbolos(self, tipo):
+        """Símbolos de un tipo de instrumento (ej. 'BONOS SOBERANOS')"""
+        with self.__lock:
+            self.__cargar()
+            self.__indices()
+            return list(self.__por_tipo.get(tipo, []))
+
+    def instrumento(self, simbolo):
+        """Datos de referencia de un símbolo (None si no se conoce)"""
+        with self.__lock:
+            self.__cargar()
+            simbolo = str(simbolo).upper()
+            if simbolo not in self.__tabla.index:
+                return None
+            return self.__tabla.loc[simbolo].to_dict()
+
+    def tabla(self):
+        """Copia de la tabla de referencia completa, indexada por símbolo"""
+        with self.__lock:
+            self.__cargar()
+            return self.__tabla.copy()
+
+    def cargar_flujos(self, flujos):
+        """
+        Guarda cronogramas de pagos (columnas symbol, fecha y monto por cada 100 de nominal)
+        Reemplaza los cronogramas anteriores de los símbolos que vienen en flujos
+        """
+        flujos = flujos[COLUMNAS_FLUJOS].assign(symbol=flujos['symbol'].astype(str).str.upper(),
+                                                fecha=pd.to_datetime(flujos['fecha']))
+        with self.__lock:
+            self.__cargar()
+            anteriores = self.__flujos[~self.__flujos['symbol'].isin(flujos['symbol'])]
+            self.__flujos = pd.concat([anteriores, flujos], ignore_index=True) if not anteriores.empty else flujos.reset_index(drop=True)
+            self.__modificada = True
+
+    def flujos(self, simbolos=None):
+        """Cronogramas guardados (de todos los símbolos o de los pedidos)"""
+        with self.__lock:
+            self.__cargar()
+            flujos = self.__flujos
+            if simbolos is not None:
+                flujos = flujos[flujos['symbol'].isin(pd.Index(simbolos).astype(str).str.upper())]
+            return flujos.copy()
+
+
+def obtener_referencia():
+    """Retorna la referencia de instrumentos compartida por todo el proceso"""
+    global _referencia
+    if _referencia is None:
+        with _referencia_lock:
+            if _referencia is None:
+                _referencia = Referencia()
+    return _referencia
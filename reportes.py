@@ -0,0 +1,268 @@
+"""
+Reportes del dólar MEP / CCL: resumen, tabla de pares e historia
+
+Reporte arma los archivos de resultados de un día en cuatro formatos:
+
+    cotizacion_mep_YYYYMMDD.txt   resumen y pares (el formato de siempre; _ccl para el CCL)
+    dolar_mep_YYYYMMDD.csv        tabla de pares completa
+    reporte_mep_YYYYMMDD.json     resumen, pares e historia
+    reporte_mep_YYYYMMDD.html     tablero estático con el gráfico de la historia
+
+Cada sección (resumen, pares, historia) se identifica por un hash de sus
+datos. Al actualizar solo se vuelven a generar las secciones cuyo hash
+cambió, y solo se reescriben los archivos que usan alguna de ellas, así que
+los reportes se pueden refrescar en cada consulta:
+
+    reporte = Reporte("resultados_mep")
+    reporte.actualizar(resumen=stats, pares=df_mep)
+    reporte.escribir()
+"""
+import hashlib
+import html
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from metricas import etapa
+
+# Secciones que usa cada formato
+SECCIONES_FORMATO = {
+    'txt': ('resumen', 'pares'),
+    'csv': ('pares',),
+    'json': ('resumen', 'pares', 'historia'),
+    'html': ('resumen', 'pares', 'historia'),
+}
+
+# Nombre de archivo de cada formato
+ARCHIVOS_FORMATO = {
+    'txt': 'cotizacion_{prefijo}_{fecha}.txt',
+    'csv': '{columna}_{fecha}.csv',
+    'json': 'reporte_{prefijo}_{fecha}.json',
+    'html': 'reporte_{prefijo}_{fecha}.html',
+}
+
+# Columnas de la tabla de pares que se muestran en el tablero HTML
+COLUMNAS_TABLERO = ['raiz', 'bono_pesos', 'precio_pesos', 'precio_{nombre}', '{columna}', '{prefijo}_compra',
+                    '{prefijo}_venta', 'volumen_{prefijo}', 'liquidez_{prefijo}']
+
+# Cantidad máxima de pares en el gráfico (los de más observaciones)
+MAX_SERIES_GRAFICO = 8
+COLORES = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+ANCHO_GRAFICO = 900
+ALTO_GRAFICO = 320
+
+
+def _valor_json(valor):
+    """Valor serializable en JSON (NaN como null y tipos de numpy como tipos de Python)"""
+    if isinstance(valor, (np.integer, np.bool_)):
+        return valor.item()
+    if isinstance(valor, (float, np.floating)):
+        return float(valor) if math.isfinite(valor) else None
+    if isinstance(valor, (pd.Timestamp, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _hash(datos):
+    """Hash de los datos de una sección (DataFrame, dict o None) sin recorrer filas en Python"""
+    hasher = hashlib.sha1()
+    if isinstance(datos, pd.DataFrame):
+        hasher.update(repr((list(datos.columns), list(datos.index.names))).encode())
+        hasher.update(pd.util.hash_pandas_object(datos, index=True).to_numpy().tobytes())
+    else:
+        hasher.update(json.dumps(datos, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+class Reporte:
+    """
+    Reportes de un día en txt, CSV, JSON y HTML, regenerados por sección
+    columna: 'dolar_mep' o 'dolar_ccl'
+    """
+
+    def __init__(self, directorio="resultados_mep", fecha=None, columna='dolar_mep', formatos=tuple(SECCIONES_FORMATO)):
+        self.directorio = directorio
+        self.fecha = fecha or datetime.now().strftime("%Y%m%d")
+        self.columna = columna
+        self.formatos = tuple(formatos)
+        self.__prefijo = columna.split('_', 1)[1]
+        # Nombre de la pata en dólares en las columnas de la tabla de pares (ver dolar_mep.PATAS)
+        self.__nombre = 'cable' if columna == 'dolar_ccl' else 'dolares'
+
+        self.__datos = {'resumen': None, 'pares': None, 'historia': None}
+        self.__hashes = dict.fromkeys(self.__datos)
+        self.__cambiadas = set()
+        # Fragmento ya generado de cada (sección, formato)
+        self.__fragmentos = {}
+
+    def archivo(self, formato):
+        nombre = ARCHIVOS_FORMATO[formato].format(fecha=self.fecha, columna=self.columna, prefijo=self.__prefijo)
+        return os.path.join(self.directorio, nombre)
+
+    def actualizar(self, resumen=None, pares=None, historia=None, fecha_calculo=None):
+        """
+        Carga los datos nuevos de las secciones (las que quedan en None no cambian)
+        resumen: estadísticas de calcular_promedio_ponderado
+        pares: tabla de pares (calcular_liquidez o CalculadoraMEP.tabla)
+        historia: historia por fecha y par (SerieMEP.historia)
+        Retorna las secciones que cambiaron
+        """
+        if resumen is not None:
+            resumen = {
+                'fecha': (fecha_calculo or datetime.now()).strftime('%Y-%m-%d %H:%M:%S'),
+                **{clave: _valor_json(valor) for clave, valor in resumen.items()},
+            }
+        cambiadas = set()
+        for seccion, datos in (('resumen', resumen), ('pares', pares), ('historia', historia)):
+            if datos is None:
+                continue
+            clave = _hash(datos) if seccion != 'resumen' else _hash({k: v for k, v in datos.items() if k != 'fecha'})
+            if clave != self.__hashes[seccion]:
+                self.__datos[seccion] = datos
+                self.__hashes[seccion] = clave
+                cambiadas.add(seccion)
+                for formato in SECCIONES_FORMATO:
+                    self.__fragmentos.pop((seccion, formato), None)
+        self.__cambiadas |= cambiadas
+        return cambiadas
+
+    def escribir(self):
+        """
+        Reescribe los archivos de los formatos que usan alguna sección cambiada
+        Retorna las rutas escritas
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        armadores = {'txt': self.__armar_txt, 'csv': self.__armar_csv, 'json': self.__armar_json, 'html': self.__armar_html}
+        escritos = []
+        for formato in self.formatos:
+            secciones = SECCIONES_FORMATO[formato]
+            if not self.__cambiadas.intersection(secciones) or self.__datos[secciones[0]] is None:
+                continue
+            archivo = self.archivo(formato)
+            with etapa('guardado', destino='reporte', formato=formato) as medicion:
+                contenido = armadores[formato]()
+                # El txt conserva la codificación por defecto con que se escribió siempre
+                with open(archivo, 'w', newline='' if formato == 'csv' else None,
+                          encoding=None if formato == 'txt' else 'utf-8') as f:
+                    f.write(contenido)
+                medicion.bytes = len(contenido)
+            escritos.append(archivo)
+        self.__cambiadas.clear()
+        return escritos
+
+    def __fragmento(self, seccion, formato, generar):
+        """Fragmento de una sección en un formato, generado solo si sus datos cambiaron"""
+        clave = (seccion, formato)
+        if clave not in self.__fragmentos:
+            datos = self.__datos[seccion]
+            self.__fragmentos[clave] = generar(datos) if datos is not None else ''
+        return self.__fragmentos[clave]
+
+    def __pares(self):
+        """Pares con cotización, en el orden de la tabla"""
+        pares = self.__datos['pares']
+        return pares[pares[self.columna].notna()] if pares is not None else None
+
+    # txt
+
+    def __armar_txt(self):
+        return self.__fragmento('resumen', 'txt', self.__resumen_txt) + self.__fragmento('pares', 'txt', self.__pares_txt)
+
+    def __resumen_txt(self, resumen):
+        moneda = 'Dólar MEP' if self.columna == 'dolar_mep' else 'Dólar CCL'
+        return (f"Fecha: {resumen['fecha']}\n"
+                f"Cotización promedio {moneda}: ${resumen['promedio_simple']:.2f}\n"
+                f"Cotización promedio ponderada: ${resumen['promedio_ponderado']:.2f}\n"
+                f"Cotización mínima: ${resumen['min']:.2f}\n"
+                f"Cotización máxima: ${resumen['max']:.2f}\n")
+
+    def __pares_txt(self, _):
+        pares = self.__pares()
+        lineas = map("{} (${:.2f}) / {} (${:.2f}) = ${:.2f}\n".format,
+                     pares['bono_pesos'].to_numpy(), pares['precio_pesos'].to_numpy(dtype=float),
+                     pares[f'bono_{self.__nombre}'].to_numpy(), pares[f'precio_{self.__nombre}'].to_numpy(dtype=float),
+                     pares[self.columna].to_numpy(dtype=float))
+        return "\nPares de bonos utilizados:\n" + ''.join(lineas)
+
+    # csv
+
+    def __armar_csv(self):
+        return self.__fragmento('pares', 'csv', lambda pares: pares.to_csv(index=False))
+
+    # json
+
+    def __armar_json(self):
+        resumen = self.__fragmento('resumen', 'json', lambda resumen: json.dumps(resumen, ensure_ascii=False))
+        pares = self.__fragmento('pares', 'json', lambda pares: pares.to_json(orient='records', date_format='iso', force_ascii=False))
+        historia = self.__fragmento('historia', 'json', lambda historia: historia.reset_index().to_json(
+            orient='records', date_format='iso', force_ascii=False))
+        return f'{{"resumen":{resumen or "null"},"pares":{pares or "[]"},"historia":{historia or "[]"}}}\n'
+
+    # html
+
+    def __armar_html(self):
+        titulo = f"Dólar {self.__prefijo.upper()} - {self.fecha}"
+        return (
+            f"<!DOCTYPE html>\n<html lang=\"es\">\n<head>\n<meta charset=\"utf-8\">\n<title>{titulo}</title>\n"
+            "<style>body{font-family:sans-serif;margin:2em;color:#222}"
+            ".tarjetas{display:flex;flex-wrap:wrap;gap:1em}.tarjeta{border:1px solid #ddd;border-radius:6px;padding:.8em 1.2em}"
+            ".tarjeta b{display:block;font-size:1.4em}table{border-collapse:collapse;font-size:.9em}"
+            "td,th{border-bottom:1px solid #eee;padding:.3em .6em;text-align:right}th{background:#f5f5f5}"
+            "svg text{font-size:11px}</style>\n</head>\n<body>\n"
+            f"<h1>{titulo}</h1>\n"
+            + self.__fragmento('resumen', 'html', self.__resumen_html)
+            + self.__fragmento('historia', 'html', self.__historia_html)
+            + self.__fragmento('pares', 'html', self.__pares_html)
+            + "</body>\n</html>\n"
+        )
+
+    def __resumen_html(self, resumen):
+        etiquetas = [('promedio_ponderado', 'Promedio ponderado'), ('compra', 'Compra'), ('venta', 'Venta'),
+                     ('promedio_simple', 'Promedio simple'), ('min', 'Mínimo'), ('max', 'Máximo'),
+                     ('pares_utilizados', 'Pares utilizados'), ('pares_descartados', 'Pares descartados')]
+        tarjetas = ''.join(
+            f"<div class=\"tarjeta\">{texto}<b>{'-' if resumen.get(clave) is None else format(resumen[clave], '.2f' if isinstance(resumen[clave], float) else '')}</b></div>"
+            for clave, texto in etiquetas if clave in resumen)
+        return f"<p>Calculado el {html.escape(resumen['fecha'])}</p>\n<div class=\"tarjetas\">{tarjetas}</div>\n"
+
+    def __pares_html(self, _):
+        formato = {'nombre': self.__nombre, 'columna': self.columna, 'prefijo': self.__prefijo}
+        pares = self.__pares()
+        columnas = [c for c in (col.format(**formato) for col in COLUMNAS_TABLERO) if c in pares.columns]
+        tabla = pares[columnas].to_html(index=False, float_format=lambda x: f"{x:,.2f}", na_rep='-', border=0)
+        return f"<h2>Pares ({len(pares)})</h2>\n{tabla}\n"
+
+    def __historia_html(self, historia):
+        """Gráfico SVG de la historia de los pares con más observaciones"""
+        valores = historia[self.columna] if self.columna in historia.columns else historia.iloc[:, 0]
+        valores = valores.groupby(level=['fecha', 'par']).last().unstack('par')
+        valores = valores[valores.count().sort_values(ascending=False, kind='stable').index[:MAX_SERIES_GRAFICO]]
+        if valores.empty or valores.count().max() < 2:
+            return ''
+
+        # Escalas: todas las series se transforman a coordenadas de una vez
+        margen = 50
+        tiempos = valores.index.to_numpy(dtype='datetime64[ns]').astype('int64').astype(float)
+        rango_t = (tiempos.max() - tiempos.min()) or 1.0
+        minimo, maximo = np.nanmin(valores.to_numpy()), np.nanmax(valores.to_numpy())
+        rango_v = (maximo - minimo) or 1.0
+        x = margen + (tiempos - tiempos.min()) / rango_t * (ANCHO_GRAFICO - 2 * margen)
+        y = (ALTO_GRAFICO - margen) - (valores.to_numpy() - minimo) / rango_v * (ALTO_GRAFICO - 2 * margen)
+
+        lineas = []
+        for i, par in enumerate(valores.columns):
+            validos = ~np.isnan(y[:, i])
+            puntos = ' '.join(map('{:.1f},{:.1f}'.format, x[validos], y[validos, i]))
+            color = COLORES[i % len(COLORES)]
+            lineas.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{puntos}"/>'
+                          f'<text x="{ANCHO_GRAFICO - margen + 5}" y="{margen + 14 * i}" fill="{color}">{html.escape(str(par))}</text>')
+        desde, hasta = valores.index.min(), valores.index.max()
+        ejes = (f'<text x="5" y="{margen}">{maximo:.2f}</text><text x="5" y="{ALTO_GRAFICO - margen}">{minimo:.2f}</text>'
+                f'<text x="{margen}" y="{ALTO_GRAFICO - 15}">{desde:%Y-%m-%d %H:%M}</text>'
+                f'<text x="{ANCHO_GRAFICO - margen}" y="{ALTO_GRAFICO - 15}" text-anchor="end">{hasta:%Y-%m-%d %H:%M}</text>')
+        return (f"<h2>Historia</h2>\n<svg width=\"{ANCHO_GRAFICO}\" height=\"{ALTO_GRAFICO}\" "
+                f"viewBox=\"0 0 {ANCHO_GRAFICO} {ALTO_GRAFICO}\">{ejes}{''.join(lineas)}</svg>\n")
@@ -0,0 +1,249 @@
+"""
+Serie histórica del dólar MEP / CCL con estadísticas móviles
+
+SerieMEP recibe cada cálculo intradiario (la salida de calcular_tipos_de_cambio
+o calcular_liquidez) y mantiene la historia indexada por fecha y par. Las
+estadísticas móviles de cada par y de cada spread entre pares se actualizan
+en O(1) por tick con sumas acumuladas, sin recorrer la ventana completa.
+"""
+import argparse
+import glob
+import math
+import os
+import re
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class VentanaMovil:
+    """
+    Media, desvío y VWAP de una ventana móvil, actualizados en O(1) por valor
+    La ventana es una cantidad de valores (int) o un período (pd.Timedelta)
+    """
+
+    def __init__(self, ventana):
+        self.ventana = ventana
+        self.__valores = deque()
+        self.__referencia = None
+        self.__suma = 0.0
+        self.__suma_cuadrados = 0.0
+        self.__suma_precio_volumen = 0.0
+        self.__suma_volumen = 0.0
+
+    def agregar(self, valor, fecha=None, volumen=None):
+        """Agrega un valor y descarta los que quedaron fuera de la ventana"""
+        if valor is None or not math.isfinite(valor):
+            return
+        # Las sumas se llevan desplazadas por el primer valor para no perder precisión
+        if self.__referencia is None:
+            self.__referencia = valor
+        volumen = volumen if volumen is not None and math.isfinite(volumen) and volumen > 0 else 0.0
+
+        desplazado = valor - self.__referencia
+        self.__valores.append((fecha, valor, volumen))
+        self.__suma += desplazado
+        self.__suma_cuadrados += desplazado * desplazado
+        self.__suma_precio_volumen += valor * volumen
+        self.__suma_volumen += volumen
+
+        if isinstance(self.ventana, int):
+            while len(self.__valores) > self.ventana:
+                self.__quitar()
+        elif fecha is not None:
+            while self.__valores[0][0] <= fecha - self.ventana:
+                self.__quitar()
+
+    def __quitar(self):
+        _, valor, volumen = self.__valores.popleft()
+        desplazado = valor - self.__referencia
+        self.__suma -= desplazado
+        self.__suma_cuadrados -= desplazado * desplazado
+        self.__suma_precio_volumen -= valor * volumen
+        self.__suma_volumen -= volumen
+
+    def __len__(self):
+        return len(self.__valores)
+
+    @property
+    def ultimo(self):
+        return self.__valores[-1][1] if self.__valores else np.nan
+
+    @property
+    def media(self):
+        n = len(self.__valores)
+        return self.__referencia + self.__suma / n if n else np.nan
+
+    @property
+    def desvio(self):
+        """Desvío estándar muestral de los valores de la ventana"""
+        n = len(self.__valores)
+        if n < 2:
+            return np.nan
+        varianza = (self.__suma_cuadrados - self.__suma * self.__suma / n) / (n - 1)
+        return math.sqrt(max(varianza, 0.0))
+
+    @property
+    def vwap(self):
+        """Promedio ponderado por volumen; sin volumen es la media simple"""
+        if self.__suma_volumen <= 0:
+            return self.media
+        return self.__suma_precio_volumen / self.__suma_volumen
+
+
+class _EstadoPar:
+    """Ventanas de un par: nivel (media y VWAP) y retornos logarítmicos (volatilidad)"""
+
+    def __init__(self, ventana):
+        self.nivel = VentanaMovil(ventana)
+        self.retornos = VentanaMovil(ventana)
+
+    def agregar(self, valor, fecha, volumen):
+        anterior = self.nivel.ultimo
+        self.nivel.agregar(valor, fecha, volumen)
+        if math.isfinite(anterior) and anterior > 0 and valor > 0:
+            self.retornos.agregar(math.log(valor / anterior), fecha)
+
+
+class SerieMEP:
+    """
+    Historia de cálculos de MEP (o CCL con columna='dolar_ccl') por par
+    ventana: cantidad de ticks (int) o período (pd.Timedelta) de las estadísticas
+    """
+
+    def __init__(self, ventana=50, columna='dolar_mep'):
+        self.ventana = ventana
+        self.columna = columna
+        self.__volumen = f"volumen_{columna.split('_', 1)[1]}"
+        self.__pares = {}
+        self.__spreads = {}
+        self.__ultimos = {}
+        self.__registros = []
+        self.__historia = None
+
+    def seguir_spread(self, par_a, par_b):
+        """Empieza a seguir el spread entre dos pares (par_a - par_b), ej. AL30 vs GD30"""
+        self.__spreads.setdefault((par_a.upper(), par_b.upper()), _EstadoPar(self.ventana))
+
+    def ingresar(self, df_mep, fecha=None):
+        """
+        Agrega un cálculo de MEP (una fila por par, identificado por 'raiz')
+        Solo se actualizan las ventanas de los pares presentes en el cálculo
+        """
+        if df_mep is None or df_mep.empty:
+            return
+        fecha = pd.Timestamp(fecha if fecha is not None else datetime.now())
+        pares = df_mep['raiz'].astype(str).to_numpy()
+        valores = df_mep[self.columna].to_numpy(dtype=float)
+        volumenes = df_mep[self.__volumen].to_numpy(dtype=float) if self.__volumen in df_mep.columns else np.full(len(df_mep), np.nan)
+
+        for par, valor, volumen in zip(pares, valores, volumenes):
+            if not math.isfinite(valor):
+                continue
+            estado = self.__pares.get(par)
+            if estado is None:
+                estado = self.__pares[par] = _EstadoPar(self.ventana)
+            estado.agregar(valor, fecha, volumen)
+            self.__ultimos[par] = valor
+            self.__registros.append((fecha, par, valor, volumen))
+
+        for (par_a, par_b), estado in self.__spreads.items():
+            if par_a in self.__ultimos and par_b in self.__ultimos:
+                estado.nivel.agregar(self.__ultimos[par_a] - self.__ultimos[par_b], fecha)
+
+        self.__historia = None
+
+    def historia(self):
+        """Historia completa indexada por fecha y par"""
+        if self.__historia is None:
+            historia = pd.DataFrame(self.__registros, columns=['fecha', 'par', self.columna, 'volumen'])
+            self.__historia = historia.set_index(['fecha', 'par']).sort_index()
+        return self.__historia
+
+    def estadisticas(self):
+        """Último valor, media, volatilidad (desvío de retornos log) y VWAP de cada par"""
+        filas = [{
+            'par': par,
+            'ultimo': estado.nivel.ultimo,
+            'media': estado.nivel.media,
+            'desvio': estado.nivel.desvio,
+            'volatilidad': estado.retornos.desvio,
+            'vwap': estado.nivel.vwap,
+            'observaciones': len(estado.nivel),
+        } for par, estado in self.__pares.items()]
+        return pd.DataFrame(filas).set_index('par').sort_index() if filas else pd.DataFrame()
+
+    def spreads(self):
+        """Último valor, media y desvío de cada spread seguido"""
+        filas = [{
+            'par_a': par_a,
+            'par_b': par_b,
+            'ultimo': estado.nivel.ultimo,
+            'media': estado.nivel.media,
+            'desvio': estado.nivel.desvio,
+            'observaciones': len(estado.nivel),
+        } for (par_a, par_b), estado in self.__spreads.items()]
+        return pd.DataFrame(filas)
+
+    def cargar_archivos(self, directorio="resultados_mep"):
+        """
+        Ingresa los dolar_mep_YYYYMMDD.csv guardados por dolar_mep.main
+        La fecha de cada cálculo es la del nombre del archivo
+        """
+        archivos = []
+        for archivo in glob.glob(os.path.join(directorio, "dolar_mep_*.csv")):
+            coincidencia = re.search(r'dolar_mep_(\d{8})\.csv$', archivo)
+            if coincidencia:
+                archivos.append((pd.Timestamp(coincidencia.group(1)), archivo))
+
+        for fecha, archivo in sorted(archivos):
+            df = pd.read_csv(archivo, dtype={'numero': str})
+            if 'raiz' not in df.columns:
+                # Archivos anteriores al cálculo por familias: la raíz es el bono en pesos
+                df['raiz'] = df['bono_pesos']
+            self.ingresar(df, fecha)
+        return len(archivos)
+
+    def cargar_historico(self, historico, desde=None, hasta=None):
+        """Ingresa los cálculos de MEP guardados en el histórico columnar, en orden de snapshot"""
+        df = historico.leer(tipos=['dolar_mep'], desde=desde, hasta=hasta)
+        if df.empty:
+            return 0
+        for fecha, calculo in df.groupby('snapshot', sort=True):
+            self.ingresar(calculo, fecha)
+        return df['snapshot'].nunique()
+
+
+def main():
+    """Muestra las estadísticas móviles del MEP guardado"""
+    parser = argparse.ArgumentParser(description="Serie histórica del dólar MEP / CCL")
+    parser.add_argument('--directorio', default="resultados_mep", help="carpeta con los dolar_mep_*.csv")
+    parser.add_argument('--historico', help="directorio del histórico columnar (en lugar de los CSV)")
+    parser.add_argument('--ventana', type=int, default=50, help="cantidad de cálculos de la ventana")
+    parser.add_argument('--ccl', action='store_true', help="usar el CCL en lugar del MEP")
+    parser.add_argument('--spread', nargs=2, action='append', metavar=('PAR_A', 'PAR_B'), default=[])
+    args = parser.parse_args()
+
+    serie = SerieMEP(args.ventana, 'dolar_ccl' if args.ccl else 'dolar_mep')
+    for par_a, par_b in args.spread:
+        serie.seguir_spread(par_a, par_b)
+
+    if args.historico:
+        from historico import Historico
+        cantidad = serie.cargar_historico(Historico(args.historico))
+    else:
+        cantidad = serie.cargar_archivos(args.directorio)
+    print(f"Se cargaron {cantidad} cálculos")
+
+    estadisticas = serie.estadisticas()
+    if not estadisticas.empty:
+        print(estadisticas.to_string(float_format='%.4f'))
+    if args.spread:
+        print()
+        print(serie.spreads().to_string(index=False, float_format='%.4f'))
+
+
+if __name__ == "__main__":
+    main()
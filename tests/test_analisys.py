@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from analisys import ajustar_curva, analizar_panel
+
+SIN_FLUJOS = pd.DataFrame(columns=['symbol', 'fecha', 'monto'])
+
+
+def _panel():
+    filas = []
+    for i, vencimiento in enumerate(['2026-07-09', '2027-07-09', '2028-07-09', '2029-07-09']):
+        # Serie en dólares (pata en pesos a ~1000 por dólar y pata D) y bono en pesos
+        filas.append([f'XD{i}', 1000.0 * (90.0 - 5 * i), vencimiento])
+        filas.append([f'XD{i}D', 90.0 - 5 * i, vencimiento])
+        filas.append([f'XP{i}', 85.0 - 8 * i, vencimiento])
+    return pd.DataFrame(filas, columns=['symbol', 'last', 'expiration']).assign(datetime='2025-05-14 12:00')
+
+
+def test_pata_en_pesos_de_bono_en_dolares_sin_tir():
+    por_simbolo = analizar_panel(_panel(), flujos=SIN_FLUJOS).set_index('symbol')
+
+    assert por_simbolo.loc['XD0', 'moneda_flujos'] == 'dolares'
+    assert np.isnan(por_simbolo.loc['XD0', 'tir'])
+    assert np.isfinite(por_simbolo.loc['XD0D', 'tir'])
+    assert por_simbolo.loc['XP0', 'moneda_flujos'] == 'pesos'
+
+
+def test_curva_en_pesos_sin_patas_de_bonos_en_dolares():
+    analisis = analizar_panel(_panel(), flujos=SIN_FLUJOS)
+    # Aunque la TIR venga de otro cálculo, la pata en pesos de XD no entra en la curva en pesos
+    analisis.loc[analisis['symbol'].str.fullmatch(r'XD\d'), 'tir'] = 0.5
+    curvas = ajustar_curva(analisis).set_index('moneda')
+
+    assert curvas.loc['pesos', 'puntos'] == 4
+    assert curvas.loc['mep', 'puntos'] == 4
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from arbitraje import cruces_tipo_de_cambio, escanear, indexar_puntas, libros_cruzados
+
+
+def _panel():
+    # settlement: '1' = T0, '2' = T1
+    return pd.DataFrame([
+        ('AL30', 77000, 77100, 1000, 2000, '2'),
+        ('AL30D', 68, 68.2, 3000, 1000, '2'),
+        ('AL30C', 67, 67.3, 500, 500, '2'),
+        ('GD30', 80000, 80100, 1000, 1000, '2'),
+        ('GD30D', 69, 69.1, 1000, 1000, '2'),
+        ('GD30C', 68.5, 68.7, 1000, 1000, '2'),
+        ('AL30D', 68.5, 68.4, 700, 300, '1'),
+        ('AE38', 0, 0, 0, 0, '2'),
+    ], columns=['symbol', 'bid', 'ask', 'bid_size', 'ask_size', 'settlement'])
+
+
+def test_indice_por_raiz_moneda_y_plazo():
+    puntas = indexar_puntas(_panel())
+
+    assert puntas.index.names == ['raiz', 'moneda', 'plazo']
+    assert puntas.index.is_unique and puntas.index.is_monotonic_increasing
+    # Sin ninguna punta el instrumento se descarta
+    assert 'AE38' not in puntas.index.get_level_values('raiz')
+    assert puntas.loc[('AL30', 'mep', 'T0'), 'symbol'] == 'AL30D'
+    assert puntas.loc[('GD30', 'cable', 'T1'), 'bid'] == 68.5
+
+
+def test_libro_cruzado():
+    cruzados = libros_cruzados(indexar_puntas(_panel()))
+
+    assert cruzados[['compra', 'plazo_compra']].values.tolist() == [['AL30D', 'T0']]
+    fila = cruzados.iloc[0]
+    assert fila['precio_compra'] == 68.4 and fila['precio_venta'] == 68.5
+    assert fila['ganancia'] == pytest.approx(68.5 / 68.4 - 1)
+    assert fila['monto'] == 300
+
+
+def test_cruces_mep_ccl_y_canje():
+    cruces = cruces_tipo_de_cambio(indexar_puntas(_panel())).set_index('tipo')
+
+    assert cruces[['compra', 'venta', 'plazo_compra']].values.tolist() == [
+        ['AL30', 'GD30', 'T1'], ['AL30', 'GD30', 'T1'], ['GD30', 'AL30', 'T1']]
+    mep = cruces.loc['mep']
+    assert mep['precio_compra'] == pytest.approx(77100 / 68)
+    assert mep['precio_venta'] == pytest.approx(80000 / 69.1)
+    # 2000 nominales al ask de AL30 contra 1000 al ask de GD30D
+    assert mep['monto'] == pytest.approx(min(2000 * 68 / 100, 1000 * 69.1 / 100))
+    canje = cruces.loc['canje']
+    assert canje['precio_compra'] == pytest.approx(69.1 / 68.5)
+    assert canje['precio_venta'] == pytest.approx(68 / 67.3)
+
+
+def test_matrices_iguales_a_recorrer_los_pares():
+    generador = np.random.default_rng(3)
+    filas = []
+    for k in range(12):
+        precio = generador.uniform(50, 90)
+        tipo = generador.uniform(1100, 1200)
+        for sufijo, escala in [('', tipo), ('D', 1.0), ('C', generador.uniform(0.97, 1.03))]:
+            medio = precio * escala
+            filas.append((f'X{k:02d}{sufijo}', medio * 0.999, medio * 1.001, 100.0, 100.0, '2'))
+    panel = pd.DataFrame(filas, columns=['symbol', 'bid', 'ask', 'bid_size', 'ask_size', 'settlement'])
+    puntas = indexar_puntas(panel).xs('T1', level='plazo')
+
+    esperado = set()
+    for tipo, base, cotizada in [('mep', 'pesos', 'mep'), ('ccl', 'pesos', 'cable'), ('canje', 'mep', 'cable')]:
+        b = puntas.xs(base, level='moneda')
+        c = puntas.xs(cotizada, level='moneda')
+        for i in b.index:
+            for j in b.index:
+                if i != j and b.loc[j, 'bid'] / c.loc[j, 'ask'] > b.loc[i, 'ask'] / c.loc[i, 'bid']:
+                    esperado.add((tipo, i, j))
+
+    cruces = cruces_tipo_de_cambio(indexar_puntas(panel))
+    assert esperado and set(zip(cruces['tipo'], cruces['compra'], cruces['venta'])) == esperado
+
+
+def test_escanear_ordena_por_ganancia():
+    oportunidades = escanear(_panel())
+
+    assert {'libro_cruzado', 'mep', 'ccl', 'canje'} <= set(oportunidades['tipo'])
+    assert oportunidades['ganancia'].is_monotonic_decreasing
+    assert escanear(pd.DataFrame()).empty
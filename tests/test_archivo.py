@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from archivo import ArchivoRespuestas
+
+
+def _respuesta(precios):
+    return json.dumps([{'symbol': f'B{i}', 'last': precio} for i, precio in enumerate(precios)],
+                      separators=(',', ':')).encode()
+
+
+def _snapshots(cantidad, registros=30):
+    precios = [100.0 + i for i in range(registros)]
+    snapshots = []
+    for paso in range(cantidad):
+        precios[paso % registros] += 0.5
+        snapshots.append(_respuesta(precios))
+    return snapshots
+
+
+def test_ida_y_vuelta_exacta_con_keyframes_y_deltas(tmp_path):
+    archivo = ArchivoRespuestas(str(tmp_path), keyframe_cada=4)
+    snapshots = _snapshots(10)
+    registros = [archivo.guardar('public-bonds', contenido, timestamp=i) for i, contenido in enumerate(snapshots)]
+
+    assert [r['tipo'] for r in registros] == ['completo', 'delta', 'delta', 'delta'] * 2 + ['completo', 'delta']
+    # Un archivo nuevo lee todo desde el disco, recorriendo cada cadena hasta su keyframe
+    releido = ArchivoRespuestas(str(tmp_path))
+    for registro, contenido in reversed(list(zip(registros, snapshots))):
+        assert releido.leer(registro['hash']) == contenido
+    assert releido.leer_en('public-bonds', 5.5) == snapshots[5]
+    assert releido.leer_en('public-bonds', -1) is None
+
+
+def test_contenido_repetido_no_se_vuelve_a_guardar(tmp_path):
+    archivo = ArchivoRespuestas(str(tmp_path))
+    contenido = _respuesta([1.0, 2.0])
+
+    assert archivo.guardar('lebacs', contenido, timestamp=1)['nuevo']
+    repetido = archivo.guardar('lebacs', contenido, timestamp=2)
+
+    assert not repetido['nuevo'] and repetido['tipo'] == 'repetido'
+    assert len(archivo.registros('lebacs')) == 2
+    assert archivo.leer(repetido['hash']) == contenido
+
+
+def _ruta_objeto(directorio, registro):
+    return os.path.join(directorio, 'objetos', registro['hash'][:2], registro['objeto'])
+
+
+def test_objeto_danado_en_la_cadena(tmp_path):
+    archivo = ArchivoRespuestas(str(tmp_path), keyframe_cada=10)
+    registros = [archivo.guardar('public-bonds', contenido, timestamp=i) for i, contenido in enumerate(_snapshots(3))]
+    with open(_ruta_objeto(tmp_path, registros[0]), 'r+b') as f:
+        f.seek(12)
+        f.write(b'\x00\x00\x00\x00')
+
+    with pytest.raises(ValueError):
+        ArchivoRespuestas(str(tmp_path)).leer(registros[2]['hash'])
+
+
+def test_objeto_faltante_en_la_cadena(tmp_path):
+    archivo = ArchivoRespuestas(str(tmp_path), keyframe_cada=10)
+    registros = [archivo.guardar('public-bonds', contenido, timestamp=i) for i, contenido in enumerate(_snapshots(3))]
+    os.remove(_ruta_objeto(tmp_path, registros[1]))
+
+    releido = ArchivoRespuestas(str(tmp_path))
+    assert releido.leer(registros[0]['hash']) == _snapshots(3)[0]
+    with pytest.raises(FileNotFoundError):
+        releido.leer(registros[2]['hash'])
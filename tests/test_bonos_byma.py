@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from bonos_byma import normalizar_tabla
+from dolar_mep import calcular_dolar_mep, calcular_promedio_ponderado, filtrar_bonos_para_mep
+
+
+def _tabla():
+    return pd.DataFrame({
+        'Símbolo': ['AL30', 'AL30D', 'GD30', 'GD30D', 'AE38', 'AE38D'],
+        'Último': ['77.500,5', '68,15', '80.000', '70,1', '60.000', '50'],
+        'Var. %': ['-0,5%', '1,2 %', '0', '', '-', '3%'],
+        'Compra': ['77.000', '68', '79.000', '70', '59.000', '49'],
+        'Venta': ['78.000', '69', '81.000', '71', '61.000', '51'],
+    })
+
+
+def test_variacion_como_fraccion():
+    df = normalizar_tabla(_tabla())
+
+    assert df['change'].tolist()[:3] == pytest.approx([-0.005, 0.012, 0.0])
+
+
+def test_cantidades_faltantes_quedan_nulas():
+    df = normalizar_tabla(_tabla())
+
+    assert df['volume'].isna().all() and df['bid_size'].isna().all()
+    # Sin volumen los pares pesan por spread; no se descartan como pares sin operaciones
+    pesos, dolares = filtrar_bonos_para_mep(df, None)
+    stats = calcular_promedio_ponderado(calcular_dolar_mep(pesos, dolares))
+    assert stats['pares_utilizados'] == 3
@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+
+from byma_bonos import CAMPOS_RENTA_FIJA, COLUMNAS_RENTA_FIJA, URL_BYMA, OpenBYMAdata
+from transporte import RespuestaGrabada, TransporteGrabador, TransporteReproductor
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from byma_async import OpenBYMAdataAsync
+
+DATOS = os.path.join(os.path.dirname(__file__), '..', 'datos_bonos')
+ARCHIVOS = {
+    'public-bonds': 'bonos_publicos_20250514.csv',
+    'lebacs': 'letras_tesoro_20250514.csv',
+    'negociable-obligations': 'obligaciones_negociables_20250514.csv',
+}
+
+
+class _TransporteDatosBonos:
+    """Responde cada panel con el CSV de datos_bonos en el formato de la API"""
+
+    def get(self, url, **kwargs):
+        return RespuestaGrabada(url, 200, b'ok')
+
+    def post(self, url, **kwargs):
+        df = pd.read_csv(os.path.join(DATOS, ARCHIVOS[url.rsplit('/', 1)[1]]), dtype={'settlement': str})
+        registros = df[COLUMNAS_RENTA_FIJA].rename(columns=dict(zip(COLUMNAS_RENTA_FIJA, CAMPOS_RENTA_FIJA)))
+        contenido = '{"data":' + registros.to_json(orient='records') + '}'
+        return RespuestaGrabada(url, 200, contenido.encode('utf-8'), {'Content-Type': 'application/json'})
+
+
+async def _consultar_async(directorio):
+    """Sirve la grabación por HTTP local y la consulta con el cliente asincrónico"""
+    reproductor = TransporteReproductor(directorio)
+
+    async def dashboard(request):
+        return web.Response(text='ok')
+
+    async def api(request):
+        respuesta = reproductor.post(URL_BYMA + request.path, data=await request.read())
+        return web.Response(status=respuesta.status_code, body=respuesta.content,
+                            content_type=respuesta.headers['Content-Type'])
+
+    app = web.Application()
+    app.router.add_get('/', dashboard)
+    app.router.add_post('/vanoms-be-core/rest/api/bymadata/free/{endpoint}', api)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sitio = web.TCPSite(runner, '127.0.0.1', 0)
+    await sitio.start()
+    try:
+        puerto = runner.addresses[0][1]
+        async with OpenBYMAdataAsync(f'http://127.0.0.1:{puerto}', reintentos=0) as byma:
+            return await byma.get_fixed_income_many()
+    finally:
+        await runner.cleanup()
+
+
+def test_async_igual_al_sincronico_con_la_grabacion(tmp_path):
+    directorio = str(tmp_path / 'grabacion')
+    grabador = TransporteGrabador(directorio, _TransporteDatosBonos())
+    OpenBYMAdata(cache_dir=str(tmp_path), transporte=grabador).get_fixed_income_many()
+
+    sincronico = OpenBYMAdata(cache_dir=str(tmp_path), transporte=TransporteReproductor(directorio)).get_fixed_income_many()
+    asincronico = asyncio.run(_consultar_async(directorio))
+
+    assert list(asincronico) == list(sincronico) == list(ARCHIVOS)
+    for endpoint, df in sincronico.items():
+        assert df is not None and not df.empty
+        pd.testing.assert_frame_equal(asincronico[endpoint], df)
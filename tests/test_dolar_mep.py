@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+import pytest
+
+from byma_bonos import aplicar_esquema
+from dolar_mep import calcular_liquidez, calcular_promedio_ponderado, calcular_tipos_de_cambio
+
+PANEL = os.path.join(os.path.dirname(__file__), '..', 'datos_bonos', 'bonos_publicos_20250514.csv')
+
+
+def _panel():
+    return aplicar_esquema(pd.read_csv(PANEL))
+
+
+def test_familia_por_defecto_como_siempre():
+    pares = calcular_tipos_de_cambio(_panel(), r'AL\d+').dropna(subset=['dolar_mep'])
+    stats = calcular_promedio_ponderado(calcular_liquidez(pares))
+
+    assert set(pares['raiz']) == {'AL29', 'AL30', 'AL35', 'AL41'}
+    assert stats['promedio_simple'] == pytest.approx(1139.36, abs=0.005)
+
+
+def test_bopreal_empareja_patas_con_distinta_raiz():
+    pares = calcular_tipos_de_cambio(_panel()).set_index('bono_pesos')
+
+    assert pares.loc['BPOA7', ['bono_dolares', 'bono_cable']].tolist() == ['BPA7D', 'BPA7C']
+    assert pares.loc['BPY26', 'bono_dolares'] == 'BPY6D'
@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from historico import Historico
+
+
+def _snapshot(precio):
+    return pd.DataFrame({'symbol': ['AL30', 'GD30'], 'settlement': ['2', '2'], 'last': [precio, precio + 1]})
+
+
+def _archivos(directorio, fecha):
+    particion = os.path.join(directorio, 'categoria=bonos', f'fecha={fecha}')
+    return sorted(a for a in os.listdir(particion) if a.endswith('.parquet'))
+
+
+def test_compacta_al_llegar_al_maximo_de_archivos(tmp_path):
+    historico = Historico(str(tmp_path), max_archivos=3)
+    for minuto in range(4):
+        historico.agregar(_snapshot(100.0 + minuto), 'bonos', f'2024-05-02 11:{minuto:02d}')
+
+    assert len(_archivos(tmp_path, '2024-05-02')) == 2
+    assert len(historico.leer()) == 8
+
+
+def test_compacta_el_dia_anterior_al_cambiar_de_dia(tmp_path):
+    historico = Historico(str(tmp_path), max_archivos=100)
+    historico.agregar(_snapshot(100.0), 'bonos', '2024-05-02 11:00')
+    historico.agregar(_snapshot(101.0), 'bonos', '2024-05-02 17:00')
+    historico.agregar(_snapshot(102.0), 'bonos', '2024-05-03 11:00')
+
+    assert len(_archivos(tmp_path, '2024-05-02')) == 1
+    assert len(_archivos(tmp_path, '2024-05-03')) == 1
+    assert historico.leer(hasta='2024-05-02 23:59')['last'].tolist() == [100.0, 101.0, 101.0, 102.0]
+
+
+def test_leer_une_columnas_de_snapshots_posteriores(tmp_path):
+    historico = Historico(str(tmp_path), max_archivos=0)
+    historico.agregar(pd.DataFrame({'bono_pesos': ['AL30'], 'mep': [1139.5]}), 'dolar_mep', '2024-05-02 11:00')
+    historico.agregar(pd.DataFrame({'bono_pesos': ['AL30'], 'mep': [1140.0], 'ccl': [1160.0]}), 'dolar_mep',
+                      '2024-05-02 12:00')
+
+    leido = historico.leer().sort_values('snapshot')
+
+    assert 'ccl' in leido.columns
+    assert leido['ccl'].isna().tolist() == [True, False]
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from byma_bonos import aplicar_esquema
+from dolar_mep import calcular_liquidez, calcular_promedio_ponderado, calcular_tipos_de_cambio
+from mep_incremental import CalculadoraMEP
+
+PANEL = os.path.join(os.path.dirname(__file__), '..', 'datos_bonos', 'todos_bonos_20250514.csv')
+
+
+def _en_lote(panel, columna):
+    pares = calcular_tipos_de_cambio(panel.copy()).dropna(subset=[columna])
+    return calcular_promedio_ponderado(calcular_liquidez(pares, columna), columna)
+
+
+def _comparar(incremental, lote):
+    assert incremental.keys() == lote.keys()
+    for clave, valor in lote.items():
+        assert incremental[clave] == pytest.approx(valor, rel=1e-9, nan_ok=True), clave
+
+
+@pytest.mark.parametrize('columna', ['dolar_mep', 'dolar_ccl'])
+def test_igual_al_calculo_en_lote(columna):
+    panel = aplicar_esquema(pd.read_csv(PANEL))
+    calculadora = CalculadoraMEP(columna)
+    publicaciones = []
+    calculadora.suscribir(publicaciones.append)
+    _comparar(calculadora.actualizar(panel), _en_lote(panel, columna))
+
+    generador = np.random.default_rng(0)
+    for _ in range(40):
+        filas = generador.choice(len(panel), 3, replace=False)
+        for i in filas:
+            azar = generador.random()
+            if azar < 0.1:
+                panel.loc[i, 'last'] = 0
+            elif azar < 0.2:
+                panel.loc[i, 'bid'] = 0
+            elif azar < 0.3:
+                # Una cotización más nueva deja viejas a las demás
+                panel.loc[i, 'datetime'] = pd.Timestamp('2025-05-14 18:30')
+            else:
+                panel.loc[i, ['last', 'bid', 'ask']] = panel.loc[i, ['last', 'bid', 'ask']].to_numpy(float) * (1 + generador.normal(0, 0.01, 3))
+            if generador.random() < 0.05:
+                panel.loc[i, 'turnover'] = np.nan
+        _comparar(calculadora.actualizar(panel.iloc[filas]), _en_lote(panel, columna))
+
+    # Bajas de símbolos
+    bajas = panel.iloc[filas].assign(evento='baja')
+    _comparar(calculadora.actualizar(bajas), _en_lote(panel.drop(panel.index[filas]), columna))
+    assert publicaciones
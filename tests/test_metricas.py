@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import metricas
+from metricas import Registro
+
+
+async def _etapa_con_await(registro, nombre, espera):
+    with registro.etapa(nombre):
+        await asyncio.sleep(espera)
+
+
+def test_etapas_concurrentes_en_asyncio(tmp_path, monkeypatch):
+    # Dos corutinas con etapas solapadas no deben alterar la profundidad de la otra
+    monkeypatch.setattr(metricas, 'ARCHIVO_PERFIL', str(tmp_path / 'byma.prof'))
+    registro = Registro(formato='', perfil='cprofile')
+
+    async def principal():
+        await asyncio.gather(_etapa_con_await(registro, 'a', 0.02), _etapa_con_await(registro, 'b', 0.01))
+
+    asyncio.run(principal())
+    assert {fila['etapa']: fila['llamadas'] for fila in registro.resumen()} == {'a': 1, 'b': 1}
+
+    # Dentro del event loop no se perfila; fuera, la etapa más externa sí
+    registro.volcar()
+    assert not (tmp_path / 'byma.prof').exists()
+    with registro.etapa('c'):
+        sum(range(1000))
+    registro.volcar()
+    assert (tmp_path / 'byma.prof').exists()
+
+
+def test_cprofile_solo_en_el_hilo_principal(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas, 'ARCHIVO_PERFIL', str(tmp_path / 'byma.prof'))
+    registro = Registro(formato='', perfil='cprofile')
+
+    def trabajo():
+        with registro.etapa('http'):
+            sum(range(1000))
+
+    hilos = [threading.Thread(target=trabajo) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert registro.resumen()[0]['llamadas'] == 4
+    registro.volcar()
+    assert not (tmp_path / 'byma.prof').exists()
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from byma_bonos import aplicar_esquema
+from monitor_bonos import diferencias
+
+
+def _panel(filas):
+    return aplicar_esquema(pd.DataFrame(filas, columns=['symbol', 'settlement', 'last', 'group']))
+
+
+def test_diferencias_con_simbolo_nuevo():
+    # Con un símbolo nuevo las categorías de las claves cambian entre snapshots
+    anterior = _panel([['AL30', '2', 77500.0, 'TITULOSPUBLICOS'], ['AL30D', '2', 68.15, 'TITULOSPUBLICOS']])
+    actual = _panel([['AL30', '2', 77600.0, 'TITULOSPUBLICOS'], ['AL30D', '2', 68.15, 'TITULOSPUBLICOS'],
+                     ['NUEVO1', '1', 100.0, 'ON']])
+
+    cambios = diferencias(anterior, actual).set_index('symbol')['evento'].to_dict()
+
+    assert cambios == {'AL30': 'modificacion', 'NUEVO1': 'alta'}
+
+
+def test_diferencias_con_baja():
+    anterior = _panel([['AL30', '2', 77500.0, 'TITULOSPUBLICOS'], ['GD30', '2', 80000.0, 'TITULOSPUBLICOS']])
+    actual = _panel([['AL30', '2', 77500.0, 'TITULOSPUBLICOS']])
+
+    cambios = diferencias(anterior, actual)
+
+    assert cambios[['symbol', 'evento']].values.tolist() == [['GD30', 'baja']]
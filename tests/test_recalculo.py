@@ -0,0 +1,19 @@
+import os
+
+import pandas as pd
+
+from recalculo import recalcular
+
+
+def test_snapshot_corrupto_no_queda_como_procesado(tmp_path):
+    datos = tmp_path / 'datos'
+    datos.mkdir()
+    pd.DataFrame({'symbol': ['AL30', 'AL30D'], 'settlement': ['2', '2'], 'last': [77500.0, 68.15]}).to_csv(
+        datos / 'todos_bonos_20250513.csv', index=False)
+    (datos / 'todos_bonos_20250514.csv').write_text('<html>Service Unavailable</html>\n')
+    salida = tmp_path / 'salida'
+
+    assert recalcular(str(datos), str(salida), procesos=1) == 1
+
+    resumen = pd.read_csv(os.path.join(salida, 'resumen.csv'), dtype={'fecha': str})
+    assert resumen['fecha'].tolist() == ['20250513']
@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+import referencia
+from referencia import Referencia
+
+
+def _panel():
+    return pd.DataFrame({'symbol': ['AL30', 'AL30D', 'GD30C'], 'group': ['TITULOSPUBLICOS'] * 3,
+                         'expiration': ['2030-07-09'] * 3})
+
+
+def test_clasificar_usa_el_indice_y_parsea_solo_desconocidos(tmp_path, monkeypatch):
+    ref = Referencia(str(tmp_path))
+    ref.actualizar(_panel(), 'BONOS')
+
+    llamadas = []
+    separar = referencia.separar_simbolos
+    monkeypatch.setattr(referencia, 'separar_simbolos', lambda simbolos: llamadas.append(list(simbolos)) or separar(simbolos))
+
+    partes = ref.clasificar(pd.Series(['al30d', 'GD30C', None, 'TX26', 'TX26'], index=[5, 6, 7, 8, 9]))
+    ref.clasificar(pd.Series(['TX26', 'AL30']))
+
+    assert partes.loc[5].tolist() == ['AL30', 'mep']
+    assert partes.loc[6].tolist() == ['GD30', 'cable']
+    assert partes.loc[7].isna().all()
+    assert partes.loc[9].tolist() == ['TX26', 'pesos']
+    # Solo el símbolo desconocido se parseó, y una sola vez
+    assert llamadas == [['TX26']]
+
+
+def test_clasificar_no_modifica_la_tabla_en_disco(tmp_path):
+    ref = Referencia(str(tmp_path))
+    ref.clasificar(pd.Series(['AL30', 'AL30D']))
+
+    assert not ref.guardar()
+    assert not os.path.exists(tmp_path / 'instrumentos.parquet')
@@ -0,0 +1,67 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from reportes import Reporte
+
+
+def _resumen(promedio=1139.36):
+    return {'promedio_simple': promedio, 'promedio_ponderado': promedio, 'min': 1130.0, 'max': 1150.0,
+            'pares_utilizados': 2, 'pares_descartados': 0}
+
+
+def _pares(precio_gd30d=70.1):
+    return pd.DataFrame({
+        'raiz': ['AL30', 'GD30'],
+        'bono_pesos': ['AL30', 'GD30'], 'precio_pesos': [77500.0, 80000.0],
+        'bono_dolares': ['AL30D', 'GD30D'], 'precio_dolares': [68.15, precio_gd30d],
+        'dolar_mep': [77500 / 68.15, 80000 / precio_gd30d],
+    })
+
+
+def _historia():
+    fechas = pd.to_datetime(['2025-05-14 11:00', '2025-05-14 11:05'])
+    indice = pd.MultiIndex.from_product([fechas, ['AL30', 'GD30']], names=['fecha', 'par'])
+    return pd.DataFrame({'dolar_mep': [1137.2, 1141.2, 1138.0, 1140.5]}, index=indice)
+
+
+def test_nombres_y_contenido_de_cada_formato(tmp_path):
+    reporte = Reporte(str(tmp_path), fecha='20250514')
+    reporte.actualizar(_resumen(), _pares(), _historia(), fecha_calculo=datetime(2025, 5, 14, 17))
+    escritos = reporte.escribir()
+
+    assert sorted(os.path.basename(e) for e in escritos) == [
+        'cotizacion_mep_20250514.txt', 'dolar_mep_20250514.csv', 'reporte_mep_20250514.html', 'reporte_mep_20250514.json']
+    txt = open(reporte.archivo('txt')).read()
+    assert txt.startswith("Fecha: 2025-05-14 17:00:00\nCotización promedio Dólar MEP: $1139.36\n")
+    assert "AL30 ($77500.00) / AL30D ($68.15) = $1137.20\n" in txt
+    assert pd.read_csv(reporte.archivo('csv'))['bono_dolares'].tolist() == ['AL30D', 'GD30D']
+    datos = json.load(open(reporte.archivo('json'), encoding='utf-8'))
+    assert datos['resumen']['pares_utilizados'] == 2 and len(datos['pares']) == 2 and len(datos['historia']) == 4
+    assert '<polyline' in open(reporte.archivo('html'), encoding='utf-8').read()
+
+    ccl = Reporte(str(tmp_path), fecha='20250514', columna='dolar_ccl')
+    assert os.path.basename(ccl.archivo('txt')) == 'cotizacion_ccl_20250514.txt'
+
+
+def test_solo_se_reescriben_las_secciones_que_cambian(tmp_path):
+    reporte = Reporte(str(tmp_path), fecha='20250514')
+    reporte.actualizar(_resumen(), _pares(), _historia())
+    assert len(reporte.escribir()) == 4
+
+    # Mismos datos (aunque cambie la hora de cálculo): nada que reescribir
+    assert reporte.actualizar(_resumen(), _pares(), _historia(), fecha_calculo=datetime(2025, 5, 14, 18)) == set()
+    assert reporte.escribir() == []
+
+    # Solo cambia la historia: el txt y el CSV no la usan
+    historia = _historia()
+    historia.iloc[-1, 0] = 1142.0
+    assert reporte.actualizar(historia=historia) == {'historia'}
+    assert sorted(os.path.basename(e) for e in reporte.escribir()) == ['reporte_mep_20250514.html', 'reporte_mep_20250514.json']
+
+    # Cambian los pares: se reescriben todos los formatos
+    assert reporte.actualizar(pares=_pares(70.0)) == {'pares'}
+    assert len(reporte.escribir()) == 4
+    assert "GD30D ($70.00)" in open(reporte.archivo('txt')).read()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from serie_mep import VentanaMovil
+
+
+def _serie(cantidad=60):
+    generador = np.random.default_rng(1)
+    # Minutos irregulares, con valores que caen justo en el borde de la ventana
+    minutos = np.cumsum(generador.choice([1, 2, 5], cantidad))
+    fechas = pd.Timestamp('2025-05-14 11:00') + pd.to_timedelta(minutos, unit='min')
+    valores = 1140.0 + np.cumsum(generador.normal(0, 1.5, cantidad))
+    volumenes = generador.uniform(0, 1e6, cantidad)
+    return pd.DataFrame({'valor': valores, 'volumen': volumenes}, index=fechas)
+
+
+def _recorrer(ventana, serie):
+    movil = VentanaMovil(ventana)
+    resultados = []
+    for fecha, valor, volumen in zip(serie.index, serie['valor'], serie['volumen']):
+        movil.agregar(valor, fecha, volumen)
+        resultados.append((len(movil), movil.media, movil.desvio, movil.vwap))
+    return pd.DataFrame(resultados, columns=['n', 'media', 'desvio', 'vwap'], index=serie.index)
+
+
+@pytest.mark.parametrize('ventana, rolling', [(10, 10), (pd.Timedelta(minutes=10), '10min')])
+def test_igual_a_rolling_de_pandas(ventana, rolling):
+    serie = _serie()
+    calculado = _recorrer(ventana, serie)
+
+    ventanas = serie.rolling(rolling, min_periods=1)
+    esperado_vwap = ((serie['valor'] * serie['volumen']).rolling(rolling, min_periods=1).sum()
+                     / serie['volumen'].rolling(rolling, min_periods=1).sum())
+    np.testing.assert_array_equal(calculado['n'], ventanas['valor'].count())
+    np.testing.assert_allclose(calculado['media'], ventanas['valor'].mean(), rtol=1e-12)
+    np.testing.assert_allclose(calculado['desvio'], ventanas['valor'].std(), rtol=1e-8)
+    np.testing.assert_allclose(calculado['vwap'], esperado_vwap, rtol=1e-12)
+
+
+def test_borde_de_la_ventana_temporal():
+    movil = VentanaMovil(pd.Timedelta(minutes=5))
+    inicio = pd.Timestamp('2025-05-14 11:00')
+    movil.agregar(1.0, inicio)
+    movil.agregar(2.0, inicio + pd.Timedelta(minutes=4, seconds=59))
+    assert len(movil) == 2
+
+    # A los 5 minutos exactos el primero sale (la ventana es (fecha - 5 min, fecha])
+    movil.agregar(3.0, inicio + pd.Timedelta(minutes=5))
+    assert len(movil) == 2
+    assert movil.media == pytest.approx(2.5)
+
+
+def test_sin_volumen_vwap_es_la_media_y_descarta_no_finitos():
+    movil = VentanaMovil(3)
+    for valor in [1.0, np.nan, 2.0, np.inf, 3.0, 4.0]:
+        movil.agregar(valor)
+
+    assert len(movil) == 3
+    assert movil.vwap == movil.media == pytest.approx(3.0)
+    assert movil.desvio == pytest.approx(1.0)
@@ -0,0 +1,24 @@
+import pytest
+
+from transporte import FinDeGrabacion, RespuestaGrabada, TransporteGrabador, TransporteReproductor
+
+
+class _TransportePorCuerpo:
+    """Responde con el cuerpo recibido, para distinguir consultas a la misma URL"""
+
+    def post(self, url, data=None, **kwargs):
+        return RespuestaGrabada(url, 200, str(data).encode('utf-8'))
+
+
+def test_reproduce_segun_el_cuerpo(tmp_path):
+    url = 'https://open.bymadata.com.ar/vanoms-be-core/rest/api/bymadata/free/public-bonds'
+    grabador = TransporteGrabador(str(tmp_path), _TransportePorCuerpo())
+    grabador.post(url, data='{"T1":true}')
+    grabador.post(url, data='{"T0":true}')
+
+    reproductor = TransporteReproductor(str(tmp_path))
+
+    assert reproductor.post(url, data='{"T0":true}').content == b'{"T0":true}'
+    assert reproductor.post(url, data='{"T1":true}').content == b'{"T1":true}'
+    with pytest.raises(FinDeGrabacion):
+        reproductor.post(url, data='{"T2":true}')
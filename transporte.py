@@ -0,0 +1,441 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FinDeGrabacion(requests.exceptions.RequestException):
+    """No quedan respuestas grabadas para la consulta pedida"""
+
+
+class RespuestaGrabada:
+    """Respuesta leída del disco con la misma interfaz que usan los scripts de requests.Response"""
+
+    def __init__(self, url, status_code, content, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class CircuitoAbierto(requests.exceptions.RequestException):
+    """El servidor falló demasiadas veces seguidas y se dejó de consultarlo por un rato"""
+
+
+# Códigos de respuesta que se reintentan (errores transitorios y límite de tasa)
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class LimitadorTasa:
+    """
+    Token bucket: permite 'tasa' consultas por segundo con ráfagas de hasta
+    'capacidad' consultas. Quien no encuentra un token espera a que se genere
+    """
+
+    def __init__(self, tasa, capacidad=None):
+        self.tasa = tasa
+        self.capacidad = capacidad if capacidad is not None else max(1.0, tasa)
+        self.__tokens = self.capacidad
+        self.__ultimo = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def esperar(self):
+        """Toma un token, esperando si no hay disponibles; retorna los segundos esperados"""
+        with self.__lock:
+            ahora = time.monotonic()
+            self.__tokens = min(self.capacidad, self.__tokens + (ahora - self.__ultimo) * self.tasa)
+            self.__ultimo = ahora
+            # El token se toma ahora aunque quede en negativo: las esperas se encolan
+            self.__tokens -= 1
+            espera = -self.__tokens / self.tasa if self.__tokens < 0 else 0.0
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+class Circuito:
+    """
+    Circuit breaker por servidor: después de 'umbral' fallas seguidas se abre
+    y rechaza las consultas durante 'espera' segundos; pasado ese tiempo deja
+    pasar una consulta de prueba y se cierra si sale bien
+    """
+
+    def __init__(self, umbral=5, espera=30.0):
+        self.umbral = umbral
+        self.espera = espera
+        self.__fallas = 0
+        self.__abierto_hasta = None
+        self.__prueba_en_curso = False
+        self.__lock = threading.Lock()
+
+    @property
+    def estado(self):
+        if self.__abierto_hasta is None:
+            return 'cerrado'
+        return 'abierto' if time.monotonic() < self.__abierto_hasta else 'semiabierto'
+
+    def permitir(self):
+        """Indica si se puede consultar; en semiabierto solo pasa una consulta a la vez"""
+        with self.__lock:
+            if self.__abierto_hasta is None:
+                return True
+            if time.monotonic() < self.__abierto_hasta or self.__prueba_en_curso:
+                return False
+            self.__prueba_en_curso = True
+            return True
+
+    def exito(self):
+        with self.__lock:
+            self.__fallas = 0
+            self.__abierto_hasta = None
+            self.__prueba_en_curso = False
+
+    def falla(self):
+        with self.__lock:
+            self.__fallas += 1
+            if self.__prueba_en_curso or self.__fallas >= self.umbral:
+                self.__abierto_hasta = time.monotonic() + self.espera
+            self.__prueba_en_curso = False
+
+
+class PoliticaReintentos:
+    """
+    Reintentos con backoff exponencial y jitter sobre un circuit breaker
+    La comparten TransporteHTTP y el cliente asincrónico (byma_async): cada
+    intento pasa por admitir() y su resultado por fallo() o respuesta(), que
+    actualizan el circuito y retornan los segundos a esperar antes del
+    próximo intento, o None si no hay que reintentar
+    errores_reintentables: excepciones del cliente HTTP que se reintentan
+    (errores de conexión y timeouts); las demás se relanzan enseguida
+    """
+
+    def __init__(self, reintentos=3, backoff=0.5, backoff_maximo=10.0,
+                 errores_reintentables=(requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.backoff_maximo = backoff_maximo
+        self.errores_reintentables = errores_reintentables
+
+    def admitir(self, circuito, servidor):
+        """Lanza CircuitoAbierto si el circuito no deja pasar la consulta"""
+        if not circuito.permitir():
+            raise CircuitoAbierto(f"Demasiadas fallas seguidas en {servidor}; se reintentará en {circuito.espera:g} s")
+
+    def fallo(self, circuito, intento, error):
+        """
+        Registra una excepción del intento; cualquier excepción cuenta como falla
+        para que una consulta de prueba no deje el circuito tomado
+        """
+        circuito.falla()
+        if not isinstance(error, self.errores_reintentables) or intento >= self.reintentos:
+            return None
+        return self.espera(intento)
+
+    def respuesta(self, circuito, intento, estado, retry_after=None):
+        """Registra el código de respuesta del intento"""
+        if estado not in ESTADOS_REINTENTABLES:
+            circuito.exito()
+            return None
+        circuito.falla()
+        if intento >= self.reintentos:
+            return None
+        return self.espera(intento, retry_after)
+
+    def espera(self, intento, retry_after=None):
+        """Backoff exponencial con jitter completo; respeta Retry-After si viene en segundos"""
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_maximo)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_maximo, self.backoff * 2 ** intento))
+
+
+class TransporteHTTP:
+    """
+    Transporte por defecto: una sesión de requests con pool de conexiones y keep-alive
+    Las fallas transitorias (errores de conexión, timeouts, 429 y 5xx) se
+    reintentan con backoff exponencial y jitter. Opcionalmente limita la tasa
+    de consultas (token bucket) y corta por servidor con un circuit breaker.
+    Lleva la latencia y los errores de cada endpoint (ver estadisticas)
+    """
+
+    def __init__(self, pool_maxsize=10, reintentos=3, backoff=0.5, backoff_maximo=10.0,
+                 tasa=None, capacidad=None, umbral_circuito=5, espera_circuito=30.0):
+        self.sesion = requests.session()
+        self.sesion.headers['Connection'] = 'keep-alive'
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.sesion.mount('https://', adaptador)
+        self.sesion.mount('http://', adaptador)
+
+        self.politica = PoliticaReintentos(reintentos, backoff, backoff_maximo)
+        self.limitador = LimitadorTasa(tasa, capacidad) if tasa else None
+        self.__umbral_circuito = umbral_circuito
+        self.__espera_circuito = espera_circuito
+        self.__circuitos = {}
+        self.__contadores = {}
+        self.__lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return self.__consultar('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.__consultar('POST', url, **kwargs)
+
+    def __consultar(self, metodo, url, **kwargs):
+        partes = urlsplit(url)
+        circuito = self.__circuito(partes.netloc)
+        endpoint = f"{metodo} {partes.netloc}{partes.path}"
+
+        intento = 0
+        while True:
+            try:
+                self.politica.admitir(circuito, partes.netloc)
+            except CircuitoAbierto:
+                self.__contar(endpoint, error='circuito abierto')
+                raise
+            if self.limitador is not None:
+                self.limitador.esperar()
+
+            inicio = time.perf_counter()
+            try:
+                respuesta = self.sesion.request(metodo, url, **kwargs)
+            except BaseException as e:
+                self.__contar(endpoint, time.perf_counter() - inicio, error=type(e).__name__, reintento=intento > 0)
+                espera = self.politica.fallo(circuito, intento, e)
+                if espera is None:
+                    raise
+                time.sleep(espera)
+                intento += 1
+                continue
+
+            latencia = time.perf_counter() - inicio
+            espera = self.politica.respuesta(circuito, intento, respuesta.status_code, respuesta.headers.get('Retry-After'))
+            error = f"HTTP {respuesta.status_code}" if respuesta.status_code in ESTADOS_REINTENTABLES else None
+            self.__contar(endpoint, latencia, error=error, reintento=intento > 0)
+            if espera is None:
+                return respuesta
+            time.sleep(espera)
+            intento += 1
+
+    def __circuito(self, servidor):
+        with self.__lock:
+            if servidor not in self.__circuitos:
+                self.__circuitos[servidor] = Circuito(self.__umbral_circuito, self.__espera_circuito)
+            return self.__circuitos[servidor]
+
+    def __contar(self, endpoint, latencia=None, error=None, reintento=False):
+        with self.__lock:
+            contador = self.__contadores.setdefault(endpoint, {
+                'consultas': 0, 'errores': 0, 'reintentos': 0,
+                'latencia_total': 0.0, 'latencia_maxima': 0.0, 'ultimo_error': None,
+            })
+            contador['reintentos'] += reintento
+            # Las consultas rechazadas por el circuito cuentan solo como error
+            if latencia is not None:
+                contador['consultas'] += 1
+                contador['latencia_total'] += latencia
+                contador['latencia_maxima'] = max(contador['latencia_maxima'], latencia)
+            if error is not None:
+                contador['errores'] += 1
+                contador['ultimo_error'] = error
+
+    def estadisticas(self):
+        """
+        Consultas hechas, errores, reintentos y latencia (media y máxima, en segundos)
+        de cada endpoint ('METODO servidor/ruta'), más el estado de cada circuito
+        """
+        with self.__lock:
+            resultado = {}
+            for endpoint, contador in self.__contadores.items():
+                datos = dict(contador)
+                datos['latencia_media'] = datos.pop('latencia_total') / datos['consultas'] if datos['consultas'] else 0.0
+                datos['circuito'] = self.__circuitos[endpoint.split(' ', 1)[1].split('/', 1)[0]].estado
+                resultado[endpoint] = datos
+            return resultado
+
+
+def hash_cuerpo(kwargs):
+    """
+    Hash corto del cuerpo de una consulta (data o json de requests), o None si no lleva
+    Distingue en la grabación consultas a la misma URL con distinto cuerpo
+    """
+    if kwargs.get('json') is not None:
+        cuerpo = json.dumps(kwargs['json'], sort_keys=True).encode('utf-8')
+    else:
+        cuerpo = kwargs.get('data')
+        if cuerpo is None:
+            return None
+        if isinstance(cuerpo, dict):
+            cuerpo = json.dumps(cuerpo, sort_keys=True)
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode('utf-8')
+    return hashlib.sha256(cuerpo).hexdigest()[:16]
+
+
+class TransporteGrabador:
+    """
+    Envuelve otro transporte y guarda en disco cada respuesta cruda
+    En el directorio queda un índice (indice.jsonl) con la hora, el método, la
+    URL y el hash del cuerpo de cada consulta, y el cuerpo de cada respuesta en
+    su propio archivo
+    """
+
+    def __init__(self, directorio, transporte=None):
+        self.directorio = directorio
+        self.transporte = transporte if transporte is not None else TransporteHTTP()
+        self.__lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    def get(self, url, **kwargs):
+        return self.__grabar('GET', url, hash_cuerpo(kwargs), self.transporte.get(url, **kwargs))
+
+    def post(self, url, **kwargs):
+        return self.__grabar('POST', url, hash_cuerpo(kwargs), self.transporte.post(url, **kwargs))
+
+    def estadisticas(self):
+        return self.transporte.estadisticas() if hasattr(self.transporte, 'estadisticas') else {}
+
+    def __grabar(self, metodo, url, cuerpo, respuesta):
+        marca = time.time()
+        nombre = re.sub(r'[^A-Za-z0-9]+', '-', url.split('://', 1)[-1]).strip('-')[-60:]
+        with self.__lock:
+            archivo = f"{int(marca * 1e6)}-{metodo}-{nombre}.bin"
+            with open(os.path.join(self.directorio, archivo), 'wb') as f:
+                f.write(respuesta.content)
+            registro = {
+                'timestamp': marca,
+                'metodo': metodo,
+                'url': url,
+                'cuerpo': cuerpo,
+                'status_code': respuesta.status_code,
+                'content_type': respuesta.headers.get('Content-Type'),
+                'archivo': archivo,
+            }
+            with open(os.path.join(self.directorio, 'indice.jsonl'), 'a') as f:
+                f.write(json.dumps(registro) + '\n')
+        return respuesta
+
+
+class TransporteReproductor:
+    """
+    Sirve desde el disco las respuestas guardadas por TransporteGrabador
+    Cada consulta recibe la siguiente respuesta grabada para su método, URL y
+    cuerpo (las grabaciones sin hash del cuerpo se sirven por método y URL).
+    Con velocidad se respetan los intervalos originales entre respuestas
+    divididos por ese factor (100 = cien veces más rápido que el mercado);
+    con velocidad=None se sirven sin esperas
+    """
+
+    def __init__(self, directorio, velocidad=None, repetir=False):
+        self.directorio = directorio
+        self.velocidad = velocidad
+        self.repetir = repetir
+        self.__lock = threading.Lock()
+
+        with open(os.path.join(directorio, 'indice.jsonl')) as f:
+            registros = sorted((json.loads(linea) for linea in f if linea.strip()), key=lambda r: r['timestamp'])
+        if not registros:
+            raise ValueError(f"No hay respuestas grabadas en {directorio}")
+
+        self.__cola = {}
+        for registro in registros:
+            self.__cola.setdefault((registro['metodo'], registro['url'], registro.get('cuerpo')), []).append(registro)
+        self.__posicion = dict.fromkeys(self.__cola, 0)
+        self.__t0_grabacion = registros[0]['timestamp']
+        self.__duracion = registros[-1]['timestamp'] - self.__t0_grabacion
+        self.__t0_reproduccion = None
+
+    def get(self, url, **kwargs):
+        return self.__reproducir('GET', url, hash_cuerpo(kwargs))
+
+    def post(self, url, **kwargs):
+        return self.__reproducir('POST', url, hash_cuerpo(kwargs))
+
+    def __reproducir(self, metodo, url, cuerpo):
+        clave = (metodo, url, cuerpo)
+        with self.__lock:
+            if clave not in self.__cola:
+                # Grabaciones anteriores al hash del cuerpo
+                clave = (metodo, url, None)
+            if clave not in self.__cola:
+                raise FinDeGrabacion(f"No hay respuestas grabadas para {metodo} {url}")
+            if self.__t0_reproduccion is None:
+                self.__t0_reproduccion = time.monotonic()
+
+            registros = self.__cola[clave]
+            posicion = self.__posicion[clave]
+            vuelta, indice = divmod(posicion, len(registros))
+            if vuelta and not self.repetir:
+                raise FinDeGrabacion(f"Se reprodujeron todas las respuestas de {metodo} {url}")
+            self.__posicion[clave] = posicion + 1
+            registro = registros[indice]
+
+        # Esperar hasta el momento de la respuesta en el reloj de la reproducción
+        if self.velocidad:
+            desfase = registro['timestamp'] - self.__t0_grabacion + vuelta * self.__duracion
+            espera = self.__t0_reproduccion + desfase / self.velocidad - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+
+        with open(os.path.join(self.directorio, registro['archivo']), 'rb') as f:
+            contenido = f.read()
+        headers = {'Content-Type': registro['content_type']} if registro.get('content_type') else {}
+        return RespuestaGrabada(url, registro['status_code'], contenido, headers)
+
+
+def transporte_configurado():
+    """
+    Transporte indicado por las variables de entorno
+    BYMA_REPRODUCIR=<dir> sirve respuestas grabadas (BYMA_VELOCIDAD=<factor>),
+    BYMA_GRABAR=<dir> graba las respuestas reales; sin ellas, HTTP directo
+    BYMA_TASA=<consultas por segundo> limita la tasa de las consultas reales
+    y BYMA_REINTENTOS=<n> cambia la cantidad de reintentos
+    """
+    reproducir = os.environ.get('BYMA_REPRODUCIR')
+    if reproducir:
+        velocidad = os.environ.get('BYMA_VELOCIDAD')
+        return TransporteReproductor(reproducir, velocidad=float(velocidad) if velocidad else None,
+                                     repetir=os.environ.get('BYMA_REPETIR') == '1')
+
+    tasa = os.environ.get('BYMA_TASA')
+    reintentos = os.environ.get('BYMA_REINTENTOS')
+    http = TransporteHTTP(tasa=float(tasa) if tasa else None,
+                          reintentos=int(reintentos) if reintentos else 3)
+    grabar = os.environ.get('BYMA_GRABAR')
+    if grabar:
+        return TransporteGrabador(grabar, http)
+    return http
+
+
+# Transporte compartido por todos los módulos del proceso
+_transporte = None
+_transporte_lock = threading.Lock()
+
+
+def transporte_compartido():
+    """
+    Retorna un único transporte configurado para todo el proceso, así todas
+    las consultas comparten el pool de conexiones, el limitador de tasa y los
+    circuitos
+    """
+    global _transporte
+    if _transporte is None:
+        with _transporte_lock:
+            if _transporte is None:
+                _transporte = transporte_configurado()
+    return _transporte